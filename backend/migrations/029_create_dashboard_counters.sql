@@ -0,0 +1,89 @@
+-- Migration 029: Materialized dashboard counters
+-- Dashboard endpoints read these instead of running count(*) over full tables
+-- on every page view. The backend refreshes them concurrently on a schedule
+-- (DASHBOARD_COUNTERS_REFRESH_SECONDS) and falls back to live queries when
+-- they are older than DASHBOARD_COUNTERS_MAX_STALENESS_SECONDS.
+
+-- Per-category totals. category '*' is the total over all rows, '' groups rows
+-- without a category. Buyer categories follow the brokerage dashboard mapping
+-- of preferred_property_type, and a match belongs to a category only when the
+-- property category, buyer type and transaction type all agree.
+CREATE MATERIALIZED VIEW IF NOT EXISTS dashboard_category_counters AS
+WITH client_categories AS (
+    SELECT
+        c.id,
+        c.request_type,
+        CASE
+            WHEN c.preferred_property_type IN ('דירה', 'בית פרטי', 'בית') THEN 'מגורים'
+            WHEN c.preferred_property_type IN ('משרד', 'מסחרי') THEN 'משרדים'
+        END AS category
+    FROM clients c
+),
+match_categories AS (
+    SELECT
+        CASE
+            WHEN p.category = cc.category
+             AND (
+                p.listing_type = cc.request_type
+                OR (p.listing_type = 'מכירה' AND cc.request_type = 'קנייה')
+                OR (p.listing_type = 'השכרה' AND cc.request_type = 'שכירות')
+             )
+            THEN p.category
+        END AS category
+    FROM matches m
+    JOIN properties p ON p.id = m.property_id
+    JOIN client_categories cc ON cc.id = m.client_id
+)
+SELECT 'properties'::TEXT AS metric,
+       CASE WHEN GROUPING(category) = 1 THEN '*' ELSE COALESCE(category, '') END AS category,
+       count(*)::BIGINT AS value,
+       now() AS refreshed_at
+FROM properties
+GROUP BY GROUPING SETS ((category), ())
+UNION ALL
+SELECT 'buyers',
+       CASE WHEN GROUPING(category) = 1 THEN '*' ELSE COALESCE(category, '') END,
+       count(*)::BIGINT,
+       now()
+FROM client_categories
+GROUP BY GROUPING SETS ((category), ())
+UNION ALL
+SELECT 'matches',
+       CASE WHEN GROUPING(category) = 1 THEN '*' ELSE COALESCE(category, '') END,
+       count(*)::BIGINT,
+       now()
+FROM match_categories
+GROUP BY GROUPING SETS ((category), ())
+UNION ALL
+SELECT 'marketing_leads', '*', count(*)::BIGINT, now() FROM marketing_leads
+UNION ALL
+SELECT 'project_leads', '*', count(*)::BIGINT, now() FROM project_leads;
+
+-- REFRESH ... CONCURRENTLY requires a unique index covering every row
+CREATE UNIQUE INDEX IF NOT EXISTS idx_dashboard_category_counters_metric_category
+    ON dashboard_category_counters(metric, category);
+
+-- Rows created per UTC day over the last four weeks; the dashboard sums
+-- these into the rolling "this week" / "previous week" windows.
+CREATE MATERIALIZED VIEW IF NOT EXISTS dashboard_daily_counters AS
+SELECT 'properties'::TEXT AS metric,
+       (created_date AT TIME ZONE 'UTC')::DATE AS day,
+       count(*)::BIGINT AS value,
+       now() AS refreshed_at
+FROM properties
+WHERE created_date >= (now() AT TIME ZONE 'UTC')::DATE - 28
+GROUP BY 2
+UNION ALL
+SELECT 'buyers',
+       (created_date AT TIME ZONE 'UTC')::DATE,
+       count(*)::BIGINT,
+       now()
+FROM clients
+WHERE created_date >= (now() AT TIME ZONE 'UTC')::DATE - 28
+GROUP BY 2;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_dashboard_daily_counters_metric_day
+    ON dashboard_daily_counters(metric, day);
+
+GRANT SELECT ON dashboard_category_counters TO authenticated;
+GRANT SELECT ON dashboard_daily_counters TO authenticated;
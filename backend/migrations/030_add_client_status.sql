@@ -0,0 +1,8 @@
+-- Migration 030: Add the buyer pipeline status to clients
+-- The buyers UI and the dashboard alerts panel already use status
+-- (קונה חדש, אין מענה, פולואפ, נקבעה פגישה, נחתם הסכם תיווך), but the
+-- column was never created.
+ALTER TABLE clients ADD COLUMN IF NOT EXISTS status VARCHAR(50) DEFAULT 'קונה חדש';
+
+-- Untreated leads alert: status = 'קונה חדש' AND created_date <= now() - 4 hours
+CREATE INDEX IF NOT EXISTS idx_clients_status_created_date ON clients(status, created_date);
@@ -0,0 +1,7 @@
+-- Migration 031: Indexes for the dashboard recent-activity feed
+-- Each branch of the feed reads the newest rows of its table ordered by
+-- (created_date, id) and continues from a cursor on the same key.
+CREATE INDEX IF NOT EXISTS idx_properties_created_date_id ON properties(created_date, id);
+CREATE INDEX IF NOT EXISTS idx_clients_created_date_id ON clients(created_date, id);
+CREATE INDEX IF NOT EXISTS idx_meetings_created_date_id ON meetings(created_date, id);
+CREATE INDEX IF NOT EXISTS idx_service_calls_created_date_id ON service_calls(created_date, id);
@@ -0,0 +1,64 @@
+-- Migration 032: Normalized E.164 phone numbers on the Do-Not-Call list
+-- Do-Not-Call checks compare numbers regardless of formatting
+-- ("050-123 4567", "+972501234567", "0501234567" are the same number).
+-- Instead of normalizing every list entry on every send, the normalized form
+-- is stored once per row, kept current by a trigger and uniquely indexed.
+-- src/utils/phone.py implements the same rules for the values being checked.
+
+-- Israeli numbers: local 0-prefixed and bare 972-prefixed numbers become +972...,
+-- 00-prefixed international numbers become +...
+-- E.164 numbers are at most 15 digits; longer results (free text holding
+-- several numbers, "050-1234567 / 052-7654321") are not one phone number and
+-- normalize to NULL, which also keeps them within the VARCHAR(20) columns.
+CREATE OR REPLACE FUNCTION normalize_phone_e164(phone TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE
+AS $$
+    SELECT CASE WHEN length(e.e164) <= 16 THEN e.e164 END
+    FROM (
+        SELECT CASE
+            WHEN p.digits = '' THEN NULL
+            WHEN p.has_plus THEN '+' || p.digits
+            WHEN p.digits LIKE '00%' THEN '+' || substr(p.digits, 3)
+            WHEN p.digits LIKE '972%' THEN '+' || p.digits
+            WHEN p.digits LIKE '0%' THEN '+972' || substr(p.digits, 2)
+            ELSE '+972' || p.digits
+        END AS e164
+        FROM (
+            SELECT regexp_replace(phone, '\D', '', 'g') AS digits,
+                   ltrim(phone) LIKE '+%' AS has_plus
+        ) AS p
+    ) AS e
+$$;
+
+ALTER TABLE do_not_call_list ADD COLUMN IF NOT EXISTS phone_normalized VARCHAR(20);
+
+-- Backfill. Entries that differ only in formatting keep the normalized value
+-- on the oldest row; the later duplicates stay NULL (the oldest row already
+-- blocks the number) so the unique index can be built.
+UPDATE do_not_call_list d
+SET phone_normalized = n.phone_normalized
+FROM (
+    SELECT id,
+           normalize_phone_e164(phone_number) AS phone_normalized,
+           row_number() OVER (PARTITION BY normalize_phone_e164(phone_number) ORDER BY id) AS rn
+    FROM do_not_call_list
+) AS n
+WHERE d.id = n.id AND n.rn = 1;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_do_not_call_list_phone_normalized
+    ON do_not_call_list(phone_normalized);
+
+-- Populate on every write, including rows added through PostgREST
+CREATE OR REPLACE FUNCTION set_do_not_call_phone_normalized()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.phone_normalized := normalize_phone_e164(NEW.phone_number);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_do_not_call_list_phone_normalized ON do_not_call_list;
+CREATE TRIGGER trg_do_not_call_list_phone_normalized
+    BEFORE INSERT OR UPDATE OF phone_number ON do_not_call_list
+    FOR EACH ROW EXECUTE FUNCTION set_do_not_call_phone_normalized();
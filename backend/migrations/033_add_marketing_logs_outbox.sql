@@ -0,0 +1,20 @@
+-- Migration 033: Use marketing_logs as the outbound WhatsApp message queue
+-- /api/whatsapp/send-bulk inserts rows with status 'pending' and returns a
+-- job_id. Dispatcher workers claim due rows with FOR UPDATE SKIP LOCKED,
+-- mark them 'sending' for a lease period, and finish them as 'sent', back to
+-- 'pending' with a later next_attempt_at (retry), or 'failed'.
+ALTER TABLE marketing_logs ADD COLUMN IF NOT EXISTS job_id UUID;
+ALTER TABLE marketing_logs ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE marketing_logs ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP;
+ALTER TABLE marketing_logs ADD COLUMN IF NOT EXISTS last_error TEXT;
+ALTER TABLE marketing_logs ADD COLUMN IF NOT EXISTS provider_message_id VARCHAR(255);
+ALTER TABLE marketing_logs ADD COLUMN IF NOT EXISTS sent_at TIMESTAMP WITH TIME ZONE;
+
+-- A retried send-bulk request with the same job_id does not enqueue a lead twice
+CREATE UNIQUE INDEX IF NOT EXISTS idx_marketing_logs_job_lead
+    ON marketing_logs(job_id, lead_id);
+
+-- Only queued rows are indexed, so the claim query stays cheap as the log grows
+CREATE INDEX IF NOT EXISTS idx_marketing_logs_outbox_due
+    ON marketing_logs(next_attempt_at, id)
+    WHERE status IN ('pending', 'sending');
@@ -0,0 +1,113 @@
+-- Migration 034: Set-based match generation
+-- Replaces the PL/pgSQL functions from migration 027, which looped over
+-- clients for every property and probed matches once per pair, with single
+-- SQL statements the planner can run as hash joins:
+--   * the transaction-type rule becomes an equi-join on listing type
+--     (a client asking for קנייה / שכירות also joins מכירה / השכרה listings)
+--   * "match does not exist yet" becomes an anti-join on matches
+--   * the score is a sum of CASE expressions
+-- Scoring rules are unchanged, except that the area rule no longer refers to
+-- clients.desired_area: that column does not exist, so the old function
+-- failed as soon as it reached a candidate pair.
+-- The function bodies contain no line-terminating semicolons, so
+-- scripts/migrate.py can run this file too.
+
+CREATE OR REPLACE FUNCTION generate_matches(
+    category_param TEXT DEFAULT NULL,
+    property_ids INTEGER[] DEFAULT NULL,
+    client_ids INTEGER[] DEFAULT NULL
+)
+RETURNS TABLE (
+    property_id INTEGER,
+    client_id INTEGER,
+    match_score INTEGER,
+    match_reason TEXT
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH client_listings AS (
+        -- Every listing type a client's request type matches
+        SELECT c.*, c.request_type AS listing_type
+        FROM clients c
+        UNION ALL
+        SELECT c.*, CASE c.request_type WHEN 'קנייה' THEN 'מכירה' ELSE 'השכרה' END
+        FROM clients c
+        WHERE c.request_type IN ('קנייה', 'שכירות')
+    ),
+    candidates AS (
+        SELECT
+            p.id AS property_id,
+            c.id AS client_id,
+            COALESCE(p.area = c.neighborhood, FALSE) AS area_hit,
+            CASE
+                WHEN p.rooms IS NOT NULL AND c.preferred_rooms IS NOT NULL THEN
+                    CASE WHEN p.rooms::TEXT = c.preferred_rooms THEN 'Rooms match; ' END
+                WHEN p.rooms IS NOT NULL AND c.rooms_min IS NOT NULL AND c.rooms_max IS NOT NULL THEN
+                    CASE WHEN p.rooms BETWEEN c.rooms_min AND c.rooms_max THEN 'Rooms in range; ' END
+            END AS rooms_reason,
+            COALESCE(p.property_type = c.preferred_property_type, FALSE) AS type_hit,
+            COALESCE(p.price <= c.budget * 1.10, FALSE) AS budget_hit
+        FROM properties p
+        JOIN client_listings c ON c.listing_type = p.listing_type
+        WHERE (category_param IS NULL OR p.category = category_param)
+          AND (property_ids IS NULL OR p.id = ANY(property_ids))
+          AND (category_param IS NULL OR
+               (category_param = 'מגורים' AND c.preferred_property_type IN ('דירה', 'בית פרטי', 'בית')) OR
+               (category_param = 'משרדים' AND c.preferred_property_type IN ('משרד', 'מסחרי')))
+          AND (client_ids IS NULL OR c.id = ANY(client_ids))
+          AND NOT EXISTS (
+            SELECT 1 FROM matches m
+            WHERE m.property_id = p.id
+              AND m.client_id = c.id
+          )
+    ),
+    scored AS (
+        SELECT
+            property_id,
+            client_id,
+            CASE WHEN area_hit THEN 20 ELSE 0 END
+              + CASE WHEN rooms_reason IS NOT NULL THEN 20 ELSE 0 END
+              + CASE WHEN type_hit THEN 20 ELSE 0 END
+              + 20  -- transaction type, guaranteed by the join
+              + CASE WHEN budget_hit THEN 20 ELSE 0 END AS match_score,
+            concat(
+                CASE WHEN area_hit THEN 'Area match; ' END,
+                rooms_reason,
+                CASE WHEN type_hit THEN 'Type match; ' END,
+                'Transaction match; ',
+                CASE WHEN budget_hit THEN 'Budget match; ' END
+            ) AS match_reason
+        FROM candidates
+    )
+    -- Only return matches with score >= 60 (at least 3 criteria match)
+    SELECT property_id, client_id, match_score, match_reason
+    FROM scored
+    WHERE match_score >= 60
+$$;
+
+-- Insert every generated match in one INSERT ... SELECT
+-- Returns JSON with created count and match ids, as before
+CREATE OR REPLACE FUNCTION create_matches_from_generation(
+    category_param TEXT DEFAULT NULL,
+    property_ids INTEGER[] DEFAULT NULL,
+    client_ids INTEGER[] DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE sql
+AS $$
+    WITH created AS (
+        INSERT INTO matches (property_id, client_id, match_score, status)
+        SELECT g.property_id, g.client_id, g.match_score, 'הותאם'
+        FROM generate_matches(category_param, property_ids, client_ids) g
+        ON CONFLICT DO NOTHING
+        RETURNING id
+    )
+    SELECT json_build_object(
+        'created_count', count(*),
+        'match_ids', COALESCE(array_agg(id ORDER BY id), ARRAY[]::INTEGER[])
+    )
+    FROM created
+$$;
+
+GRANT EXECUTE ON FUNCTION generate_matches(TEXT, INTEGER[], INTEGER[]) TO authenticated;
+GRANT EXECUTE ON FUNCTION create_matches_from_generation(TEXT, INTEGER[], INTEGER[]) TO authenticated;
@@ -0,0 +1,232 @@
+-- Migration 035: Incremental match maintenance
+-- Inserts and scoring-relevant updates on properties and clients are queued
+-- by triggers in match_refresh_queue. The backend drains the queue every few
+-- seconds with process_match_refresh_queue(), which scores only the changed
+-- rows against the other side and:
+--   * creates matches for newly qualifying pairs
+--   * updates the score of untouched ('הותאם') matches that still qualify
+--   * retires untouched matches that no longer qualify (price, rooms, status,
+--     ... changed) by setting their status to 'לא רלוונטי'
+-- Matches a user already acted on (any other status) are never changed.
+-- Closed listings (property status 'נסגר', client status 'עסקה נסגרה') no
+-- longer qualify for matches.
+
+CREATE TABLE IF NOT EXISTS match_refresh_queue (
+    id BIGSERIAL PRIMARY KEY,
+    entity VARCHAR(20) NOT NULL CHECK (entity IN ('property', 'client')),
+    entity_id INTEGER NOT NULL,
+    enqueued_at TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+-- A row changed several times before the queue is drained is refreshed once
+CREATE UNIQUE INDEX IF NOT EXISTS idx_match_refresh_queue_entity
+    ON match_refresh_queue(entity, entity_id);
+
+-- Every pair that qualifies under the generation rules, whether or not a
+-- match row already exists (generate_matches adds the anti-join)
+CREATE OR REPLACE FUNCTION score_matches(
+    category_param TEXT DEFAULT NULL,
+    property_ids INTEGER[] DEFAULT NULL,
+    client_ids INTEGER[] DEFAULT NULL
+)
+RETURNS TABLE (
+    property_id INTEGER,
+    client_id INTEGER,
+    match_score INTEGER,
+    match_reason TEXT
+)
+LANGUAGE sql STABLE
+AS $$
+    WITH client_listings AS (
+        -- Every listing type a client's request type matches
+        SELECT c.*, c.request_type AS listing_type
+        FROM clients c
+        UNION ALL
+        SELECT c.*, CASE c.request_type WHEN 'קנייה' THEN 'מכירה' ELSE 'השכרה' END
+        FROM clients c
+        WHERE c.request_type IN ('קנייה', 'שכירות')
+    ),
+    candidates AS (
+        SELECT
+            p.id AS property_id,
+            c.id AS client_id,
+            COALESCE(p.area = c.neighborhood, FALSE) AS area_hit,
+            CASE
+                WHEN p.rooms IS NOT NULL AND c.preferred_rooms IS NOT NULL THEN
+                    CASE WHEN p.rooms::TEXT = c.preferred_rooms THEN 'Rooms match; ' END
+                WHEN p.rooms IS NOT NULL AND c.rooms_min IS NOT NULL AND c.rooms_max IS NOT NULL THEN
+                    CASE WHEN p.rooms BETWEEN c.rooms_min AND c.rooms_max THEN 'Rooms in range; ' END
+            END AS rooms_reason,
+            COALESCE(p.property_type = c.preferred_property_type, FALSE) AS type_hit,
+            COALESCE(p.price <= c.budget * 1.10, FALSE) AS budget_hit
+        FROM properties p
+        JOIN client_listings c ON c.listing_type = p.listing_type
+        WHERE (category_param IS NULL OR p.category = category_param)
+          AND (property_ids IS NULL OR p.id = ANY(property_ids))
+          AND (category_param IS NULL OR
+               (category_param = 'מגורים' AND c.preferred_property_type IN ('דירה', 'בית פרטי', 'בית')) OR
+               (category_param = 'משרדים' AND c.preferred_property_type IN ('משרד', 'מסחרי')))
+          AND (client_ids IS NULL OR c.id = ANY(client_ids))
+          AND p.status IS DISTINCT FROM 'נסגר'
+          AND c.status IS DISTINCT FROM 'עסקה נסגרה'
+    ),
+    scored AS (
+        SELECT
+            property_id,
+            client_id,
+            CASE WHEN area_hit THEN 20 ELSE 0 END
+              + CASE WHEN rooms_reason IS NOT NULL THEN 20 ELSE 0 END
+              + CASE WHEN type_hit THEN 20 ELSE 0 END
+              + 20  -- transaction type, guaranteed by the join
+              + CASE WHEN budget_hit THEN 20 ELSE 0 END AS match_score,
+            concat(
+                CASE WHEN area_hit THEN 'Area match; ' END,
+                rooms_reason,
+                CASE WHEN type_hit THEN 'Type match; ' END,
+                'Transaction match; ',
+                CASE WHEN budget_hit THEN 'Budget match; ' END
+            ) AS match_reason
+        FROM candidates
+    )
+    -- Only return matches with score >= 60 (at least 3 criteria match)
+    SELECT property_id, client_id, match_score, match_reason
+    FROM scored
+    WHERE match_score >= 60
+$$;
+
+-- Qualifying pairs without a match row yet (same result shape as migration 034)
+CREATE OR REPLACE FUNCTION generate_matches(
+    category_param TEXT DEFAULT NULL,
+    property_ids INTEGER[] DEFAULT NULL,
+    client_ids INTEGER[] DEFAULT NULL
+)
+RETURNS TABLE (
+    property_id INTEGER,
+    client_id INTEGER,
+    match_score INTEGER,
+    match_reason TEXT
+)
+LANGUAGE sql STABLE
+AS $$
+    SELECT s.property_id, s.client_id, s.match_score, s.match_reason
+    FROM score_matches(category_param, property_ids, client_ids) s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM matches m
+        WHERE m.property_id = s.property_id
+          AND m.client_id = s.client_id
+    )
+$$;
+
+-- Apply one batch of queued changes; returns what it did as JSON
+CREATE OR REPLACE FUNCTION process_match_refresh_queue(batch_size INTEGER DEFAULT 500)
+RETURNS JSON AS $$
+DECLARE
+    changed_properties INTEGER[];
+    changed_clients INTEGER[];
+    retired_count INTEGER;
+    rescored_count INTEGER;
+    created_count INTEGER;
+BEGIN
+    -- Claim a batch; concurrent callers skip rows another caller holds
+    WITH claimed AS (
+        DELETE FROM match_refresh_queue
+        WHERE id IN (
+            SELECT id FROM match_refresh_queue
+            ORDER BY id
+            LIMIT batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING entity, entity_id
+    )
+    SELECT
+        COALESCE(array_agg(entity_id) FILTER (WHERE entity = 'property'), ARRAY[]::INTEGER[]),
+        COALESCE(array_agg(entity_id) FILTER (WHERE entity = 'client'), ARRAY[]::INTEGER[])
+    INTO changed_properties, changed_clients
+    FROM claimed;
+
+    IF cardinality(changed_properties) = 0 AND cardinality(changed_clients) = 0 THEN
+        RETURN json_build_object('processed', 0, 'created', 0, 'rescored', 0, 'retired', 0);
+    END IF;
+
+    WITH current_pairs AS (
+        SELECT * FROM score_matches(NULL, changed_properties, NULL)
+        UNION
+        SELECT * FROM score_matches(NULL, NULL, changed_clients)
+    ),
+    retired AS (
+        UPDATE matches m
+        SET status = 'לא רלוונטי', updated_date = CURRENT_TIMESTAMP
+        WHERE m.status = 'הותאם'
+          AND (m.property_id = ANY(changed_properties) OR m.client_id = ANY(changed_clients))
+          AND NOT EXISTS (
+            SELECT 1 FROM current_pairs cp
+            WHERE cp.property_id = m.property_id
+              AND cp.client_id = m.client_id
+          )
+        RETURNING 1
+    ),
+    rescored AS (
+        UPDATE matches m
+        SET match_score = cp.match_score, updated_date = CURRENT_TIMESTAMP
+        FROM current_pairs cp
+        WHERE m.property_id = cp.property_id
+          AND m.client_id = cp.client_id
+          AND m.status = 'הותאם'
+          AND m.match_score IS DISTINCT FROM cp.match_score
+        RETURNING 1
+    ),
+    created AS (
+        INSERT INTO matches (property_id, client_id, match_score, status)
+        SELECT cp.property_id, cp.client_id, cp.match_score, 'הותאם'
+        FROM current_pairs cp
+        WHERE NOT EXISTS (
+            SELECT 1 FROM matches m
+            WHERE m.property_id = cp.property_id
+              AND m.client_id = cp.client_id
+        )
+        RETURNING 1
+    )
+    SELECT
+        (SELECT count(*) FROM retired),
+        (SELECT count(*) FROM rescored),
+        (SELECT count(*) FROM created)
+    INTO retired_count, rescored_count, created_count;
+
+    RETURN json_build_object(
+        'processed', cardinality(changed_properties) + cardinality(changed_clients),
+        'created', created_count,
+        'rescored', rescored_count,
+        'retired', retired_count
+    );
+END;
+$$ LANGUAGE plpgsql;
+
+-- Queue triggers: only columns that affect scoring enqueue a refresh
+CREATE OR REPLACE FUNCTION enqueue_match_refresh()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO match_refresh_queue (entity, entity_id)
+    VALUES (TG_ARGV[0], NEW.id)
+    ON CONFLICT (entity, entity_id) DO NOTHING;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_properties_match_refresh ON properties;
+CREATE TRIGGER trg_properties_match_refresh
+    AFTER INSERT OR UPDATE OF category, listing_type, property_type, area, rooms, price, status
+    ON properties
+    FOR EACH ROW EXECUTE FUNCTION enqueue_match_refresh('property');
+
+DROP TRIGGER IF EXISTS trg_clients_match_refresh ON clients;
+CREATE TRIGGER trg_clients_match_refresh
+    AFTER INSERT OR UPDATE OF request_type, preferred_property_type, neighborhood,
+                              preferred_rooms, rooms_min, rooms_max, budget, status
+    ON clients
+    FOR EACH ROW EXECUTE FUNCTION enqueue_match_refresh('client');
+
+GRANT EXECUTE ON FUNCTION score_matches(TEXT, INTEGER[], INTEGER[]) TO authenticated;
+GRANT EXECUTE ON FUNCTION generate_matches(TEXT, INTEGER[], INTEGER[]) TO authenticated;
+-- Rows written through PostgREST fire the triggers as the authenticated role
+GRANT SELECT, INSERT ON match_refresh_queue TO authenticated;
+GRANT USAGE ON SEQUENCE match_refresh_queue_id_seq TO authenticated;
@@ -0,0 +1,12 @@
+-- Migration 036: Indexes for top-K match candidates
+-- /api/automation/matches/top selects candidates of a matching listing or
+-- request type that share the area, rooms or property type with the other
+-- side; each branch of that OR is served by one of these indexes
+-- (combined with a BitmapOr).
+CREATE INDEX IF NOT EXISTS idx_properties_listing_type_area ON properties(listing_type, area);
+CREATE INDEX IF NOT EXISTS idx_properties_listing_type_rooms ON properties(listing_type, rooms);
+CREATE INDEX IF NOT EXISTS idx_properties_listing_type_property_type ON properties(listing_type, property_type);
+
+CREATE INDEX IF NOT EXISTS idx_clients_request_type_neighborhood ON clients(request_type, neighborhood);
+CREATE INDEX IF NOT EXISTS idx_clients_request_type_preferred_rooms ON clients(request_type, preferred_rooms);
+CREATE INDEX IF NOT EXISTS idx_clients_request_type_rooms_range ON clients(request_type, rooms_min, rooms_max);
@@ -0,0 +1,15 @@
+-- Migration 037: Content-addressed upload store
+-- Upload bytes are stored once under uploads/<sha256><ext>; every upload gets
+-- its own row here mapping its file_id to that blob. scripts/gc_uploads.py
+-- deletes blobs no row refers to any more.
+CREATE TABLE IF NOT EXISTS uploaded_files (
+    id UUID PRIMARY KEY,
+    sha256 CHAR(64) NOT NULL,
+    extension VARCHAR(10) NOT NULL,
+    original_filename TEXT,
+    size BIGINT NOT NULL,
+    uploaded_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    created_date TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_uploaded_files_sha256 ON uploaded_files(sha256);
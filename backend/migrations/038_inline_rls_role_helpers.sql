@@ -0,0 +1,34 @@
+-- Migration 038: Inlinable RLS role helpers
+-- get_user_role() and is_admin() from migration 025 are PL/pgSQL, so the
+-- planner cannot see into them: a policy calling is_admin() runs the function
+-- (and parses request.jwt.claims as JSON) once per row it checks.
+--   * Both helpers become single-statement SQL functions, which the planner
+--     inlines into the calling query.
+--   * Policies wrap the call in (SELECT ...), which makes it an InitPlan:
+--     evaluated once per statement and reused for every row.
+-- Behaviour is unchanged: no claims, or a role other than 'admin', is not
+-- an admin. scripts/bench_rls_helpers.py compares both versions.
+
+CREATE OR REPLACE FUNCTION get_user_role()
+RETURNS TEXT
+LANGUAGE sql STABLE
+AS $$
+    SELECT current_setting('request.jwt.claims', true)::json->>'role'
+$$;
+
+CREATE OR REPLACE FUNCTION is_admin()
+RETURNS BOOLEAN
+LANGUAGE sql STABLE
+AS $$
+    SELECT get_user_role() = 'admin'
+$$;
+
+ALTER POLICY "Admins can insert users" ON users
+    WITH CHECK ((SELECT is_admin()));
+
+ALTER POLICY "Admins can update users" ON users
+    USING ((SELECT is_admin()))
+    WITH CHECK ((SELECT is_admin()));
+
+ALTER POLICY "Admins can delete users" ON users
+    USING ((SELECT is_admin()));
@@ -0,0 +1,58 @@
+-- Migration 039: CSV/XLSX import jobs
+-- Imports of marketing leads and properties run in the background; each job
+-- records its progress and outcome here (see src/services/imports.py).
+-- marketing_leads also gets the normalized E.164 phone (same rules and
+-- trigger as do_not_call_list in migration 032), so imported leads can be
+-- deduplicated against existing leads and checked against the Do-Not-Call
+-- list with indexed equality joins. normalize_phone_e164 returns NULL for
+-- values too long to be one number (free text such as "050-1234567 /
+-- 052-7654321"), so writes of such leads and this backfill cannot overflow
+-- the VARCHAR(20) column.
+
+CREATE TABLE IF NOT EXISTS import_jobs (
+    id UUID PRIMARY KEY,
+    kind VARCHAR(30) NOT NULL CHECK (kind IN ('marketing_leads', 'properties')),
+    status VARCHAR(20) NOT NULL DEFAULT 'pending'
+        CHECK (status IN ('pending', 'running', 'completed', 'failed')),
+    filename TEXT,
+    source VARCHAR(255),
+    -- Fraction of the file read so far (0 to 1)
+    progress REAL NOT NULL DEFAULT 0,
+    processed_rows INTEGER NOT NULL DEFAULT 0,
+    inserted_rows INTEGER NOT NULL DEFAULT 0,
+    duplicate_rows INTEGER NOT NULL DEFAULT 0,
+    do_not_call_rows INTEGER NOT NULL DEFAULT 0,
+    invalid_rows INTEGER NOT NULL DEFAULT 0,
+    -- The first validation errors, as [{"row": n, "error": "..."}]
+    errors JSONB NOT NULL DEFAULT '[]',
+    last_error TEXT,
+    created_by INTEGER REFERENCES users(id) ON DELETE SET NULL,
+    created_date TIMESTAMP WITH TIME ZONE DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP WITH TIME ZONE,
+    finished_at TIMESTAMP WITH TIME ZONE
+);
+
+CREATE INDEX IF NOT EXISTS idx_import_jobs_created_date ON import_jobs(created_date);
+
+ALTER TABLE marketing_leads ADD COLUMN IF NOT EXISTS phone_normalized VARCHAR(20);
+
+UPDATE marketing_leads
+SET phone_normalized = normalize_phone_e164(phone_number)
+WHERE phone_number IS NOT NULL;
+
+-- Not unique: existing leads may already share a number
+CREATE INDEX IF NOT EXISTS idx_marketing_leads_phone_normalized
+    ON marketing_leads(phone_normalized);
+
+CREATE OR REPLACE FUNCTION set_marketing_lead_phone_normalized()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.phone_normalized := normalize_phone_e164(NEW.phone_number);
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_marketing_leads_phone_normalized ON marketing_leads;
+CREATE TRIGGER trg_marketing_leads_phone_normalized
+    BEFORE INSERT OR UPDATE OF phone_number ON marketing_leads
+    FOR EACH ROW EXECUTE FUNCTION set_marketing_lead_phone_normalized();
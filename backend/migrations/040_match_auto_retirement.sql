@@ -0,0 +1,157 @@
+-- Migration 040: Only refresh matches the system created
+-- process_match_refresh_queue (migration 035) rescored and retired every
+-- 'הותאם' match, including matches users create by hand with that status,
+-- and retirement was one-way: a pair that qualified again stayed
+-- 'לא רלוונטי'. Matches now record whether the system manages them:
+--   * auto_generated: inserted by match generation or the refresh queue.
+--     Only these are rescored and retired, and only while still 'הותאם'.
+--   * auto_retired: set to 'לא רלוונטי' by the refresh queue. When the pair
+--     qualifies again the match is revived to 'הותאם' with its new score.
+-- A status change made by anyone else clears both flags, so a match a user
+-- acted on (including marking it irrelevant) is never changed again.
+-- Existing matches cannot be told apart and are treated as manual.
+
+ALTER TABLE matches ADD COLUMN IF NOT EXISTS auto_generated BOOLEAN NOT NULL DEFAULT FALSE;
+ALTER TABLE matches ADD COLUMN IF NOT EXISTS auto_retired BOOLEAN NOT NULL DEFAULT FALSE;
+
+-- The refresh queue changes auto_retired together with the status; any other
+-- status change hands the match over to the user
+CREATE OR REPLACE FUNCTION release_match_on_status_change()
+RETURNS TRIGGER AS $$
+BEGIN
+    IF NEW.status IS DISTINCT FROM OLD.status AND NEW.auto_retired = OLD.auto_retired THEN
+        NEW.auto_generated := FALSE;
+        NEW.auto_retired := FALSE;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_matches_release_on_status_change ON matches;
+CREATE TRIGGER trg_matches_release_on_status_change
+    BEFORE UPDATE OF status ON matches
+    FOR EACH ROW EXECUTE FUNCTION release_match_on_status_change();
+
+-- Generated matches are managed by the refresh queue
+CREATE OR REPLACE FUNCTION create_matches_from_generation(
+    category_param TEXT DEFAULT NULL,
+    property_ids INTEGER[] DEFAULT NULL,
+    client_ids INTEGER[] DEFAULT NULL
+)
+RETURNS JSON
+LANGUAGE sql
+AS $$
+    WITH created AS (
+        INSERT INTO matches (property_id, client_id, match_score, status, auto_generated)
+        SELECT g.property_id, g.client_id, g.match_score, 'הותאם', TRUE
+        FROM generate_matches(category_param, property_ids, client_ids) g
+        ON CONFLICT DO NOTHING
+        RETURNING id
+    )
+    SELECT json_build_object(
+        'created_count', count(*),
+        'match_ids', COALESCE(array_agg(id ORDER BY id), ARRAY[]::INTEGER[])
+    )
+    FROM created
+$$;
+
+-- Apply one batch of queued changes; returns what it did as JSON
+CREATE OR REPLACE FUNCTION process_match_refresh_queue(batch_size INTEGER DEFAULT 500)
+RETURNS JSON AS $$
+DECLARE
+    changed_properties INTEGER[];
+    changed_clients INTEGER[];
+    retired_count INTEGER;
+    revived_count INTEGER;
+    rescored_count INTEGER;
+    created_count INTEGER;
+BEGIN
+    -- Claim a batch; concurrent callers skip rows another caller holds
+    WITH claimed AS (
+        DELETE FROM match_refresh_queue
+        WHERE id IN (
+            SELECT id FROM match_refresh_queue
+            ORDER BY id
+            LIMIT batch_size
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING entity, entity_id
+    )
+    SELECT
+        COALESCE(array_agg(entity_id) FILTER (WHERE entity = 'property'), ARRAY[]::INTEGER[]),
+        COALESCE(array_agg(entity_id) FILTER (WHERE entity = 'client'), ARRAY[]::INTEGER[])
+    INTO changed_properties, changed_clients
+    FROM claimed;
+
+    IF cardinality(changed_properties) = 0 AND cardinality(changed_clients) = 0 THEN
+        RETURN json_build_object('processed', 0, 'created', 0, 'rescored', 0, 'retired', 0, 'revived', 0);
+    END IF;
+
+    WITH current_pairs AS (
+        SELECT * FROM score_matches(NULL, changed_properties, NULL)
+        UNION
+        SELECT * FROM score_matches(NULL, NULL, changed_clients)
+    ),
+    retired AS (
+        UPDATE matches m
+        SET status = 'לא רלוונטי', auto_retired = TRUE, updated_date = CURRENT_TIMESTAMP
+        WHERE m.auto_generated
+          AND m.status = 'הותאם'
+          AND (m.property_id = ANY(changed_properties) OR m.client_id = ANY(changed_clients))
+          AND NOT EXISTS (
+            SELECT 1 FROM current_pairs cp
+            WHERE cp.property_id = m.property_id
+              AND cp.client_id = m.client_id
+          )
+        RETURNING 1
+    ),
+    revived AS (
+        UPDATE matches m
+        SET status = 'הותאם', auto_retired = FALSE, match_score = cp.match_score,
+            updated_date = CURRENT_TIMESTAMP
+        FROM current_pairs cp
+        WHERE m.property_id = cp.property_id
+          AND m.client_id = cp.client_id
+          AND m.auto_retired
+        RETURNING 1
+    ),
+    rescored AS (
+        UPDATE matches m
+        SET match_score = cp.match_score, updated_date = CURRENT_TIMESTAMP
+        FROM current_pairs cp
+        WHERE m.property_id = cp.property_id
+          AND m.client_id = cp.client_id
+          AND m.auto_generated
+          AND m.status = 'הותאם'
+          AND m.match_score IS DISTINCT FROM cp.match_score
+        RETURNING 1
+    ),
+    created AS (
+        INSERT INTO matches (property_id, client_id, match_score, status, auto_generated)
+        SELECT cp.property_id, cp.client_id, cp.match_score, 'הותאם', TRUE
+        FROM current_pairs cp
+        WHERE NOT EXISTS (
+            SELECT 1 FROM matches m
+            WHERE m.property_id = cp.property_id
+              AND m.client_id = cp.client_id
+        )
+        -- A pair inserted concurrently (by generation or a user) is kept as is
+        ON CONFLICT (property_id, client_id) DO NOTHING
+        RETURNING 1
+    )
+    SELECT
+        (SELECT count(*) FROM retired),
+        (SELECT count(*) FROM rescored),
+        (SELECT count(*) FROM created),
+        (SELECT count(*) FROM revived)
+    INTO retired_count, rescored_count, created_count, revived_count;
+
+    RETURN json_build_object(
+        'processed', cardinality(changed_properties) + cardinality(changed_clients),
+        'created', created_count,
+        'rescored', rescored_count,
+        'retired', retired_count,
+        'revived', revived_count
+    );
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark the dashboard statistics queries
+Compares the previous one-query-per-counter implementation of
+/api/dashboard/stats/main with the single-statement version, reporting
+database round trips and latency per page load.
+
+Seeds synthetic rows inside a transaction that is rolled back at the end,
+so it can be pointed at a development database without leaving data behind:
+
+    DATABASE_URL=postgresql://... python scripts/bench_dashboard_stats.py --rows 1000000
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import event, select, func, and_, text
+from src.database import engine
+from src.models import Property, Client, ServiceCall, Meeting
+from src.models.service_call import ServiceCallStatus
+from src.routes.dashboard import main_stats_statement
+
+def seed(conn, rows: int):
+    """Spread rows over the four tables the main dashboard reads"""
+    split = {
+        "properties": int(rows * 0.4),
+        "clients": int(rows * 0.3),
+        "service_calls": int(rows * 0.2),
+        "meetings": rows - int(rows * 0.4) - int(rows * 0.3) - int(rows * 0.2),
+    }
+    print(f"Seeding {rows:,} rows: {split}")
+    conn.execute(text("""
+        INSERT INTO properties (category, city, price, rooms, created_date)
+        SELECT (ARRAY['מגורים', 'משרדים'])[1 + g % 2], 'עיר ' || (g % 50),
+               500000 + (g % 5000) * 1000, 1 + g % 6,
+               now() - make_interval(mins => g % 525600)
+        FROM generate_series(1, :n) AS g
+    """), {"n": split["properties"]})
+    conn.execute(text("""
+        INSERT INTO clients (request_type, preferred_property_type, budget, created_date)
+        SELECT (ARRAY['קנייה', 'שכירות'])[1 + g % 2], (ARRAY['דירה', 'משרד'])[1 + g % 2],
+               400000 + (g % 5000) * 1000, now() - make_interval(mins => g % 525600)
+        FROM generate_series(1, :n) AS g
+    """), {"n": split["clients"]})
+    conn.execute(text("""
+        INSERT INTO service_calls (call_number, handler, description, status, created_date)
+        SELECT 'BENCH' || g, 'bench', 'bench', (ARRAY['open', 'in_progress', 'closed'])[1 + g % 3],
+               now() - make_interval(mins => g % 525600)
+        FROM generate_series(1, :n) AS g
+    """), {"n": split["service_calls"]})
+    conn.execute(text("""
+        INSERT INTO meetings (title, start_date)
+        SELECT 'bench', now() + make_interval(mins => (g % 20160) - 10080)
+        FROM generate_series(1, :n) AS g
+    """), {"n": split["meetings"]})
+    conn.execute(text("ANALYZE properties, clients, service_calls, meetings"))
+
+def legacy_statements(now: datetime) -> list:
+    """The nine COUNT queries the endpoint used to issue one by one"""
+    week_ago = now - timedelta(days=7)
+    two_weeks_ago = now - timedelta(days=14)
+    week_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_end = week_start + timedelta(days=7)
+    return [
+        select(func.count(Property.id)),
+        select(func.count(Property.id)).where(Property.created_date >= week_ago),
+        select(func.count(Property.id)).where(and_(
+            Property.created_date >= two_weeks_ago, Property.created_date < week_ago
+        )),
+        select(func.count(Client.id)),
+        select(func.count(Client.id)).where(Client.created_date >= week_ago),
+        select(func.count(Client.id)).where(and_(
+            Client.created_date >= two_weeks_ago, Client.created_date < week_ago
+        )),
+        select(func.count(ServiceCall.id)).where(ServiceCall.status != ServiceCallStatus.CLOSED.value),
+        select(func.count(ServiceCall.id)).where(ServiceCall.status == ServiceCallStatus.OPEN.value),
+        select(func.count(Meeting.id)).where(and_(
+            Meeting.start_date >= week_start, Meeting.start_date < week_end
+        )),
+    ]
+
+def measure(conn, label: str, statements_for, iterations: int, counter: dict):
+    """Time whole page loads and count the statements each one sends"""
+    for statement in statements_for(datetime.utcnow()):
+        conn.execute(statement).all()  # warm-up
+    timings = []
+    counter["n"] = 0
+    for _ in range(iterations):
+        started = time.perf_counter()
+        for statement in statements_for(datetime.utcnow()):
+            conn.execute(statement).all()
+        timings.append((time.perf_counter() - started) * 1000)
+    round_trips = counter["n"] / iterations
+    print(
+        f"{label:<8} round trips/load: {round_trips:>4.0f}   "
+        f"mean: {statistics.mean(timings):8.2f} ms   "
+        f"p50: {statistics.median(timings):8.2f} ms   "
+        f"max: {max(timings):8.2f} ms"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="synthetic rows to seed (0 to use existing data)")
+    parser.add_argument("--iterations", type=int, default=20, help="page loads to time per variant")
+    args = parser.parse_args()
+
+    counter = {"n": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_round_trip(*_):
+        counter["n"] += 1
+
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            if args.rows:
+                seed(conn, args.rows)
+            measure(conn, "before", legacy_statements, args.iterations, counter)
+            measure(conn, "after", lambda now: [main_stats_statement(now)], args.iterations, counter)
+        finally:
+            transaction.rollback()
+
+if __name__ == "__main__":
+    main()
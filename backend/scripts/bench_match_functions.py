@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark the generate_matches RPC
+Runs EXPLAIN ANALYZE for the previous PL/pgSQL implementation (loaded from
+migration 027 as a temporary function) and the set-based SQL function from
+migration 034 on a synthetic dataset, prints both execution times and the
+plan of the set-based version, and checks that both return the same matches.
+
+The PL/pgSQL version probes clients once per property, so it is run on a
+sample of properties (--sample); the set-based version is also run on the
+full dataset. Seeded rows are rolled back at the end:
+
+    DATABASE_URL=postgresql://... python scripts/bench_match_functions.py --properties 20000 --clients 20000
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from src.database import engine
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "migrations"
+
+def legacy_function_sql() -> str:
+    """generate_matches from migration 027, renamed into pg_temp"""
+    sql = (MIGRATIONS_DIR / "027_create_match_functions.sql").read_text(encoding="utf-8")
+    start = sql.index("CREATE OR REPLACE FUNCTION generate_matches(")
+    end = sql.index("$$ LANGUAGE plpgsql STABLE;", start) + len("$$ LANGUAGE plpgsql STABLE;")
+    function_sql = sql[start:end].replace(
+        "FUNCTION generate_matches(", "FUNCTION pg_temp.generate_matches_legacy(", 1
+    )
+    # clients has no desired_area column; without this the function fails on the first pair
+    return function_sql.replace(" OR property_rec.area = client_rec.desired_area", "")
+
+def seed(conn, properties: int, clients: int):
+    print(f"Seeding {properties:,} properties, {clients:,} clients")
+    conn.execute(text("""
+        INSERT INTO properties (category, listing_type, property_type, city, area, rooms, price, created_date)
+        SELECT (ARRAY['מגורים', 'משרדים'])[1 + g % 2], (ARRAY['מכירה', 'השכרה'])[1 + g % 2],
+               (ARRAY['דירה', 'משרד', 'בית פרטי', 'מסחרי'])[1 + g % 4], 'עיר ' || (g % 50),
+               'שכונה ' || (g % 200), 1 + g % 6, 500000 + (g % 5000) * 1000, now()
+        FROM generate_series(1, :n) AS g
+    """), {"n": properties})
+    conn.execute(text("""
+        INSERT INTO clients (request_type, preferred_property_type, neighborhood, preferred_rooms,
+                             rooms_min, rooms_max, budget, created_date)
+        SELECT (ARRAY['קנייה', 'שכירות', 'מכירה', 'השכרה'])[1 + g % 4],
+               (ARRAY['דירה', 'משרד', 'בית פרטי', 'מסחרי'])[1 + (g / 3) % 4],
+               'שכונה ' || (g % 200),
+               CASE WHEN g % 3 = 0 THEN (1 + g % 6)::TEXT END,
+               CASE WHEN g % 3 = 1 THEN 1 + g % 3 END, CASE WHEN g % 3 = 1 THEN 3 + g % 3 END,
+               400000 + (g % 5000) * 1000, now()
+        FROM generate_series(1, :n) AS g
+    """), {"n": clients})
+    # Some pairs are already matched, to exercise the anti-join
+    conn.execute(text("""
+        INSERT INTO matches (property_id, client_id, match_score, status)
+        SELECT p.id, c.id, 60, 'הותאם'
+        FROM (SELECT id, row_number() OVER (ORDER BY id) AS rn FROM properties) p
+        JOIN (SELECT id, row_number() OVER (ORDER BY id) AS rn FROM clients) c ON c.rn = p.rn
+        WHERE p.rn % 10 = 0
+    """))
+    conn.execute(text("ANALYZE properties, clients, matches"))
+
+def explain(conn, call: str, params: dict) -> dict:
+    plan = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT * FROM {call}"), params).scalar()
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--properties", type=int, default=20_000, help="synthetic properties (0 to use existing data)")
+    parser.add_argument("--clients", type=int, default=20_000, help="synthetic clients")
+    parser.add_argument("--sample", type=int, default=200, help="properties scored by the PL/pgSQL version")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            if args.properties:
+                seed(conn, args.properties, args.clients)
+            conn.execute(text(legacy_function_sql()))
+            sample = conn.execute(
+                text("SELECT array_agg(id) FROM (SELECT id FROM properties ORDER BY id DESC LIMIT :n) s"),
+                {"n": args.sample}
+            ).scalar() or []
+            params = {"ids": sample}
+
+            before = explain(conn, "pg_temp.generate_matches_legacy(NULL, :ids)", params)
+            after = explain(conn, "generate_matches(NULL, :ids)", params)
+            print(f"sample of {len(sample)} properties")
+            print(f"  before (PL/pgSQL loops): {before['Execution Time']:10.1f} ms")
+            print(f"  after  (set-based SQL):  {after['Execution Time']:10.1f} ms")
+
+            query = "SELECT property_id, client_id, match_score, match_reason FROM {} ORDER BY 1, 2"
+            legacy_rows = conn.execute(text(query.format("pg_temp.generate_matches_legacy(NULL, :ids)")), params).all()
+            new_rows = conn.execute(text(query.format("generate_matches(NULL, :ids)")), params).all()
+            print(f"  matches: {len(new_rows):,} ({'identical' if legacy_rows == new_rows else 'DIFFERENT'})")
+
+            full = conn.execute(text("EXPLAIN (ANALYZE, BUFFERS) SELECT * FROM generate_matches()")).scalars().all()
+            print("\nset-based plan, all properties:")
+            print("\n".join(full))
+            if legacy_rows != new_rows:
+                raise SystemExit("set-based generate_matches differs from the PL/pgSQL version")
+        finally:
+            transaction.rollback()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark the RLS role helpers
+Times a sequential scan of properties filtered by a policy-style predicate,
+is_admin() OR <row condition>, which makes PostgreSQL evaluate the helper for
+every row, as it does for a policy that combines the role check with a
+column check. Compares:
+
+    before   PL/pgSQL helpers from migration 025 (loaded as temporary functions)
+    inlined  SQL helpers from migration 038, called directly
+    initplan SQL helpers wrapped in (SELECT is_admin()), as the policies now do
+
+Each variant runs --runs times under agent claims (the slow path, since the
+role check fails and the row condition is evaluated too); the median
+EXPLAIN ANALYZE execution time is printed. Seeded rows are rolled back at the end:
+
+    DATABASE_URL=postgresql://... python scripts/bench_rls_helpers.py --properties 1000000
+"""
+import argparse
+import json
+import statistics
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from src.database import engine
+
+MIGRATIONS_DIR = Path(__file__).parent.parent / "migrations"
+
+ROW_CONDITION = "p.price < 0"
+
+VARIANTS = {
+    "before": f"pg_temp.is_admin_legacy() OR {ROW_CONDITION}",
+    "inlined": f"is_admin() OR {ROW_CONDITION}",
+    "initplan": f"(SELECT is_admin()) OR {ROW_CONDITION}",
+}
+
+def legacy_functions_sql() -> list:
+    """get_user_role() and is_admin() from migration 025, renamed into pg_temp"""
+    sql = (MIGRATIONS_DIR / "025_add_rls_policies.sql").read_text(encoding="utf-8")
+    statements = []
+    for name in ("get_user_role", "is_admin"):
+        start = sql.index(f"CREATE OR REPLACE FUNCTION {name}()")
+        end = sql.index("$$ LANGUAGE plpgsql STABLE;", start) + len("$$ LANGUAGE plpgsql STABLE")
+        statements.append(
+            sql[start:end]
+            .replace(f"FUNCTION {name}()", f"FUNCTION pg_temp.{name}_legacy()", 1)
+            .replace("get_user_role() =", "pg_temp.get_user_role_legacy() =")
+        )
+    return statements
+
+def seed(conn, properties: int):
+    print(f"Seeding {properties:,} properties")
+    conn.execute(text("""
+        INSERT INTO properties (category, listing_type, property_type, city, area, rooms, price, created_date)
+        SELECT (ARRAY['מגורים', 'משרדים'])[1 + g % 2], (ARRAY['מכירה', 'השכרה'])[1 + g % 2],
+               (ARRAY['דירה', 'משרד', 'בית פרטי', 'מסחרי'])[1 + g % 4], 'עיר ' || (g % 50),
+               'שכונה ' || (g % 200), 1 + g % 6, 500000 + (g % 5000) * 1000, now()
+        FROM generate_series(1, :n) AS g
+    """), {"n": properties})
+    conn.execute(text("ANALYZE properties"))
+
+def explain(conn, predicate: str) -> dict:
+    plan = conn.execute(text(
+        f"EXPLAIN (ANALYZE, FORMAT JSON) SELECT count(*) FROM properties p WHERE {predicate}"
+    )).scalar()
+    return (json.loads(plan) if isinstance(plan, str) else plan)[0]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--properties", type=int, default=1_000_000, help="synthetic properties (0 to use existing data)")
+    parser.add_argument("--runs", type=int, default=5, help="timed runs per variant")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        transaction = conn.begin()
+        try:
+            if args.properties:
+                seed(conn, args.properties)
+            for statement in legacy_functions_sql():
+                conn.execute(text(statement))
+            # Keep the scan sequential and single-process so only the predicate differs
+            conn.execute(text("SET LOCAL max_parallel_workers_per_gather = 0"))
+            conn.execute(text("SELECT set_config('request.jwt.claims', :claims, true)"),
+                         {"claims": json.dumps({"role": "agent", "uid": 1})})
+
+            rows = conn.execute(text("SELECT count(*) FROM properties")).scalar()
+            print(f"sequential scan of {rows:,} properties, agent claims, median of {args.runs} runs")
+            counts = {}
+            for name, predicate in VARIANTS.items():
+                explain(conn, predicate)  # warm-up
+                times = [explain(conn, predicate)["Execution Time"] for _ in range(args.runs)]
+                counts[name] = conn.execute(text(f"SELECT count(*) FROM properties p WHERE {predicate}")).scalar()
+                print(f"  {name:<9} {statistics.median(times):10.1f} ms")
+
+            # Admin claims must still pass every row
+            conn.execute(text("SELECT set_config('request.jwt.claims', :claims, true)"),
+                         {"claims": json.dumps({"role": "admin", "uid": 1})})
+            admin_counts = {
+                name: conn.execute(text(f"SELECT count(*) FROM properties p WHERE {predicate}")).scalar()
+                for name, predicate in VARIANTS.items()
+            }
+            print(f"  rows visible: agent {counts}, admin {admin_counts}")
+
+            plan = conn.execute(text(
+                f"EXPLAIN (ANALYZE, COSTS OFF) SELECT count(*) FROM properties p WHERE {VARIANTS['initplan']}"
+            )).scalars().all()
+            print("\ninitplan plan:")
+            print("\n".join(plan))
+            if len(set(counts.values())) != 1 or set(admin_counts.values()) != {rows}:
+                raise SystemExit("helper variants disagree")
+        finally:
+            transaction.rollback()
+
+if __name__ == "__main__":
+    main()
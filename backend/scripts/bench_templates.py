@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark campaign message personalization
+Compares the previous chained str.replace personalization of send-bulk with
+the compiled templates in src/utils/templates.py over synthetic leads. The
+leads are SQLAlchemy rows with Numeric(15, 2) budgets, as send-bulk's select
+returns them, but no database is needed. Exits non-zero when the output
+differs or the compiled template is not faster:
+
+    python scripts/bench_templates.py --renders 100000
+"""
+import argparse
+import statistics
+import sys
+import time
+from decimal import Decimal
+from pathlib import Path
+from sqlalchemy.engine.result import result_tuple
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils.templates import compile_template
+
+TEMPLATE = "שלום {first_name} {last_name}, מצאנו עבורך דירה ב{neighborhood} בתקציב {budget} ₪"
+
+def legacy_render(template: str, lead) -> str:
+    """The per-lead personalization send-bulk used before compiled templates"""
+    message = template
+    message = message.replace("{first_name}", lead.first_name or "")
+    message = message.replace("{last_name}", lead.last_name or "")
+    message = message.replace("{neighborhood}", lead.neighborhood or "")
+    if lead.budget:
+        budget_float = float(lead.budget)
+        budget_str = str(int(budget_float)) if budget_float == int(budget_float) else str(lead.budget)
+        message = message.replace("{budget}", budget_str)
+    else:
+        message = message.replace("{budget}", "")
+    return message
+
+def make_leads(count: int) -> list:
+    lead_row = result_tuple(["id", "phone_number", "opt_out_whatsapp", "budget", "first_name", "last_name", "neighborhood"])
+    return [
+        lead_row((
+            i, f"05{i:08d}", False,
+            Decimal(f"{1_000_000 + (i % 5000) * 1000}.{(i % 4) * 25:02d}") if i % 10 else (Decimal("0.00") if i % 20 else None),
+            f"שם{i}", f"משפחה{i % 97}", ("נווה שאנן", "כרמל", None)[i % 3],
+        ))
+        for i in range(count)
+    ]
+
+def measure(label: str, render, leads: list, rounds: int) -> tuple:
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        messages = [render(lead) for lead in leads]
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    print(
+        f"{label:<9} best: {best * 1000:8.1f} ms   "
+        f"median: {statistics.median(timings) * 1000:8.1f} ms   "
+        f"per render: {best / len(leads) * 1e6:6.2f} µs"
+    )
+    return messages, best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--renders", type=int, default=100_000, help="leads rendered per round")
+    parser.add_argument("--rounds", type=int, default=5, help="rounds per variant")
+    args = parser.parse_args()
+
+    leads = make_leads(args.renders)
+    before, legacy_best = measure("before", lambda lead: legacy_render(TEMPLATE, lead), leads, args.rounds)
+
+    started = time.perf_counter()
+    template = compile_template(TEMPLATE)
+    print(f"compile   {(time.perf_counter() - started) * 1e6:8.1f} µs (once per request)")
+    after, compiled_best = measure("after", template.render, leads, args.rounds)
+
+    if before != after:
+        raise SystemExit("compiled template output differs from the previous personalization")
+    if compiled_best >= legacy_best:
+        raise SystemExit("compiled template is not faster than the previous personalization")
+
+if __name__ == "__main__":
+    main()
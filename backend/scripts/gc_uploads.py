@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Delete unreferenced content-addressed uploads
+Uploads are stored once per content as uploads/<sha256><ext> and referenced
+by rows in uploaded_files. A blob with no referencing row is deleted once it
+is older than the grace period, so a blob written by an upload whose row is
+not committed yet is left alone (re-uploading existing content refreshes the
+blob's mtime for the same reason). Image derivatives (<sha256>_w<width>.<ext>)
+are deleted with the same grace period once no row references their
+original's content. Files not named by a hash (uploads stored before
+content addressing) are never touched:
+
+    DATABASE_URL=postgresql://... python scripts/gc_uploads.py --dry-run
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from sqlalchemy import text
+from src.database import engine
+from src.utils.static_files import CONTENT_ADDRESSED_NAME
+
+UPLOAD_DIR = Path(__file__).parent.parent / "uploads"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grace-hours", type=float, default=1.0, help="keep unreferenced blobs younger than this")
+    parser.add_argument("--dry-run", action="store_true", help="list what would be deleted without deleting")
+    args = parser.parse_args()
+
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT DISTINCT sha256, extension FROM uploaded_files")).all()
+    referenced = {sha256 + extension for sha256, extension in rows}
+    referenced_hashes = {sha256 for sha256, _ in rows}
+
+    cutoff = time.time() - args.grace_hours * 3600
+    deleted = freed = 0
+    for path in sorted(UPLOAD_DIR.iterdir()):
+        match = CONTENT_ADDRESSED_NAME.fullmatch(path.name) if path.is_file() else None
+        if not match:
+            continue
+        if match.group(2) and match.group(1) in referenced_hashes:
+            continue
+        if not match.group(2) and path.name in referenced:
+            continue
+        stat = path.stat()
+        if stat.st_mtime > cutoff:
+            continue
+        print(f"{'would delete' if args.dry_run else 'deleting'} {path.name} ({stat.st_size:,} bytes)")
+        if not args.dry_run:
+            path.unlink(missing_ok=True)
+        deleted += 1
+        freed += stat.st_size
+
+    print(f"{deleted} unreferenced files, {freed:,} bytes{' (dry run)' if args.dry_run else ''}")
+
+if __name__ == "__main__":
+    main()
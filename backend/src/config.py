@@ -8,15 +8,68 @@ class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file=".env", extra="ignore", case_sensitive=True)
     
     DATABASE_URL: str = "postgresql://tav360:tav360secret@db:5432/tav360_crm"
+    # Database connection pool (applies to both the sync and async engines)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0
+    # Recycle connections older than this many seconds
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
     JWT_SECRET: str = "your-super-secret-jwt-key-change-in-production"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_HOURS: int = 24
+    # bcrypt cost for new and upgraded password hashes (older hashes are rehashed on login)
+    BCRYPT_ROUNDS: int = 12
+    # Password hashing thread pool; further logins wait, and beyond MAX_PENDING get a 429
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    # In-process cache of User rows used to authenticate requests; role changes
+    # and deletions made anywhere take effect within the TTL
+    USER_CACHE_MAX_ENTRIES: int = 1024
+    USER_CACHE_TTL_SECONDS: float = 60.0
     CORS_ORIGINS: str = "http://localhost:3000,http://localhost:80,http://localhost"
     # Backend base URL for generating file URLs (used in upload responses)
     BACKEND_BASE_URL: str = "http://localhost:8000"
     # PostgREST URL for proxying entity requests
     POSTGREST_URL: str = "http://postgrest:3000"
-    
+    # Shared PostgREST client connection pool
+    POSTGREST_MAX_CONNECTIONS: int = 100
+    POSTGREST_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    POSTGREST_KEEPALIVE_EXPIRY: float = 30.0
+    POSTGREST_HTTP2: bool = False
+    POSTGREST_TIMEOUT: float = 30.0
+    # Seconds to wait for a free pooled connection before failing
+    POSTGREST_POOL_TIMEOUT: float = 5.0
+    # Materialized dashboard counters (0 disables the background refresh)
+    DASHBOARD_COUNTERS_REFRESH_SECONDS: int = 30
+    # Older counters are ignored and the dashboard falls back to live queries
+    DASHBOARD_COUNTERS_MAX_STALENESS_SECONDS: int = 120
+    # Outbound WhatsApp queue dispatcher (0 workers disables dispatching)
+    WHATSAPP_DISPATCH_WORKERS: int = 4
+    WHATSAPP_DISPATCH_BATCH_SIZE: int = 20
+    WHATSAPP_DISPATCH_POLL_SECONDS: float = 1.0
+    # Claimed messages not finished within this many seconds are claimed again
+    WHATSAPP_DISPATCH_LEASE_SECONDS: int = 120
+    # Token bucket per sender: sustained messages per second and burst size
+    WHATSAPP_RATE_PER_SECOND: float = 10.0
+    WHATSAPP_RATE_BURST: int = 20
+    WHATSAPP_MAX_ATTEMPTS: int = 5
+    WHATSAPP_RETRY_BASE_SECONDS: float = 5.0
+    WHATSAPP_RETRY_MAX_SECONDS: float = 600.0
+    # Message transport; "stub" logs messages locally instead of calling the WhatsApp Business API
+    WHATSAPP_TRANSPORT: str = "stub"
+    # Incremental match maintenance queue (0 disables the background worker)
+    MATCH_REFRESH_POLL_SECONDS: float = 2.0
+    MATCH_REFRESH_BATCH_SIZE: int = 500
+    # CSV/XLSX imports: rows per COPY batch (and progress update), imports running at once
+    IMPORT_BATCH_ROWS: int = 5000
+    IMPORT_CONCURRENCY: int = 2
+    IMPORT_MAX_FILE_SIZE: int = 100 * 1024 * 1024
+    # Processes generating image thumbnails and WebP/AVIF copies (0 disables derivatives)
+    IMAGE_DERIVATIVE_WORKERS: int = 2
+    # Larger images are not decoded (about 200MB as RGBA at the limit)
+    IMAGE_MAX_PIXELS: int = 50_000_000
+
     @property
     def cors_origins_list(self) -> List[str]:
         """Parse CORS_ORIGINS string into list"""
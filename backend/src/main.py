@@ -1,18 +1,53 @@
 """
 Main entry point for the TAV 360 CRM backend API
 """
+import asyncio
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse, Response
-from httpx import AsyncClient
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+import httpx
 from src.config import settings
-from src.routes import auth, entities, upload, automation, whatsapp, integrations, dashboard
-from src.utils.auth import get_current_user
-from src.models.user import User
+from src.database import async_engine
+from src.routes import auth, entities, upload, automation, whatsapp, integrations, dashboard, imports
+from src.services.dashboard_counters import run_dashboard_counters_refresher
+from src.services.whatsapp_dispatcher import run_whatsapp_dispatcher
+from src.services.match_maintenance import run_match_maintenance
+from src.services.image_derivatives import start_derivative_pool, close_derivative_pool
+from src.services.imports import cancel_imports
+from src.utils.auth import Principal, get_current_user
+from src.utils.static_files import ContentAddressedStaticFiles
+from src.utils.user_cache import user_cache
+from src.utils.password_pool import close_password_pool, password_pool_metrics
+from src.utils.http_client import (
+    start_http_client, close_http_client, get_http_client, pool_metrics, pool_wait_trace
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create app-scoped resources on startup and release them on shutdown"""
+    await start_http_client()
+    start_derivative_pool()
+    background_tasks = []
+    if settings.DASHBOARD_COUNTERS_REFRESH_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_dashboard_counters_refresher()))
+    if settings.WHATSAPP_DISPATCH_WORKERS > 0:
+        background_tasks.append(asyncio.create_task(run_whatsapp_dispatcher()))
+    if settings.MATCH_REFRESH_POLL_SECONDS > 0:
+        background_tasks.append(asyncio.create_task(run_match_maintenance()))
+    yield
+    for task in background_tasks:
+        task.cancel()
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await cancel_imports()
+    close_derivative_pool()
+    close_password_pool()
+    await close_http_client()
+    await async_engine.dispose()
 
-app = FastAPI(title="TAV 360 CRM API", version="1.0.0")
+app = FastAPI(title="TAV 360 CRM API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware - allows frontend from different origins
 app.add_middleware(
@@ -21,12 +56,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination metadata returned by entity list endpoints
+    expose_headers=["X-Next-Cursor", "X-Total-Estimate"],
 )
 
 # Serve uploaded files statically
 UPLOAD_DIR = "uploads"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+# Content-addressed blobs are immutable and get strong ETags (see src/utils/static_files.py)
+app.mount("/uploads", ContentAddressedStaticFiles(directory=UPLOAD_DIR), name="uploads")
 
 # Include routers
 app.include_router(auth.router, prefix="/api/auth", tags=["auth"])
@@ -36,11 +74,27 @@ app.include_router(automation.router, prefix="/api/automation", tags=["automatio
 app.include_router(whatsapp.router, prefix="/api/whatsapp", tags=["whatsapp"])
 app.include_router(integrations.router, prefix="/api/integrations", tags=["integrations"])
 app.include_router(dashboard.router, prefix="/api/dashboard", tags=["dashboard"])
+app.include_router(imports.router, prefix="/api/imports", tags=["imports"])
 
 @app.get("/api/health")
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/api/health/postgrest-pool")
+async def postgrest_pool_metrics(current_user: Principal = Depends(get_current_user)):
+    """Connection pool metrics for the shared PostgREST client"""
+    return pool_metrics.snapshot()
+
+@app.get("/api/health/user-cache")
+async def user_cache_metrics(current_user: Principal = Depends(get_current_user)):
+    """Hit rate of the in-process user cache, which authenticates every request"""
+    return user_cache.snapshot()
+
+@app.get("/api/health/password-pool")
+async def password_pool_load(current_user: Principal = Depends(get_current_user)):
+    """Load of the bcrypt thread pool used by login"""
+    return password_pool_metrics.snapshot()
+
 # PostgREST proxy routes
 # These routes proxy entity CRUD operations to PostgREST
 # PostgREST handles filtering, pagination, joins, etc. automatically
@@ -72,19 +126,72 @@ ENTITY_NAME_MAP = {
 # List of entity names that should be proxied to PostgREST (singular names from frontend)
 POSTGREST_ENTITIES = list(ENTITY_NAME_MAP.keys())
 
+# Hop-by-hop headers apply to a single connection and must not be forwarded (RFC 7230 6.1)
+HOP_BY_HOP_HEADERS = {
+    "connection", "keep-alive", "proxy-authenticate", "proxy-authorization",
+    "te", "trailer", "transfer-encoding", "upgrade",
+}
+
+async def forward_to_postgrest(request: Request, postgrest_path: str, forward_headers: tuple, error_label: str):
+    """
+    Stream a request to PostgREST and stream its response back unchanged
+    The request body is sent upstream as it arrives and PostgREST's body bytes
+    (JSON, CSV, application/vnd.pgrst.object, ...) are relayed chunk by chunk
+    without being parsed, so memory stays flat regardless of response size.
+    """
+    headers = {"Authorization": request.headers.get("Authorization", "")}
+    for name in forward_headers:
+        value = request.headers.get(name)
+        if value:
+            headers[name] = value
+    headers.setdefault("Content-Type", "application/json")
+    
+    client = get_http_client()
+    upstream_request = client.build_request(
+        method=request.method,
+        url=postgrest_path,
+        headers=headers,
+        # Keep repeated query parameters (e.g. price=gte.1&price=lte.2)
+        params=request.query_params.multi_items(),
+        content=request.stream() if request.method in ["POST", "PUT", "PATCH"] else None,
+        extensions={"trace": pool_wait_trace()},
+    )
+    pool_metrics.request_started()
+    try:
+        response = await client.send(upstream_request, stream=True)
+    except httpx.HTTPError as e:
+        pool_metrics.request_finished()
+        raise HTTPException(status_code=502, detail=f"{error_label}: {str(e)}")
+    
+    async def release_connection():
+        await response.aclose()
+        pool_metrics.request_finished()
+    
+    # Raw bytes are forwarded, so Content-Encoding and Content-Length still hold
+    response_headers = {
+        name: value for name, value in response.headers.items()
+        if name.lower() not in HOP_BY_HOP_HEADERS
+    }
+    return StreamingResponse(
+        response.aiter_raw(),
+        status_code=response.status_code,
+        headers=response_headers,
+        background=BackgroundTask(release_connection),
+    )
+
 @app.api_route("/api/{entity}/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE"])
 async def proxy_postgrest_entity(
     entity: str,
     path: str,
     request: Request,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Proxy entity CRUD requests to PostgREST
     Only proxies requests for known entities, keeps custom routes (auth, dashboard, etc.) in FastAPI
     """
     # Don't proxy if it's a custom route (auth, dashboard, etc.)
-    if entity in ["auth", "dashboard", "automation", "whatsapp", "integrations", "upload", "rpc"]:
+    if entity in ["auth", "dashboard", "automation", "whatsapp", "integrations", "upload", "imports", "rpc"]:
         raise HTTPException(status_code=404, detail="Route not found")
     
     # Check if entity should be proxied
@@ -99,42 +206,19 @@ async def proxy_postgrest_entity(
     if path:
         postgrest_path += f"/{path}"
     
-    # Forward query parameters
-    query_params = dict(request.query_params)
-    
-    # Get JWT token from request
-    auth_header = request.headers.get("Authorization", "")
-    
-    # Proxy request to PostgREST
-    async with AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.request(
-                method=request.method,
-                url=f"{settings.POSTGREST_URL}{postgrest_path}",
-                headers={
-                    "Authorization": auth_header,
-                    "Content-Type": request.headers.get("Content-Type", "application/json"),
-                    "Prefer": request.headers.get("Prefer", ""),  # For PostgREST preferences
-                },
-                params=query_params,
-                content=await request.body() if request.method in ["POST", "PUT", "PATCH"] else None,
-            )
-            
-            # Return response from PostgREST
-            return JSONResponse(
-                content=response.json() if response.headers.get("content-type", "").startswith("application/json") else {},
-                status_code=response.status_code,
-                headers=dict(response.headers)
-            )
-        except Exception as e:
-            raise HTTPException(status_code=502, detail=f"PostgREST proxy error: {str(e)}")
+    return await forward_to_postgrest(
+        request,
+        postgrest_path,
+        forward_headers=("Content-Type", "Content-Length", "Accept", "Prefer", "Range"),
+        error_label="PostgREST proxy error",
+    )
 
 # Proxy RPC endpoints (PostgreSQL functions)
 @app.api_route("/api/rpc/{function_name}", methods=["GET", "POST"])
 async def proxy_postgrest_rpc(
     function_name: str,
     request: Request,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Proxy RPC (PostgreSQL function) requests to PostgREST
@@ -142,34 +226,12 @@ async def proxy_postgrest_rpc(
     # Build PostgREST URL
     postgrest_path = f"/rpc/{function_name}"
     
-    # Forward query parameters
-    query_params = dict(request.query_params)
-    
-    # Get JWT token from request
-    auth_header = request.headers.get("Authorization", "")
-    
-    # Proxy request to PostgREST
-    async with AsyncClient(timeout=30.0) as client:
-        try:
-            response = await client.request(
-                method=request.method,
-                url=f"{settings.POSTGREST_URL}{postgrest_path}",
-                headers={
-                    "Authorization": auth_header,
-                    "Content-Type": request.headers.get("Content-Type", "application/json"),
-                },
-                params=query_params,
-                content=await request.body() if request.method == "POST" else None,
-            )
-            
-            # Return response from PostgREST
-            return JSONResponse(
-                content=response.json() if response.headers.get("content-type", "").startswith("application/json") else {},
-                status_code=response.status_code,
-                headers=dict(response.headers)
-            )
-        except Exception as e:
-            raise HTTPException(status_code=502, detail=f"PostgREST RPC proxy error: {str(e)}")
+    return await forward_to_postgrest(
+        request,
+        postgrest_path,
+        forward_headers=("Content-Type", "Content-Length", "Accept", "Prefer"),
+        error_label="PostgREST RPC proxy error",
+    )
 
 if __name__ == "__main__":
     import uvicorn
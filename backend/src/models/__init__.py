@@ -21,6 +21,8 @@ from src.models.do_not_call_list import DoNotCallList
 from src.models.campaign import Campaign
 from src.models.campaign_metrics import CampaignMetrics
 from src.models.accounting_document import AccountingDocument
+from src.models.uploaded_file import UploadedFile
+from src.models.import_job import ImportJob
 
 __all__ = [
     "User",
@@ -43,5 +45,7 @@ __all__ = [
     "Campaign",
     "CampaignMetrics",
     "AccountingDocument",
+    "UploadedFile",
+    "ImportJob",
 ]
 
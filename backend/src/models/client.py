@@ -24,6 +24,7 @@ class Client(Base):
     additional_notes = Column(Text)
     opt_out_whatsapp = Column(Boolean, default=False)
     source = Column(String)
+    status = Column(String, default="קונה חדש")  # קונה חדש, אין מענה, פולואפ, נקבעה פגישה, נחתם הסכם תיווך
     created_date = Column(DateTime(timezone=True), server_default=func.now())
     updated_date = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -1,7 +1,7 @@
 """
 DoNotCallList model
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, FetchedValue
 from sqlalchemy.sql import func
 from src.database import Base
 
@@ -10,6 +10,8 @@ class DoNotCallList(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     phone_number = Column(String(50), unique=True, nullable=False)
+    # E.164 form of phone_number, set by a database trigger (see src/utils/phone.py)
+    phone_normalized = Column(String(20), unique=True, server_default=FetchedValue(), server_onupdate=FetchedValue())
     reason = Column(Text)
     notes = Column(Text)
     created_date = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,31 @@
+"""
+ImportJob model
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Uuid
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from src.database import Base
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    id = Column(Uuid, primary_key=True)
+    kind = Column(String(30), nullable=False)  # marketing_leads, properties
+    status = Column(String(20), nullable=False, default='pending')  # pending, running, completed, failed
+    filename = Column(Text)
+    source = Column(String(255))
+    progress = Column(Float, nullable=False, default=0)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    inserted_rows = Column(Integer, nullable=False, default=0)
+    duplicate_rows = Column(Integer, nullable=False, default=0)
+    do_not_call_rows = Column(Integer, nullable=False, default=0)
+    invalid_rows = Column(Integer, nullable=False, default=0)
+    errors = Column(JSONB, nullable=False, default=list)
+    last_error = Column(Text)
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_date = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
+
+    def __repr__(self):
+        return f"<ImportJob {self.id}>"
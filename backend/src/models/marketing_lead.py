@@ -1,7 +1,7 @@
 """
 MarketingLead model
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, Numeric, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, Numeric, Boolean, ForeignKey, FetchedValue
 from sqlalchemy.sql import func
 from src.database import Base
 
@@ -11,6 +11,8 @@ class MarketingLead(Base):
     id = Column(Integer, primary_key=True, index=True)
     contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=True)
     phone_number = Column(String)
+    # E.164 form of phone_number, set by a database trigger (migration 039)
+    phone_normalized = Column(String(20), index=True, server_default=FetchedValue(), server_onupdate=FetchedValue())
     first_name = Column(String)
     last_name = Column(String)
     budget = Column(Numeric(15, 2))
@@ -1,7 +1,7 @@
 """
 MarketingLog model
 """
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Uuid
 from sqlalchemy.sql import func
 from src.database import Base
 
@@ -12,10 +12,16 @@ class MarketingLog(Base):
     lead_id = Column(Integer, ForeignKey("marketing_leads.id"), nullable=True)
     phone_number = Column(String)
     message_sent = Column(Text)
-    status = Column(String, default='sent')  # sent, failed, pending
+    status = Column(String, default='sent')  # sent, failed, pending, sending
     sent_by = Column(Integer, ForeignKey("users.id"), nullable=True)
     created_date = Column(DateTime(timezone=True), server_default=func.now())
+    # Outbound queue (see src/services/whatsapp_dispatcher.py)
+    job_id = Column(Uuid, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_error = Column(Text)
+    provider_message_id = Column(String(255))
+    sent_at = Column(DateTime(timezone=True))
     
     def __repr__(self):
         return f"<MarketingLog {self.id}>"
-
@@ -1,7 +1,7 @@
 """
 Match model - Property-client matches
 """
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
 from sqlalchemy.sql import func
 from src.database import Base
 
@@ -14,6 +14,9 @@ class Match(Base):
     match_score = Column(Integer)
     status = Column(String(50))
     notes = Column(Text)
+    # Managed by the match refresh queue until a user changes the status (migration 040)
+    auto_generated = Column(Boolean, nullable=False, default=False)
+    auto_retired = Column(Boolean, nullable=False, default=False)
     created_date = Column(DateTime(timezone=True), server_default=func.now())
     updated_date = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -0,0 +1,25 @@
+"""
+UploadedFile model
+"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, BigInteger, ForeignKey, Uuid
+from sqlalchemy.sql import func
+from src.database import Base
+
+class UploadedFile(Base):
+    __tablename__ = "uploaded_files"
+    
+    id = Column(Uuid, primary_key=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    extension = Column(String(10), nullable=False)
+    original_filename = Column(Text)
+    size = Column(BigInteger, nullable=False)
+    uploaded_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_date = Column(DateTime(timezone=True), server_default=func.now())
+    
+    @property
+    def blob_name(self) -> str:
+        """File name of the content-addressed blob under uploads/"""
+        return f"{self.sha256}{self.extension}"
+    
+    def __repr__(self):
+        return f"<UploadedFile {self.id}>"
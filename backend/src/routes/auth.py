@@ -1,33 +1,59 @@
 """
 Authentication routes
 """
+import logging
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from src.database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import get_async_db
 from src.models.user import User
 from src.schemas.auth import Token, User as UserSchema
-from src.utils.auth import verify_password, get_password_hash, create_access_token, get_current_user
+from src.utils.auth import (
+    verify_password_async, get_password_hash_async, password_needs_rehash,
+    create_access_token, access_token_claims, get_current_user_record
+)
+from src.utils.password_pool import PasswordPoolBusy
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
+
+# Seconds a client is asked to wait when the bcrypt pool is saturated
+LOGIN_RETRY_AFTER_SECONDS = 1
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 @router.post("/login", response_model=Token)
-async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """Login endpoint"""
-    user = db.query(User).filter(User.email == form_data.username).first()
-    if not user or not verify_password(form_data.password, user.password_hash):
+    user = await db.scalar(select(User).where(User.email == form_data.username))
+    try:
+        verified = user is not None and await verify_password_async(form_data.password, user.password_hash)
+    except PasswordPoolBusy:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts in progress, try again shortly",
+            headers={"Retry-After": str(LOGIN_RETRY_AFTER_SECONDS)},
+        )
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    role_value = user.app_role.value if hasattr(user.app_role, 'value') else str(user.app_role)
-    access_token = create_access_token(data={"sub": user.email, "role": role_value})
+    # Upgrade hashes stored at another cost; a failure must not block the login
+    if password_needs_rehash(user.password_hash):
+        try:
+            user.password_hash = await get_password_hash_async(form_data.password)
+            await db.commit()
+        except Exception:
+            await db.rollback()
+            logger.exception("Password rehash failed for user %s", user.id)
+    access_token = create_access_token(data=access_token_claims(user))
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.get("/me", response_model=UserSchema)
-async def get_current_user_info(current_user: User = Depends(get_current_user)):
+async def get_current_user_info(current_user: User = Depends(get_current_user_record)):
     """Get current user info"""
     return {
         "id": current_user.id,
@@ -1,62 +1,63 @@
 """
 CRM Automation routes
 """
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from src.database import get_db
-from src.models.user import User
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import get_async_db
 from src.models.property import Property
 from src.models.client import Client
-from src.utils.auth import get_current_user
+from src.services.match_engine import load_scoring_sides, score_matches
+from src.services.top_matches import top_properties_for_client, top_clients_for_property
+from src.utils.auth import Principal, get_current_user
 
 router = APIRouter()
 
+MAX_TOP_MATCHES = 100
+
 @router.post("/generate-matches")
 async def generate_matches(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate matches between properties and clients
-    Simple implementation - can be enhanced with ML/matching algorithms
+    Scores on budget, property type and city (see src/services/match_engine.py)
     """
-    # Get all properties and clients
-    properties = db.query(Property).all()
-    clients = db.query(Client).all()
-    
-    matches = []
-    
-    # Simple matching logic based on budget and property type
-    for client in clients:
-        for property in properties:
-            # Basic matching criteria
-            match_score = 0
-            
-            # Budget matching (if client has budget and property has price)
-            if client.budget and property.price:
-                price_diff = abs(float(client.budget) - float(property.price))
-                if price_diff < float(client.budget) * 0.2:  # Within 20%
-                    match_score += 50
-            
-            # Property type matching
-            if client.preferred_property_type and property.property_type:
-                if client.preferred_property_type == property.property_type:
-                    match_score += 30
-            
-            # City matching
-            if client.city and property.city:
-                if client.city == property.city:
-                    match_score += 20
-            
-            if match_score > 50:  # Threshold for a match
-                matches.append({
-                    "property_id": property.id,
-                    "client_id": client.id,
-                    "match_score": match_score
-                })
+    properties, clients = await load_scoring_sides(db)
+    matches = await run_in_threadpool(score_matches, properties, clients)
     
     return {
         "matches_generated": len(matches),
         "matches": matches
     }
 
+@router.get("/matches/top")
+async def get_top_matches(
+    client_id: Optional[int] = None,
+    property_id: Optional[int] = None,
+    k: int = Query(10, ge=1, le=MAX_TOP_MATCHES),
+    category: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Top K match candidates, highest score first
+    Pass client_id for the best properties for a client, or property_id for
+    the best clients for a property. Scores follow the match generation rules
+    and include pairs that already have a match.
+    """
+    if (client_id is None) == (property_id is None):
+        raise HTTPException(status_code=400, detail="Pass exactly one of client_id or property_id")
+    
+    if client_id is not None:
+        client = await db.get(Client, client_id)
+        if not client:
+            raise HTTPException(status_code=404, detail="Client not found")
+        return await top_properties_for_client(db, client, k, category)
+    
+    property = await db.get(Property, property_id)
+    if not property:
+        raise HTTPException(status_code=404, detail="Property not found")
+    return await top_clients_for_property(db, property, k, category)
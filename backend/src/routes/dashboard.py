@@ -1,20 +1,31 @@
 """
 Dashboard statistics routes
 """
-from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
-from src.database import get_db
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import (
+    select, func, and_, or_, true, literal, cast, null, tuple_, union_all,
+    String, Numeric, Integer, DateTime
+)
+from src.database import get_async_db, AsyncSessionLocal
 from src.models import (
-    User, Contact, Property, Client, Meeting, Task, ServiceCall,
+    Contact, Property, Client, Meeting, Task, ServiceCall,
     Supplier, Project, PropertyOwner, Tenant, Match, ProjectLead,
     MarketingLead, WorkOrder
 )
-from src.utils.auth import get_current_user
+from src.models.service_call import ServiceCallStatus
+from src.utils.auth import Principal, get_current_user
+from src.utils.pagination import encode_token, decode_token
+from src.services.dashboard_counters import read_dashboard_counters
 
 router = APIRouter()
 
+# Upper bound for one page of untreated leads in the alerts panel
+MAX_UNTREATED_LEADS_PAGE = 200
+
 def calculate_percentage_change(current: int, previous: int) -> str:
     """Calculate percentage change between two values"""
     if previous == 0:
@@ -23,59 +34,116 @@ def calculate_percentage_change(current: int, previous: int) -> str:
     sign = "+" if change >= 0 else ""
     return f"{sign}{change:.0f}%"
 
-@router.get("/stats/main")
-async def get_main_dashboard_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Get main dashboard statistics"""
-    now = datetime.utcnow()
+def _one_row(*ctes):
+    """Select every column of several single-row CTEs as one row"""
+    from_clause = ctes[0]
+    for cte in ctes[1:]:
+        from_clause = from_clause.join(cte, true())
+    return select(*[column for cte in ctes for column in cte.c]).select_from(from_clause)
+
+def main_stats_statement(now: datetime, include_created_counts: bool = True):
+    """
+    All main dashboard counters in a single statement
+    One aggregate CTE per table, with FILTER (WHERE ...) for each window,
+    so the database scans each table once and the API pays one round trip.
+    Property and buyer counts can be left out when the materialized
+    counters already provide them.
+    """
     week_ago = now - timedelta(days=7)
     two_weeks_ago = now - timedelta(days=14)
+    week_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    week_end = week_start + timedelta(days=7)
     
-    # Properties
-    total_properties = db.query(func.count(Property.id)).scalar() or 0
-    properties_last_week = db.query(func.count(Property.id)).filter(
-        Property.created_date >= week_ago
-    ).scalar() or 0
-    properties_prev_week = db.query(func.count(Property.id)).filter(
-        and_(
+    property_stats = select(
+        func.count().label("total_properties"),
+        func.count().filter(Property.created_date >= week_ago).label("properties_last_week"),
+        func.count().filter(and_(
             Property.created_date >= two_weeks_ago,
             Property.created_date < week_ago
-        )
-    ).scalar() or 0
+        )).label("properties_prev_week"),
+    ).select_from(Property).cte("property_stats")
     
-    # Buyers/Clients
-    total_buyers = db.query(func.count(Client.id)).scalar() or 0
-    buyers_last_week = db.query(func.count(Client.id)).filter(
-        Client.created_date >= week_ago
-    ).scalar() or 0
-    buyers_prev_week = db.query(func.count(Client.id)).filter(
-        and_(
+    buyer_stats = select(
+        func.count().label("total_buyers"),
+        func.count().filter(Client.created_date >= week_ago).label("buyers_last_week"),
+        func.count().filter(and_(
             Client.created_date >= two_weeks_ago,
             Client.created_date < week_ago
-        )
-    ).scalar() or 0
+        )).label("buyers_prev_week"),
+    ).select_from(Client).cte("buyer_stats")
     
-    # Open service calls (using enum values)
-    from src.models.service_call import ServiceCallStatus
-    open_service_calls = db.query(func.count(ServiceCall.id)).filter(
-        ServiceCall.status != ServiceCallStatus.CLOSED
-    ).scalar() or 0
-    new_service_calls = db.query(func.count(ServiceCall.id)).filter(
-        ServiceCall.status == ServiceCallStatus.OPEN
-    ).scalar() or 0
+    service_call_stats = select(
+        func.count().filter(ServiceCall.status != ServiceCallStatus.CLOSED.value).label("open_service_calls"),
+        func.count().filter(ServiceCall.status == ServiceCallStatus.OPEN.value).label("new_service_calls"),
+    ).select_from(ServiceCall).cte("service_call_stats")
     
-    # Meetings this week
-    week_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-    week_end = week_start + timedelta(days=7)
-    meetings_this_week = db.query(func.count(Meeting.id)).filter(
-        and_(
-            Meeting.start_date >= week_start,
-            Meeting.start_date < week_end
-        )
-    ).scalar() or 0
+    meeting_stats = select(
+        func.count().label("meetings_this_week"),
+    ).select_from(Meeting).where(and_(
+        Meeting.start_date >= week_start,
+        Meeting.start_date < week_end
+    )).cte("meeting_stats")
+    
+    if include_created_counts:
+        return _one_row(property_stats, buyer_stats, service_call_stats, meeting_stats)
+    return _one_row(service_call_stats, meeting_stats)
+
+def projects_stats_statement(include_lead_counts: bool = True):
+    """All projects dashboard counters in a single statement"""
+    project_stats = select(
+        func.count().label("total_projects"),
+        func.count().filter(Project.status == "פתוח לדיירים").label("active_projects"),
+    ).select_from(Project).cte("project_stats")
+    project_lead_stats = select(
+        func.count().label("total_project_leads"),
+    ).select_from(ProjectLead).cte("project_lead_stats")
+    marketing_lead_stats = select(
+        func.count().label("total_marketing_leads"),
+    ).select_from(MarketingLead).cte("marketing_lead_stats")
+    if include_lead_counts:
+        return _one_row(project_stats, project_lead_stats, marketing_lead_stats)
+    return _one_row(project_stats)
+
+def property_management_stats_statement():
+    """All property management dashboard counters in a single statement"""
+    owner_stats = select(
+        func.count().label("total_owners"),
+    ).select_from(PropertyOwner).cte("owner_stats")
+    tenant_stats = select(
+        func.count().label("total_tenants"),
+    ).select_from(Tenant).cte("tenant_stats")
+    service_call_stats = select(
+        func.count().filter(ServiceCall.status.in_([
+            ServiceCallStatus.OPEN.value,
+            ServiceCallStatus.IN_PROGRESS.value
+        ])).label("active_calls"),
+    ).select_from(ServiceCall).cte("service_call_stats")
+    supplier_stats = select(
+        func.count().label("total_suppliers"),
+    ).select_from(Supplier).cte("supplier_stats")
+    return _one_row(owner_stats, tenant_stats, service_call_stats, supplier_stats)
+
+@router.get("/stats/main")
+async def get_main_dashboard_stats(
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get main dashboard statistics"""
+    counters = await read_dashboard_counters(db)
+    stats = (await db.execute(
+        main_stats_statement(datetime.utcnow(), include_created_counts=counters is None)
+    )).one()
     
+    if counters:
+        total_properties = counters.total("properties")
+        properties_last_week, properties_prev_week = counters.weekly_change("properties")
+        total_buyers = counters.total("buyers")
+        buyers_last_week, buyers_prev_week = counters.weekly_change("buyers")
+    else:
+        total_properties = stats.total_properties
+        properties_last_week, properties_prev_week = stats.properties_last_week, stats.properties_prev_week
+        total_buyers = stats.total_buyers
+        buyers_last_week, buyers_prev_week = stats.buyers_last_week, stats.buyers_prev_week
     
     return {
         "properties": {
@@ -87,21 +155,21 @@ async def get_main_dashboard_stats(
             "change": calculate_percentage_change(buyers_last_week, buyers_prev_week)
         },
         "meetings": {
-            "this_week": meetings_this_week,
-            "change": str(meetings_this_week) + " השבוע"
+            "this_week": stats.meetings_this_week,
+            "change": str(stats.meetings_this_week) + " השבוע"
         },
         "service_calls": {
-            "open": open_service_calls,
-            "new": new_service_calls,
-            "change": f"{new_service_calls} חדשות"
+            "open": stats.open_service_calls,
+            "new": stats.new_service_calls,
+            "change": f"{stats.new_service_calls} חדשות"
         }
     }
 
 @router.get("/stats/brokerage")
 async def get_brokerage_dashboard_stats(
     category: str = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get brokerage dashboard statistics
     
@@ -109,19 +177,31 @@ async def get_brokerage_dashboard_stats(
     - Properties: filtered by category
     - Buyers: filtered by preferred_property_type matching category
     - Matches: filtered by property category AND buyer property type AND transaction type match
+    
+    Served from the materialized counters while they are fresh.
     """
+    counters = await read_dashboard_counters(db)
+    if counters:
+        counter_category = category if category in ("מגורים", "משרדים") else "*"
+        return {
+            "properties": counters.total("properties", counter_category),
+            "buyers": counters.total("buyers", counter_category),
+            "matches": counters.total("matches", counter_category),
+            "marketing_leads": counters.total("marketing_leads")
+        }
+    
     # Base queries
-    properties_query = db.query(Property)
-    buyers_query = db.query(Client)
-    matches_query = db.query(Match).join(Property).join(Client)
-    marketing_leads_query = db.query(MarketingLead)
+    properties_query = select(func.count(Property.id))
+    buyers_query = select(func.count(Client.id))
+    matches_query = select(func.count(Match.id)).join(Property).join(Client)
+    marketing_leads_query = select(func.count(MarketingLead.id))
     
     # Filter by category if provided
     if category == "מגורים":
-        properties_query = properties_query.filter(
+        properties_query = properties_query.where(
             Property.category == "מגורים"
         )
-        buyers_query = buyers_query.filter(
+        buyers_query = buyers_query.where(
             or_(
                 Client.preferred_property_type == "דירה",
                 Client.preferred_property_type == "בית פרטי",
@@ -129,7 +209,7 @@ async def get_brokerage_dashboard_stats(
             )
         )
         # Filter matches: property category AND buyer property type AND transaction type match
-        matches_query = matches_query.filter(
+        matches_query = matches_query.where(
             and_(
                 Property.category == "מגורים",
                 or_(
@@ -153,17 +233,17 @@ async def get_brokerage_dashboard_stats(
             )
         )
     elif category == "משרדים":
-        properties_query = properties_query.filter(
+        properties_query = properties_query.where(
             Property.category == "משרדים"
         )
-        buyers_query = buyers_query.filter(
+        buyers_query = buyers_query.where(
             or_(
                 Client.preferred_property_type == "משרד",
                 Client.preferred_property_type == "מסחרי"
             )
         )
         # Filter matches: property category AND buyer property type AND transaction type match
-        matches_query = matches_query.filter(
+        matches_query = matches_query.where(
             and_(
                 Property.category == "משרדים",
                 or_(
@@ -186,10 +266,10 @@ async def get_brokerage_dashboard_stats(
         )
     
     # Counts
-    properties_count = properties_query.count()
-    buyers_count = buyers_query.count()
-    matches_count = matches_query.count()
-    marketing_leads_count = marketing_leads_query.count()
+    properties_count = await db.scalar(properties_query)
+    buyers_count = await db.scalar(buyers_query)
+    matches_count = await db.scalar(matches_query)
+    marketing_leads_count = await db.scalar(marketing_leads_query)
     
     return {
         "properties": properties_count,
@@ -200,210 +280,280 @@ async def get_brokerage_dashboard_stats(
 
 @router.get("/stats/projects")
 async def get_projects_dashboard_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get projects dashboard statistics"""
-    total_projects = db.query(func.count(Project.id)).scalar() or 0
-    active_projects = db.query(func.count(Project.id)).filter(
-        Project.status == "פתוח לדיירים"
-    ).scalar() or 0
-    total_project_leads = db.query(func.count(ProjectLead.id)).scalar() or 0
-    total_marketing_leads = db.query(func.count(MarketingLead.id)).scalar() or 0
+    counters = await read_dashboard_counters(db)
+    stats = (await db.execute(projects_stats_statement(include_lead_counts=counters is None))).one()
     
     return {
-        "total_projects": total_projects,
-        "active_projects": active_projects,
-        "total_project_leads": total_project_leads,
-        "total_marketing_leads": total_marketing_leads
+        "total_projects": stats.total_projects,
+        "active_projects": stats.active_projects,
+        "total_project_leads": counters.total("project_leads") if counters else stats.total_project_leads,
+        "total_marketing_leads": counters.total("marketing_leads") if counters else stats.total_marketing_leads
     }
 
 @router.get("/stats/property-management")
 async def get_property_management_dashboard_stats(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get property management dashboard statistics"""
-    total_owners = db.query(func.count(PropertyOwner.id)).scalar() or 0
-    total_tenants = db.query(func.count(Tenant.id)).scalar() or 0
-    from src.models.service_call import ServiceCallStatus
-    active_calls = db.query(func.count(ServiceCall.id)).filter(
-        or_(
-            ServiceCall.status == ServiceCallStatus.OPEN,
-            ServiceCall.status == ServiceCallStatus.IN_PROGRESS
-        )
-    ).scalar() or 0
-    total_suppliers = db.query(func.count(Supplier.id)).scalar() or 0
+    stats = (await db.execute(property_management_stats_statement())).one()
     
     return {
-        "total_owners": total_owners,
-        "total_tenants": total_tenants,
-        "active_calls": active_calls,
-        "total_suppliers": total_suppliers
+        "total_owners": stats.total_owners,
+        "total_tenants": stats.total_tenants,
+        "active_calls": stats.active_calls,
+        "total_suppliers": stats.total_suppliers
     }
 
-@router.get("/recent-activity")
-async def get_recent_activity(
-    limit: int = 10,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
-):
-    """Get recent activity across all entities"""
-    activities = []
-    now = datetime.utcnow()
-    
-    # Recent properties
-    recent_properties = db.query(Property).order_by(
-        Property.created_date.desc()
-    ).limit(3).all()
-    for prop in recent_properties:
-        activities.append({
+# Upper bound for one page of the activity feed
+MAX_ACTIVITY_PAGE = 100
+
+ACTIVITY_KINDS = {"property", "buyer", "meeting", "service"}
+
+def _activity_branch(kind: str, model, before: Optional[Tuple[datetime, str, int]], limit: int, **columns):
+    """
+    One UNION ALL branch: the newest rows of a single table after the cursor
+    The feed is ordered by (created_date, kind, id) descending. kind is
+    constant within a branch, so the cursor reduces to a predicate on
+    (created_date, id) that the created_date index can serve, and the
+    caller's limit is applied before the branches are merged.
+    """
+    text_columns = ("text_a", "text_b", "text_c")
+    statement = select(
+        literal(kind, String).label("kind"),
+        model.id.label("id"),
+        model.created_date.label("created_date"),
+        *[columns.get(name, cast(null(), String)).label(name) for name in text_columns],
+        columns.get("amount", cast(null(), Numeric)).label("amount"),
+        columns.get("rooms", cast(null(), Integer)).label("rooms"),
+        columns.get("starts_at", cast(null(), DateTime(timezone=True))).label("starts_at"),
+    ).where(model.created_date.isnot(None))
+    if before:
+        created_date, before_kind, before_id = before
+        if kind < before_kind:
+            statement = statement.where(model.created_date <= created_date)
+        elif kind == before_kind:
+            statement = statement.where(tuple_(model.created_date, model.id) < tuple_(created_date, before_id))
+        else:
+            statement = statement.where(model.created_date < created_date)
+    return statement.order_by(model.created_date.desc(), model.id.desc()).limit(limit)
+
+def recent_activity_statement(before: Optional[Tuple[datetime, str, int]], limit: int):
+    """Newest rows across properties, buyers, meetings and service calls in one statement"""
+    feed = union_all(
+        _activity_branch(
+            "property", Property, before, limit,
+            text_a=Property.property_type, text_b=Property.city, text_c=Property.status,
+            amount=Property.price, rooms=Property.rooms
+        ),
+        _activity_branch(
+            "buyer", Client, before, limit,
+            text_a=Client.preferred_property_type, text_c=Client.status, amount=Client.budget
+        ),
+        _activity_branch(
+            "meeting", Meeting, before, limit,
+            text_a=Meeting.title, starts_at=Meeting.start_date
+        ),
+        _activity_branch(
+            "service", ServiceCall, before, limit,
+            text_a=ServiceCall.call_number, text_b=func.left(ServiceCall.description, 51),
+            text_c=ServiceCall.status
+        ),
+    ).subquery("feed")
+    return select(feed).order_by(
+        feed.c.created_date.desc(), feed.c.kind.desc(), feed.c.id.desc()
+    ).limit(limit)
+
+def _decode_activity_cursor(before: str) -> Tuple[datetime, str, int]:
+    """Decode a before cursor into (created_date, kind, id)"""
+    try:
+        payload = decode_token(before)
+        kind = payload["k"]
+        if kind not in ACTIVITY_KINDS:
+            raise ValueError(f"unknown activity type {kind}")
+        return datetime.fromisoformat(payload["t"]), kind, int(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+
+def _activity_item(row) -> dict:
+    """Build the feed entry (Hebrew title and subtitle) for one feed row"""
+    if row.kind == "property":
+        return {
             "type": "property",
-            "id": prop.id,
-            "title": f"נכס חדש: {prop.property_type or 'לא מוגדר'} ב{prop.city or 'לא מוגדר'}",
-            "subtitle": f"{prop.rooms or 0} חדרים • {prop.price or 0:,.0f} ₪" if prop.price else f"{prop.rooms or 0} חדרים",
-            "status": getattr(prop, 'status', None) or "נכס חדש",
-            "time": prop.created_date.isoformat() if prop.created_date else None
-        })
-    
-    # Recent buyers
-    recent_buyers = db.query(Client).order_by(
-        Client.created_date.desc()
-    ).limit(3).all()
-    for buyer in recent_buyers:
-        activities.append({
+            "id": row.id,
+            "title": f"נכס חדש: {row.text_a or 'לא מוגדר'} ב{row.text_b or 'לא מוגדר'}",
+            "subtitle": f"{row.rooms or 0} חדרים • {row.amount or 0:,.0f} ₪" if row.amount else f"{row.rooms or 0} חדרים",
+            "status": row.text_c or "נכס חדש",
+            "time": row.created_date.isoformat()
+        }
+    if row.kind == "buyer":
+        return {
             "type": "buyer",
-            "id": buyer.id,
+            "id": row.id,
             "title": "קונה חדש מעוניין",
-            "subtitle": f"{buyer.preferred_property_type or 'לא מוגדר'} • תקציב: {buyer.budget or 0:,.0f} ₪" if buyer.budget else f"{buyer.preferred_property_type or 'לא מוגדר'}",
-            "status": getattr(buyer, 'status', None) or "קונה חדש",
-            "time": buyer.created_date.isoformat() if buyer.created_date else None
-        })
-    
-    # Recent meetings
-    recent_meetings = db.query(Meeting).order_by(
-        Meeting.created_date.desc()
-    ).limit(3).all()
-    for meeting in recent_meetings:
-        activities.append({
+            "subtitle": f"{row.text_a or 'לא מוגדר'} • תקציב: {row.amount or 0:,.0f} ₪" if row.amount else f"{row.text_a or 'לא מוגדר'}",
+            "status": row.text_c or "קונה חדש",
+            "time": row.created_date.isoformat()
+        }
+    if row.kind == "meeting":
+        return {
             "type": "meeting",
-            "id": meeting.id,
-            "title": f"פגישה: {meeting.title or 'לא מוגדר'}",
-            "subtitle": meeting.start_date.strftime("%d/%m/%Y %H:%M") if meeting.start_date else "תאריך לא מוגדר",
-            "status": getattr(meeting, 'status', None) or "נקבעה",
-            "time": meeting.created_date.isoformat() if meeting.created_date else None
-        })
+            "id": row.id,
+            "title": f"פגישה: {row.text_a or 'לא מוגדר'}",
+            "subtitle": row.starts_at.strftime("%d/%m/%Y %H:%M") if row.starts_at else "תאריך לא מוגדר",
+            "status": "נקבעה",
+            "time": row.created_date.isoformat()
+        }
+    description = row.text_b
+    return {
+        "type": "service",
+        "id": row.id,
+        "title": f"קריאת שירות #{row.text_a or str(row.id)[-4:]}",
+        "subtitle": (description[:50] + "...") if description and len(description) > 50 else (description or "אין תיאור"),
+        "status": str(row.text_c),
+        "time": row.created_date.isoformat()
+    }
+
+@router.get("/recent-activity")
+async def get_recent_activity(
+    response: Response,
+    limit: int = Query(10, ge=1, le=MAX_ACTIVITY_PAGE),
+    before: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Get recent activity across all entities, newest first
+    When more items exist, X-Next-Cursor holds the value to pass as before
+    for the next page.
+    """
+    cursor = _decode_activity_cursor(before) if before else None
+    rows = (await db.execute(recent_activity_statement(cursor, limit + 1))).all()
     
-    # Recent service calls
-    recent_calls = db.query(ServiceCall).order_by(
-        ServiceCall.created_date.desc()
-    ).limit(3).all()
-    for call in recent_calls:
-        call_number = getattr(call, 'call_number', None) or str(call.id)[-4:]
-        activities.append({
-            "type": "service",
-            "id": call.id,
-            "title": f"קריאת שירות #{call_number}",
-            "subtitle": (call.description[:50] + "...") if call.description and len(call.description) > 50 else (call.description or "אין תיאור"),
-            "status": call.status.value if hasattr(call.status, 'value') else str(call.status),
-            "time": call.created_date.isoformat() if call.created_date else None
-        })
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_token({"t": last.created_date, "k": last.kind, "id": last.id})
     
-    # Sort by time and limit
-    activities.sort(key=lambda x: x["time"] or "", reverse=True)
-    return activities[:limit]
+    return [_activity_item(row) for row in rows]
+
+async def _untreated_leads_alerts(now: datetime, limit: int, offset: int) -> Tuple[list, int]:
+    """Buyers with status "קונה חדש" created more than 4 hours ago, with their contact, oldest first"""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(
+                Client.id, Client.created_date, Client.preferred_property_type,
+                Client.request_type, Client.budget,
+                Contact.id.label("contact_id"), Contact.full_name,
+                func.count().over().label("total")
+            )
+            .join(Contact, Contact.id == Client.contact_id)
+            .where(and_(
+                Client.status == "קונה חדש",
+                Client.created_date <= now - timedelta(hours=4)
+            ))
+            .order_by(Client.created_date.asc(), Client.id.asc())
+            .limit(limit)
+            .offset(offset)
+        )).all()
+    
+    leads = [{
+        "id": row.id,
+        "contact": {
+            "id": row.contact_id,
+            "full_name": row.full_name
+        },
+        "created_date": row.created_date.isoformat() if row.created_date else None,
+        "hours_ago": int((now - row.created_date).total_seconds() / 3600),
+        "desired_property_type": row.preferred_property_type,
+        "request_category": row.request_type,
+        "budget": float(row.budget) if row.budget else None
+    } for row in rows]
+    return leads, rows[0].total if rows else 0
+
+async def _recent_matches_alerts(now: datetime) -> list:
+    """Matches created in the last 24 hours"""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(Match.id, Match.match_score, Match.created_date)
+            .where(Match.created_date >= now - timedelta(days=1))
+            .order_by(Match.created_date.desc())
+            .limit(5)
+        )).all()
+    return [{
+        "id": row.id,
+        "match_score": row.match_score,
+        "created_date": row.created_date.isoformat() if row.created_date else None
+    } for row in rows]
+
+async def _urgent_service_calls_alerts() -> list:
+    """Service calls with urgency דחוף or גבוהה"""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(ServiceCall.id, ServiceCall.call_number, ServiceCall.urgency,
+                   ServiceCall.description, ServiceCall.status)
+            .where(ServiceCall.urgency.in_(["דחוף", "גבוהה"]))
+            .order_by(ServiceCall.created_date.desc())
+            .limit(10)
+        )).all()
+    return [{
+        "id": row.id,
+        "call_number": row.call_number or str(row.id)[-4:],
+        "urgency": row.urgency,
+        "description": row.description,
+        "status": row.status.value if hasattr(row.status, 'value') else str(row.status)
+    } for row in rows]
+
+async def _urgent_meetings_alerts(now: datetime) -> list:
+    """Meetings starting within the next 24 hours"""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(Meeting.id, Meeting.title, Meeting.start_date)
+            .where(and_(
+                Meeting.start_date >= now,
+                Meeting.start_date <= now + timedelta(days=1)
+            ))
+            .order_by(Meeting.start_date.asc())
+            .limit(10)
+        )).all()
+    return [{
+        "id": row.id,
+        "title": row.title,
+        "meeting_type": None,  # not stored on meetings
+        "start_date": row.start_date.isoformat() if row.start_date else None
+    } for row in rows]
 
 @router.get("/alerts")
 async def get_alerts(
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    leads_limit: int = Query(50, ge=1, le=MAX_UNTREATED_LEADS_PAGE),
+    leads_offset: int = Query(0, ge=0),
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Get alerts - complex business logic for dashboard alerts panel"""
-    now = datetime.utcnow()
-    four_hours_ago = now - timedelta(hours=4)
-    one_day_ago = now - timedelta(days=1)
-    tomorrow = now + timedelta(days=1)
-    
-    # Untreated leads (buyers with status="קונה חדש" created >4 hours ago)
-    untreated_leads = db.query(Client).join(Contact).filter(
-        and_(
-            Client.status == "קונה חדש",
-            Client.created_date <= four_hours_ago
-        )
-    ).all()
-    
-    untreated_leads_data = []
-    for buyer in untreated_leads:
-        contact = db.query(Contact).filter(Contact.id == buyer.contact_id).first()
-        hours_ago = int((now - buyer.created_date).total_seconds() / 3600)
-        untreated_leads_data.append({
-            "id": buyer.id,
-            "contact": {
-                "id": contact.id if contact else None,
-                "full_name": contact.full_name if contact else None
-            },
-            "created_date": buyer.created_date.isoformat() if buyer.created_date else None,
-            "hours_ago": hours_ago,
-            "desired_property_type": buyer.preferred_property_type,
-            "request_category": buyer.request_type,
-            "budget": float(buyer.budget) if buyer.budget else None
-        })
-    
-    # Recent matches (created in last 24 hours)
-    recent_matches = db.query(Match).filter(
-        Match.created_date >= one_day_ago
-    ).order_by(Match.created_date.desc()).limit(5).all()
-    
-    recent_matches_data = []
-    for match in recent_matches:
-        recent_matches_data.append({
-            "id": match.id,
-            "match_score": match.match_score,
-            "created_date": match.created_date.isoformat() if match.created_date else None
-        })
-    
-    # Urgent service calls (urgency="דחוף" or "גבוהה")
-    from src.models.service_call import ServiceCallStatus
-    urgent_service_calls = db.query(ServiceCall).filter(
-        or_(
-            ServiceCall.urgency == "דחוף",
-            ServiceCall.urgency == "גבוהה"
-        )
-    ).order_by(ServiceCall.created_date.desc()).limit(10).all()
-    
-    urgent_service_calls_data = []
-    for call in urgent_service_calls:
-        call_number = getattr(call, 'call_number', None) or str(call.id)[-4:]
-        urgent_service_calls_data.append({
-            "id": call.id,
-            "call_number": call_number,
-            "urgency": call.urgency,
-            "description": call.description,
-            "status": call.status.value if hasattr(call.status, 'value') else str(call.status)
-        })
+    """
+    Get alerts - complex business logic for dashboard alerts panel
+    Untreated leads are paginated with leads_limit / leads_offset and their
+    full count is returned as untreated_leads_total. The four sections use
+    separate sessions and run concurrently.
+    """
+    now = datetime.now(timezone.utc)
     
-    # Urgent meetings (within 24 hours)
-    urgent_meetings = db.query(Meeting).filter(
-        and_(
-            Meeting.start_date >= now,
-            Meeting.start_date <= tomorrow
+    (untreated_leads_data, untreated_leads_total), recent_matches_data, \
+        urgent_service_calls_data, urgent_meetings_data = await asyncio.gather(
+            _untreated_leads_alerts(now, leads_limit, leads_offset),
+            _recent_matches_alerts(now),
+            _urgent_service_calls_alerts(),
+            _urgent_meetings_alerts(now)
         )
-    ).order_by(Meeting.start_date.asc()).limit(10).all()
-    
-    urgent_meetings_data = []
-    for meeting in urgent_meetings:
-        urgent_meetings_data.append({
-            "id": meeting.id,
-            "title": meeting.title,
-            "meeting_type": getattr(meeting, 'meeting_type', None),
-            "start_date": meeting.start_date.isoformat() if meeting.start_date else None
-        })
     
     return {
         "untreated_leads": untreated_leads_data,
+        "untreated_leads_total": untreated_leads_total,
         "recent_matches": recent_matches_data,
         "urgent_service_calls": urgent_service_calls_data,
         "urgent_meetings": urgent_meetings_data,
-        "total_alerts": len(untreated_leads_data) + len(urgent_service_calls_data) + len(urgent_meetings_data)
+        "total_alerts": untreated_leads_total + len(urgent_service_calls_data) + len(urgent_meetings_data)
     }
-
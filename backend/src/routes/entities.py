@@ -1,115 +1,223 @@
 """
 Entity routes - generic CRUD operations
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, asc
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from typing import Optional, List, Any
-from src.database import get_db
-from src.models import User
-from src.utils.auth import get_current_user
+from src.database import get_async_db
+from src.utils.auth import Principal, get_current_user
+from src.utils.pagination import (
+    MAX_PAGE_SIZE, ESTIMATED_COUNT_SQL, build_filters, parse_order,
+    keyset_predicate, order_clauses, encode_cursor, decode_cursor
+)
+from src.utils.serialization import serialize, deserialize, parse_fields
+from src.utils.bulk import MAX_BULK_ROWS, RowValidator, bulk_create, bulk_update, bulk_delete
 
 router = APIRouter()
 
+UNIQUE_VIOLATION = "23505"
+
+def is_unique_violation(e: Exception) -> bool:
+    """A unique index rejected the row (e.g. a number already on the Do-Not-Call list)"""
+    return isinstance(e, IntegrityError) and getattr(e.orig, "pgcode", None) == UNIQUE_VIOLATION
+
+async def list_entity_page(
+    db: AsyncSession,
+    model_class: Any,
+    request: Request,
+    response: Response,
+    order: Optional[str],
+    limit: int,
+    cursor: Optional[str],
+    include_total: bool,
+    fields: Optional[str] = None
+) -> List[dict]:
+    """
+    Fetch one keyset page of entities as dicts
+    Pages are ordered by (order column, id) and continue from the cursor, so
+    each page costs O(limit) no matter how deep it is. The cursor for the next
+    page is returned in the X-Next-Cursor header (absent on the last page).
+    Only the requested fields= columns are selected from the database.
+    """
+    table = model_class.__table__
+    order_key, order_column, descending = parse_order(model_class, order)
+    id_column = table.c.id
+    
+    # The order column is needed for the cursor even when it isn't projected
+    output_names = parse_fields(model_class, fields)
+    select_names = output_names + tuple(
+        name for name in (order_column.name,) if name not in output_names
+    )
+    width = len(output_names)
+    order_index = select_names.index(order_column.name)
+    
+    stmt = select(*[table.c[name] for name in select_names]).where(
+        *build_filters(model_class, request.query_params.multi_items())
+    )
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, order_key, order_column)
+        stmt = stmt.where(keyset_predicate(order_column, id_column, descending, last_value, last_id))
+    
+    # Fetch one extra row to know whether another page exists
+    stmt = stmt.order_by(*order_clauses(order_column, id_column, descending)).limit(limit + 1)
+    rows = (await db.execute(stmt)).all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(order_key, last[order_index], last[0])
+    
+    if include_total:
+        # Planner statistics instead of count(*): cheap, approximate and unfiltered
+        estimate = await db.scalar(ESTIMATED_COUNT_SQL, {"table_name": model_class.__tablename__})
+        response.headers["X-Total-Estimate"] = str(estimate or 0)
+    
+    return [dict(zip(output_names, row[:width])) for row in rows]
+
+async def get_entity_fields(db: AsyncSession, model_class: Any, entity_id: int, fields: Optional[str]) -> Optional[dict]:
+    """Fetch a single entity's fields= projection as a dict"""
+    table = model_class.__table__
+    names = parse_fields(model_class, fields)
+    row = (await db.execute(
+        select(*[table.c[name] for name in names]).where(table.c.id == entity_id)
+    )).first()
+    return dict(zip(names, row)) if row else None
+
+def add_bulk_routes(entity_router: APIRouter, entity_name: str, model_class: Any,
+                    validator: Optional[RowValidator] = None):
+    """
+    Add POST/PATCH/DELETE /bulk routes (see src/utils/bulk.py)
+    Must run before the /{entity_id} routes are added, or DELETE /bulk would
+    match /{entity_id}.
+    """
+    atomic_query = Query(False, description="Roll back the whole request if any row fails")
+    
+    @entity_router.post("/bulk")
+    async def create_entities_bulk(
+        rows: List[Any] = Body(..., description=f"Up to {MAX_BULK_ROWS} objects to create"),
+        atomic: bool = atomic_query,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: Principal = Depends(get_current_user)
+    ):
+        """Create many entities in one transaction"""
+        return await bulk_create(db, model_class, rows, atomic, validator)
+    
+    @entity_router.patch("/bulk")
+    async def update_entities_bulk(
+        rows: List[Any] = Body(..., description=f"Up to {MAX_BULK_ROWS} objects with an id and the fields to change"),
+        atomic: bool = atomic_query,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: Principal = Depends(get_current_user)
+    ):
+        """Update many entities in one transaction"""
+        return await bulk_update(db, model_class, rows, atomic, validator)
+    
+    @entity_router.delete("/bulk")
+    async def delete_entities_bulk(
+        ids: List[int] = Body(..., description=f"Up to {MAX_BULK_ROWS} ids to delete"),
+        atomic: bool = atomic_query,
+        db: AsyncSession = Depends(get_async_db),
+        current_user: Principal = Depends(get_current_user)
+    ):
+        """Delete many entities in one transaction"""
+        return await bulk_delete(db, model_class, ids, atomic)
+
 def create_entity_router(entity_name: str, model_class: Any):
     """Create generic CRUD routes for an entity"""
     # Use singular form to match frontend API calls
     entity_router = APIRouter(prefix=f"/{entity_name.lower()}", tags=[entity_name])
+    add_bulk_routes(entity_router, entity_name, model_class)
     
     @entity_router.get("")
     async def list_entities(
+        request: Request,
+        response: Response,
         order_by: Optional[str] = Query(None, alias="order_by", description="Order by field (prefix with - for descending)"),
-        limit: Optional[int] = Query(100, description="Limit results"),
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        order: Optional[str] = Query(None, description="PostgREST-style ordering (field.asc / field.desc)"),
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE, description="Page size"),
+        cursor: Optional[str] = Query(None, description="X-Next-Cursor value from the previous page"),
+        include_total: bool = Query(False, description="Return an estimated row count in X-Total-Estimate"),
+        fields: Optional[str] = Query(None, description="Comma-separated columns to return (id is always included)"),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: Principal = Depends(get_current_user)
     ):
-        """List all entities"""
-        query = db.query(model_class)
-        
-        if order_by:
-            if order_by.startswith("-"):
-                field_name = order_by[1:]
-                if hasattr(model_class, field_name):
-                    query = query.order_by(desc(getattr(model_class, field_name)))
-            else:
-                if hasattr(model_class, order_by):
-                    query = query.order_by(asc(getattr(model_class, order_by)))
-        
-        if limit:
-            query = query.limit(limit)
-        
-        # Convert SQLAlchemy models to dicts for JSON serialization
-        results = query.all()
-        return [
-            {c.name: getattr(item, c.name) for c in item.__table__.columns}
-            for item in results
-        ]
+        """List entities with keyset pagination and column filters (e.g. price=lte.2000000)"""
+        return await list_entity_page(
+            db, model_class, request, response, order_by or order, limit, cursor, include_total, fields
+        )
     
     @entity_router.get("/{entity_id}")
     async def get_entity(
         entity_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        fields: Optional[str] = Query(None, description="Comma-separated columns to return (id is always included)"),
+        db: AsyncSession = Depends(get_async_db),
+        current_user: Principal = Depends(get_current_user)
     ):
         """Get entity by ID"""
-        entity = db.query(model_class).filter(model_class.id == entity_id).first()
+        entity = await get_entity_fields(db, model_class, entity_id, fields)
         if not entity:
             raise HTTPException(status_code=404, detail=f"{entity_name} not found")
-        return {c.name: getattr(entity, c.name) for c in entity.__table__.columns}
+        return entity
     
     @entity_router.post("")
     async def create_entity(
         data: dict,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        current_user: Principal = Depends(get_current_user)
     ):
         """Create new entity"""
+        # Keep only fields that exist in the model, typed for the database
+        filtered_data = deserialize(model_class, data)
         try:
-            # Filter data to only include fields that exist in the model
-            model_columns = {c.name for c in model_class.__table__.columns}
-            filtered_data = {k: v for k, v in data.items() if k in model_columns}
-            
             entity = model_class(**filtered_data)
             db.add(entity)
-            db.commit()
-            db.refresh(entity)
-            return {c.name: getattr(entity, c.name) for c in entity.__table__.columns}
+            await db.commit()
+            await db.refresh(entity)
+            return serialize(entity)
         except Exception as e:
-            db.rollback()
+            await db.rollback()
+            if is_unique_violation(e):
+                raise HTTPException(status_code=409, detail=f"{entity_name} already exists")
             raise HTTPException(status_code=500, detail=f"Error creating {entity_name}: {str(e)}")
     
     @entity_router.put("/{entity_id}")
     async def update_entity(
         entity_id: int,
         data: dict,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        current_user: Principal = Depends(get_current_user)
     ):
         """Update entity"""
-        entity = db.query(model_class).filter(model_class.id == entity_id).first()
+        entity = await db.get(model_class, entity_id)
         if not entity:
             raise HTTPException(status_code=404, detail=f"{entity_name} not found")
         
-        for key, value in data.items():
-            if hasattr(entity, key):
-                setattr(entity, key, value)
+        for key, value in deserialize(model_class, data).items():
+            setattr(entity, key, value)
         
-        db.commit()
-        db.refresh(entity)
-        return {c.name: getattr(entity, c.name) for c in entity.__table__.columns}
+        try:
+            await db.commit()
+        except IntegrityError as e:
+            await db.rollback()
+            if is_unique_violation(e):
+                raise HTTPException(status_code=409, detail=f"{entity_name} already exists")
+            raise
+        await db.refresh(entity)
+        return serialize(entity)
     
     @entity_router.delete("/{entity_id}")
     async def delete_entity(
         entity_id: int,
-        db: Session = Depends(get_db),
-        current_user: User = Depends(get_current_user)
+        db: AsyncSession = Depends(get_async_db),
+        current_user: Principal = Depends(get_current_user)
     ):
         """Delete entity"""
-        entity = db.query(model_class).filter(model_class.id == entity_id).first()
+        entity = await db.get(model_class, entity_id)
         if not entity:
             raise HTTPException(status_code=404, detail=f"{entity_name} not found")
-        db.delete(entity)
-        db.commit()
+        await db.delete(entity)
+        await db.commit()
         return {"message": f"{entity_name} deleted successfully"}
     
     return entity_router
@@ -150,150 +258,127 @@ router.include_router(create_entity_router("propertyowner", PropertyOwner))
 from src.models.tenant import Tenant as TenantModel
 from datetime import datetime
 
+def parse_lease_date(value: Any, field: str) -> Any:
+    """Parse an ISO or YYYY-MM-DD lease date string; other values are returned as is"""
+    if isinstance(value, str):
+        try:
+            # Try ISO format first
+            if 'T' in value or 'Z' in value:
+                return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+            # Try YYYY-MM-DD format
+            return datetime.strptime(value, '%Y-%m-%d').date()
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid {field} format")
+    return value
+
+def validate_lease_dates(data: dict, current: Optional[dict] = None):
+    """
+    Reject a lease_end_date on or before lease_start_date
+    For creates (current is None) both dates must be in data; for updates the
+    stored value (from current) stands in for the one not being changed.
+    """
+    if current is None:
+        if "lease_start_date" not in data or "lease_end_date" not in data:
+            return
+    elif "lease_start_date" not in data and "lease_end_date" not in data:
+        return
+    current = current or {}
+    start_date = parse_lease_date(data.get("lease_start_date", current.get("lease_start_date")), "lease_start_date")
+    end_date = parse_lease_date(data.get("lease_end_date", current.get("lease_end_date")), "lease_end_date")
+    if start_date is None or end_date is None:
+        return
+    if end_date <= start_date:
+        raise HTTPException(
+            status_code=400,
+            detail="lease_end_date must be after lease_start_date"
+        )
+
 tenant_router = APIRouter(prefix="/tenant", tags=["Tenant"])
+add_bulk_routes(tenant_router, "Tenant", TenantModel, validate_lease_dates)
 
 @tenant_router.post("")
 async def create_tenant(
     data: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create new tenant with date validation"""
-    # Validate lease dates
-    if "lease_start_date" in data and "lease_end_date" in data:
-        start_date = data["lease_start_date"]
-        end_date = data["lease_end_date"]
-        
-        # Parse dates if they're strings
-        if isinstance(start_date, str):
-            try:
-                # Try ISO format first
-                if 'T' in start_date or 'Z' in start_date:
-                    start_date = datetime.fromisoformat(start_date.replace('Z', '+00:00')).date()
-                else:
-                    # Try YYYY-MM-DD format
-                    start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid lease_start_date format")
-        
-        if isinstance(end_date, str):
-            try:
-                # Try ISO format first
-                if 'T' in end_date or 'Z' in end_date:
-                    end_date = datetime.fromisoformat(end_date.replace('Z', '+00:00')).date()
-                else:
-                    # Try YYYY-MM-DD format
-                    end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid lease_end_date format")
-        
-        if end_date <= start_date:
-            raise HTTPException(
-                status_code=400,
-                detail="lease_end_date must be after lease_start_date"
-            )
+    validate_lease_dates(data)
     
-    entity = TenantModel(**data)
+    entity = TenantModel(**deserialize(TenantModel, data))
     db.add(entity)
-    db.commit()
-    db.refresh(entity)
-    return {c.name: getattr(entity, c.name) for c in entity.__table__.columns}
+    await db.commit()
+    await db.refresh(entity)
+    return serialize(entity)
 
 @tenant_router.get("")
 async def list_tenants(
+    request: Request,
+    response: Response,
     order_by: Optional[str] = Query(None, alias="order_by"),
-    limit: Optional[int] = Query(100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    order: Optional[str] = Query(None),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None),
+    include_total: bool = Query(False),
+    fields: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """List all tenants"""
-    query = db.query(TenantModel)
-    if order_by:
-        if order_by.startswith("-"):
-            field_name = order_by[1:]
-            if hasattr(TenantModel, field_name):
-                query = query.order_by(desc(getattr(TenantModel, field_name)))
-        else:
-            if hasattr(TenantModel, order_by):
-                query = query.order_by(asc(getattr(TenantModel, order_by)))
-    if limit:
-        query = query.limit(limit)
-    results = query.all()
-    return [{c.name: getattr(item, c.name) for c in item.__table__.columns} for item in results]
+    return await list_entity_page(
+        db, TenantModel, request, response, order_by or order, limit, cursor, include_total, fields
+    )
 
 @tenant_router.get("/{entity_id}")
 async def get_tenant(
     entity_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    fields: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get tenant by ID"""
-    entity = db.query(TenantModel).filter(TenantModel.id == entity_id).first()
+    entity = await get_entity_fields(db, TenantModel, entity_id, fields)
     if not entity:
         raise HTTPException(status_code=404, detail="Tenant not found")
-    return {c.name: getattr(entity, c.name) for c in entity.__table__.columns}
+    return entity
 
 @tenant_router.put("/{entity_id}")
 async def update_tenant(
     entity_id: int,
     data: dict,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Update tenant with date validation"""
-    entity = db.query(TenantModel).filter(TenantModel.id == entity_id).first()
+    entity = await db.get(TenantModel, entity_id)
     if not entity:
         raise HTTPException(status_code=404, detail="Tenant not found")
     
     # Validate lease dates if being updated
-    if "lease_start_date" in data or "lease_end_date" in data:
-        start_date = data.get("lease_start_date", entity.lease_start_date)
-        end_date = data.get("lease_end_date", entity.lease_end_date)
-        
-        if isinstance(start_date, str):
-            try:
-                if 'T' in start_date or 'Z' in start_date:
-                    start_date = datetime.fromisoformat(start_date.replace('Z', '+00:00')).date()
-                else:
-                    start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid lease_start_date format")
-        
-        if isinstance(end_date, str):
-            try:
-                if 'T' in end_date or 'Z' in end_date:
-                    end_date = datetime.fromisoformat(end_date.replace('Z', '+00:00')).date()
-                else:
-                    end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
-            except ValueError:
-                raise HTTPException(status_code=400, detail="Invalid lease_end_date format")
-        
-        if end_date <= start_date:
-            raise HTTPException(
-                status_code=400,
-                detail="lease_end_date must be after lease_start_date"
-            )
+    validate_lease_dates(data, {
+        "lease_start_date": entity.lease_start_date,
+        "lease_end_date": entity.lease_end_date
+    })
     
-    for key, value in data.items():
-        if hasattr(entity, key):
-            setattr(entity, key, value)
+    for key, value in deserialize(TenantModel, data).items():
+        setattr(entity, key, value)
     
-    db.commit()
-    db.refresh(entity)
-    return {c.name: getattr(entity, c.name) for c in entity.__table__.columns}
+    await db.commit()
+    await db.refresh(entity)
+    return serialize(entity)
 
 @tenant_router.delete("/{entity_id}")
 async def delete_tenant(
     entity_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user)
 ):
     """Delete tenant"""
-    entity = db.query(TenantModel).filter(TenantModel.id == entity_id).first()
+    entity = await db.get(TenantModel, entity_id)
     if not entity:
         raise HTTPException(status_code=404, detail="Tenant not found")
-    db.delete(entity)
-    db.commit()
+    await db.delete(entity)
+    await db.commit()
     return {"message": "Tenant deleted successfully"}
 
 router.include_router(tenant_router)
@@ -0,0 +1,148 @@
+"""
+CSV/XLSX import routes
+"""
+import os
+import tempfile
+import uuid
+from typing import BinaryIO
+from fastapi import APIRouter, Depends, Request, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import settings
+from src.database import get_async_db
+from src.models.import_job import ImportJob
+from src.services.imports import IMPORT_EXTENSIONS, IMPORT_KINDS, start_import
+from src.utils.auth import Principal, get_current_user
+from src.utils.forms import MULTIPART_OVERHEAD, BodyTooLarge, read_form
+
+router = APIRouter()
+
+# Imports are copied in chunks of this size, so memory per upload stays bounded
+CHUNK_SIZE = 1024 * 1024
+
+class FileTooLarge(Exception):
+    pass
+
+def file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"File too large. Maximum size: {settings.IMPORT_MAX_FILE_SIZE / 1024 / 1024}MB"
+    )
+
+def spool_import(source: BinaryIO, file_ext: str) -> str:
+    """
+    Copy an uploaded import file to a temporary file and return its path
+    The background job reads (and then deletes) it after the request ends.
+    """
+    size = 0
+    fd, path = tempfile.mkstemp(prefix="import-", suffix=file_ext)
+    try:
+        with os.fdopen(fd, "wb") as target:
+            while chunk := source.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.IMPORT_MAX_FILE_SIZE:
+                    raise FileTooLarge()
+                target.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    return path
+
+def job_response(job: ImportJob) -> dict:
+    return {
+        "job_id": str(job.id),
+        "kind": job.kind,
+        "status": job.status,
+        "filename": job.filename,
+        "source": job.source,
+        "progress": job.progress,
+        "processed_rows": job.processed_rows,
+        "inserted_rows": job.inserted_rows,
+        "duplicate_rows": job.duplicate_rows,
+        "do_not_call_rows": job.do_not_call_rows,
+        "invalid_rows": job.invalid_rows,
+        "errors": job.errors,
+        "last_error": job.last_error,
+        "created_date": job.created_date.isoformat() if job.created_date else None,
+        "started_at": job.started_at.isoformat() if job.started_at else None,
+        "finished_at": job.finished_at.isoformat() if job.finished_at else None
+    }
+
+@router.post("/{kind}", status_code=202)
+async def create_import(
+    kind: str,
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Import marketing leads or properties from a CSV or XLSX file
+    Multipart fields: "file", and optionally "source" (used for rows without
+    one). The first non-empty row is the header; columns are matched by
+    column name or common Hebrew label. The import runs in the background:
+    poll GET /api/imports/{job_id} for progress and the outcome.
+    """
+    if kind not in IMPORT_KINDS:
+        raise HTTPException(status_code=404, detail=f"Unknown import kind. Available: {', '.join(IMPORT_KINDS)}")
+
+    try:
+        form = await read_form(request, settings.IMPORT_MAX_FILE_SIZE + MULTIPART_OVERHEAD)
+    except BodyTooLarge:
+        raise file_too_large()
+    try:
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=400, detail="Missing file")
+        file_ext = os.path.splitext(file.filename or "")[1].lower()
+        if file_ext not in IMPORT_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File type not allowed. Allowed types: {', '.join(sorted(IMPORT_EXTENSIONS))}"
+            )
+        source = form.get("source")
+        source = source.strip() if isinstance(source, str) and source.strip() else None
+
+        try:
+            path = await run_in_threadpool(spool_import, file.file, file_ext)
+        except FileTooLarge:
+            raise file_too_large()
+    finally:
+        await form.close()
+
+    job = ImportJob(
+        id=uuid.uuid4(),
+        kind=kind,
+        status="pending",
+        filename=file.filename,
+        source=source,
+        progress=0,
+        processed_rows=0,
+        inserted_rows=0,
+        duplicate_rows=0,
+        do_not_call_rows=0,
+        invalid_rows=0,
+        errors=[],
+        created_by=current_user.id
+    )
+    try:
+        db.add(job)
+        await db.commit()
+        await db.refresh(job)
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    start_import(job.id, kind, path, file_ext, source)
+    return job_response(job)
+
+@router.get("/{job_id}")
+async def get_import(
+    job_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Progress and outcome of an import job"""
+    job = await db.get(ImportJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Import job not found")
+    return job_response(job)
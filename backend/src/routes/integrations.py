@@ -6,8 +6,7 @@ Implement actual functionality when needed.
 from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
 from typing import Optional, Any
-from src.models.user import User
-from src.utils.auth import get_current_user
+from src.utils.auth import Principal, get_current_user
 
 router = APIRouter()
 
@@ -45,7 +44,7 @@ class SignedUrlRequest(BaseModel):
 @router.post("/email")
 async def send_email(
     request: EmailRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Send email (placeholder implementation)
@@ -64,7 +63,7 @@ async def send_email(
 @router.post("/llm")
 async def invoke_llm(
     request: LLMRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Invoke LLM (placeholder implementation)
@@ -83,7 +82,7 @@ async def invoke_llm(
 @router.post("/image")
 async def generate_image(
     request: ImageGenerationRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Generate image (placeholder implementation)
@@ -102,7 +101,7 @@ async def generate_image(
 @router.post("/extract")
 async def extract_data_from_file(
     request: ExtractDataRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Extract data from uploaded file (placeholder implementation)
@@ -121,7 +120,7 @@ async def extract_data_from_file(
 @router.post("/signed-url")
 async def create_signed_url(
     request: SignedUrlRequest,
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Create signed URL for private file access (placeholder implementation)
@@ -140,7 +139,7 @@ async def create_signed_url(
 
 @router.post("/upload-private")
 async def upload_private_file(
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """
     Upload private file (placeholder implementation)
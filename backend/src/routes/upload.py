@@ -1,12 +1,21 @@
 """
 File upload routes
 """
+import hashlib
 import os
+import tempfile
 import uuid
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
-from src.models.user import User
-from src.utils.auth import get_current_user
+from typing import BinaryIO, Tuple
+from fastapi import APIRouter, Depends, Request, UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.database import get_async_db
+from src.models.user import UserRole
+from src.models.uploaded_file import UploadedFile
+from src.services import image_derivatives
+from src.utils.auth import Principal, get_current_user
+from src.utils.forms import MULTIPART_OVERHEAD, BodyTooLarge, read_form
+from src.utils.static_files import CONTENT_ADDRESSED_NAME
 from src.config import settings
 
 router = APIRouter()
@@ -17,58 +26,178 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 
 ALLOWED_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.pdf', '.doc', '.docx', '.xls', '.xlsx'}
 MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB
+# Uploads are copied in chunks of this size, so memory per upload stays bounded
+CHUNK_SIZE = 1024 * 1024
+
+class FileTooLarge(Exception):
+    pass
+
+def file_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=400,
+        detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
+    )
+
+def store_upload(source: BinaryIO, file_ext: str) -> Tuple[int, str, str]:
+    """
+    Copy an upload into the content-addressed store and return
+    (size, sha256, blob_name)
+    Runs in a worker thread. Data goes to a temporary file in UPLOAD_DIR in
+    CHUNK_SIZE pieces, hashed as it is written, and the copy stops as soon as
+    MAX_FILE_SIZE is exceeded. The blob is named <sha256><ext>: if it already
+    exists the copy is discarded, otherwise it is moved into place with an
+    atomic rename, so a partial upload is never served.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=UPLOAD_DIR, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as target:
+            while chunk := source.read(CHUNK_SIZE):
+                size += len(chunk)
+                if size > MAX_FILE_SIZE:
+                    raise FileTooLarge()
+                digest.update(chunk)
+                target.write(chunk)
+            target.flush()
+            os.fsync(target.fileno())
+        sha256 = digest.hexdigest()
+        blob_name = f"{sha256}{file_ext}"
+        blob_path = os.path.join(UPLOAD_DIR, blob_name)
+        if os.path.exists(blob_path):
+            # Same bytes already stored; refresh mtime so the GC grace period restarts
+            os.utime(blob_path)
+            os.unlink(temp_path)
+        else:
+            os.replace(temp_path, blob_path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return size, sha256, blob_name
+
+def file_url(name: str) -> str:
+    """
+    Full URL of a file under uploads/ (backend serves it independently)
+    Frontend can use this URL directly regardless of where it's hosted
+    """
+    return f"{settings.BACKEND_BASE_URL.rstrip('/')}/uploads/{name}"
+
+def derivatives_status(blob_name: str, sha256: str) -> dict:
+    """Existing derivative URLs of an image, scheduling generation if there are none yet"""
+    found = image_derivatives.existing_derivatives(UPLOAD_DIR, sha256)
+    pending = image_derivatives.is_pending(blob_name)
+    if not found and not pending:
+        pending = image_derivatives.schedule_derivatives(UPLOAD_DIR, blob_name, sha256)
+    return {
+        "derivatives": {
+            image_format: {str(width): file_url(name) for width, name in by_width.items()}
+            for image_format, by_width in found.items()
+        },
+        "derivatives_pending": pending
+    }
 
 @router.post("/upload")
 async def upload_file(
-    file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user)
+    request: Request,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Upload a file and return its URL
+    Upload a file (multipart field "file") and return its URL
     Returns full URL to the file on the backend server
     """
-    # Validate file extension
-    file_ext = os.path.splitext(file.filename)[1].lower()
-    if file_ext not in ALLOWED_EXTENSIONS:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
-        )
-    
-    # Generate unique filename
-    file_id = str(uuid.uuid4())
-    filename = f"{file_id}{file_ext}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
-    
-    # Read file content
-    content = await file.read()
-    
-    # Check file size
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large. Maximum size: {MAX_FILE_SIZE / 1024 / 1024}MB"
-        )
-    
-    # Save file
+    # Oversized requests are rejected once the limit is exceeded, with or without Content-Length
+    try:
+        form = await read_form(request, MAX_FILE_SIZE + MULTIPART_OVERHEAD)
+    except BodyTooLarge:
+        raise file_too_large()
     try:
-        with open(file_path, "wb") as f:
-            f.write(content)
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Failed to save file: {str(e)}"
-        )
+        file = form.get("file")
+        if not isinstance(file, UploadFile):
+            raise HTTPException(status_code=400, detail="Missing file")
+        
+        # Validate file extension
+        file_ext = os.path.splitext(file.filename or "")[1].lower()
+        if file_ext not in ALLOWED_EXTENSIONS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"File type not allowed. Allowed types: {', '.join(ALLOWED_EXTENSIONS)}"
+            )
+        
+        # Save file
+        try:
+            size, sha256, blob_name = await run_in_threadpool(store_upload, file.file, file_ext)
+        except FileTooLarge:
+            raise file_too_large()
+        except Exception as e:
+            raise HTTPException(
+                status_code=500,
+                detail=f"Failed to save file: {str(e)}"
+            )
+    finally:
+        await form.close()
     
-    # Return full URL to the file (backend serves it independently)
-    # Frontend can use this URL directly regardless of where it's hosted
-    backend_base = settings.BACKEND_BASE_URL.rstrip('/')
-    file_url = f"{backend_base}/uploads/{filename}"
+    # Reference row for this upload; identical content shares the blob
+    uploaded = UploadedFile(
+        id=uuid.uuid4(),
+        sha256=sha256,
+        extension=file_ext,
+        original_filename=file.filename,
+        size=size,
+        uploaded_by=current_user.id
+    )
+    db.add(uploaded)
+    await db.commit()
     
-    return {
-        "file_url": file_url,
-        "file_id": file_id,
+    # Thumbnails and WebP/AVIF copies are generated in the background
+    response = {
+        "file_url": file_url(blob_name),
+        "file_id": str(uploaded.id),
         "filename": file.filename,
-        "size": len(content)
+        "size": size,
+        "sha256": sha256
     }
+    if image_derivatives.is_image(file_ext):
+        response.update(derivatives_status(blob_name, sha256))
+    return response
 
+@router.get("/upload/derivatives/{blob_name}")
+async def get_derivatives(
+    blob_name: str,
+    current_user: Principal = Depends(get_current_user)
+):
+    """
+    Derivative URLs of an uploaded image, by format then width
+    Missing derivatives (uploads from before the pipeline, or a failed job)
+    are scheduled again; "pending" is true until they are written.
+    """
+    match = CONTENT_ADDRESSED_NAME.fullmatch(blob_name)
+    if not match or match.group(2) or not image_derivatives.is_image(match.group(3) or ""):
+        raise HTTPException(status_code=400, detail="Not an uploaded image")
+    if not os.path.exists(os.path.join(UPLOAD_DIR, blob_name)):
+        raise HTTPException(status_code=404, detail="File not found")
+    return {"file_url": file_url(blob_name), **derivatives_status(blob_name, match.group(1))}
+
+@router.delete("/upload/{file_id}")
+async def delete_upload(
+    file_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Drop an upload's reference
+    The blob stays while other uploads reference the same content and is
+    removed by scripts/gc_uploads.py once nothing does.
+    """
+    uploaded = await db.get(UploadedFile, file_id)
+    if not uploaded:
+        raise HTTPException(status_code=404, detail="File not found")
+    if uploaded.uploaded_by != current_user.id and current_user.app_role != UserRole.ADMIN:
+        raise HTTPException(status_code=403, detail="Not allowed to delete this file")
+    
+    await db.delete(uploaded)
+    await db.commit()
+    return {"message": "File deleted successfully"}
@@ -1,16 +1,20 @@
 """
 WhatsApp integration routes
 """
+import uuid
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func, any_, bindparam, String, Integer
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
-from typing import List, Optional
-from src.database import get_db
-from src.models import User
+from typing import List, Optional, Set
+from src.database import get_async_db
 from src.models.marketing_lead import MarketingLead
 from src.models.marketing_log import MarketingLog
 from src.models.do_not_call_list import DoNotCallList
-from src.utils.auth import get_current_user
+from src.utils.auth import Principal, get_current_user
+from src.utils.phone import normalize_phone
+from src.utils.templates import compile_template, TemplateError
 
 router = APIRouter()
 
@@ -22,46 +26,54 @@ class WhatsAppMessageRequest(BaseModel):
 class BulkWhatsAppRequest(BaseModel):
     lead_ids: List[int]
     message_template: str
+    # Client-generated id that makes retrying the request safe
+    job_id: Optional[uuid.UUID] = None
+
+async def is_on_do_not_call_list(db: AsyncSession, phone_number: str) -> bool:
+    """
+    Check a number against the Do Not Call List regardless of formatting
+    One lookup on the unique phone_normalized index.
+    """
+    normalized = normalize_phone(phone_number)
+    if normalized is None:
+        return False
+    dnc_id = await db.scalar(select(DoNotCallList.id).where(
+        DoNotCallList.phone_normalized == normalized
+    ))
+    return dnc_id is not None
+
+async def do_not_call_phones(db: AsyncSession, phone_numbers: List[Optional[str]]) -> Set[str]:
+    """
+    Normalized numbers among phone_numbers that are on the Do Not Call List
+    One = ANY(array) query on the phone_normalized index for the whole batch.
+    """
+    normalized = {normalize_phone(phone) for phone in phone_numbers} - {None}
+    if not normalized:
+        return set()
+    return set((await db.scalars(select(DoNotCallList.phone_normalized).where(
+        DoNotCallList.phone_normalized == any_(bindparam("phones", list(normalized), type_=ARRAY(String)))
+    ))).all())
 
 @router.post("/send")
 async def send_whatsapp_message(
     request: WhatsAppMessageRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Send WhatsApp message to a lead
     Note: This is a placeholder. Integrate with actual WhatsApp Business API
     """
     # Check Do Not Call List
-    dnc_entry = db.query(DoNotCallList).filter(
-        DoNotCallList.phone_number == request.phone_number
-    ).first()
-    
-    if dnc_entry:
-        db.rollback()  # Rollback any pending transaction
+    if await is_on_do_not_call_list(db, request.phone_number):
         raise HTTPException(
             status_code=403,
             detail=f"Phone number {request.phone_number} is on the Do Not Call List"
         )
     
-    # Also check normalized version for flexible matching
-    import re
-    if not dnc_entry:
-        normalized_phone = re.sub(r'[\s\-\(\)]', '', request.phone_number)
-        dnc_entries = db.query(DoNotCallList).all()
-        for dnc in dnc_entries:
-            if dnc.phone_number:
-                dnc_normalized = re.sub(r'[\s\-\(\)]', '', dnc.phone_number)
-                if normalized_phone == dnc_normalized:
-                    raise HTTPException(
-                        status_code=403,
-                        detail=f"Phone number {request.phone_number} is on the Do Not Call List"
-                    )
-    
     # Check if lead has opted out
     if request.lead_id:
-        lead = db.query(MarketingLead).filter(MarketingLead.id == request.lead_id).first()
+        lead = await db.get(MarketingLead, request.lead_id)
         if lead:
             # Handle both boolean and string values for opt_out_whatsapp
             opt_out_value = lead.opt_out_whatsapp
@@ -74,6 +86,7 @@ async def send_whatsapp_message(
                 )
     
     # Format phone number (remove non-digits, add country code if needed)
+    import re
     phone = re.sub(r'\D', '', request.phone_number)
     if phone.startswith('0'):
         phone = '972' + phone[1:]
@@ -89,7 +102,7 @@ async def send_whatsapp_message(
             sent_by=current_user.id
         )
         db.add(log_entry)
-        db.commit()
+        await db.commit()
         
         return {
             "success": True,
@@ -99,45 +112,51 @@ async def send_whatsapp_message(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to send message: {str(e)}")
 
-@router.post("/send-bulk")
+@router.post("/send-bulk", status_code=202)
 async def send_bulk_whatsapp(
     request: BulkWhatsAppRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Send bulk WhatsApp messages
+    Queue bulk WhatsApp messages
+    The template is compiled and validated once, leads (only the columns the
+    template uses) and Do Not Call hits are preloaded with one query each,
+    and messages are queued as 'pending' marketing_logs rows with a
+    single INSERT. The dispatcher workers deliver them; progress is available
+    from GET /api/whatsapp/jobs/{job_id}. Sending the same job_id again does
+    not queue a lead twice.
     """
-    results = []
+    try:
+        template = compile_template(request.message_template)
+    except TemplateError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    lead_columns = MarketingLead.__table__.columns
+    lead_rows = (await db.execute(
+        select(
+            MarketingLead.id, MarketingLead.phone_number, MarketingLead.opt_out_whatsapp,
+            *[lead_columns[name] for name in sorted(template.fields - {"id", "phone_number", "opt_out_whatsapp"})]
+        ).where(MarketingLead.id == any_(bindparam("lead_ids", list(set(request.lead_ids)), type_=ARRAY(Integer))))
+    )).all()
+    leads = {lead.id: lead for lead in lead_rows}
+    dnc_phones = await do_not_call_phones(db, [lead.phone_number for lead in lead_rows])
     
+    job_id = request.job_id or uuid.uuid4()
+    results = []
+    queued = {}
     for lead_id in request.lead_ids:
-        lead = db.query(MarketingLead).filter(MarketingLead.id == lead_id).first()
+        lead = leads.get(lead_id)
         if not lead:
             results.append({"lead_id": lead_id, "status": "failed", "error": "Lead not found"})
             continue
         
-        # Check Do Not Call List (normalize phone number for comparison)
-        import re
+        # Check Do Not Call List
         if not lead.phone_number:
             results.append({"lead_id": lead_id, "status": "failed", "error": "Lead has no phone number"})
             continue
-            
-        normalized_lead_phone = re.sub(r'[\s\-\(\)]', '', lead.phone_number)
-        dnc_entry = db.query(DoNotCallList).filter(
-            DoNotCallList.phone_number == lead.phone_number
-        ).first()
         
-        # Also check normalized version if exact match not found
-        if not dnc_entry:
-            dnc_entries = db.query(DoNotCallList).all()
-            for dnc in dnc_entries:
-                if dnc.phone_number:
-                    dnc_normalized = re.sub(r'[\s\-\(\)]', '', dnc.phone_number)
-                    if normalized_lead_phone == dnc_normalized:
-                        dnc_entry = dnc
-                        break
-        
-        if dnc_entry:
+        if normalize_phone(lead.phone_number) in dnc_phones:
             results.append({
                 "lead_id": lead_id,
                 "status": "failed",
@@ -146,8 +165,6 @@ async def send_bulk_whatsapp(
             continue
         
         # Check opt-out preference
-        # Refresh the lead to ensure we have the latest data
-        db.refresh(lead)
         # Handle both boolean and string values for opt_out_whatsapp
         opt_out_value = lead.opt_out_whatsapp
         if isinstance(opt_out_value, str):
@@ -160,40 +177,83 @@ async def send_bulk_whatsapp(
             })
             continue
         
-        # Personalize message
-        message = request.message_template
-        message = message.replace("{first_name}", lead.first_name or "")
-        message = message.replace("{last_name}", lead.last_name or "")
-        message = message.replace("{neighborhood}", lead.neighborhood or "")
-        # Format budget without decimals if it's a whole number
-        if lead.budget:
-            # Check if budget is a whole number by comparing with its integer conversion
-            budget_float = float(lead.budget)
-            budget_str = str(int(budget_float)) if budget_float == int(budget_float) else str(lead.budget)
-            message = message.replace("{budget}", budget_str)
-        else:
-            message = message.replace("{budget}", "")
-        
+        # Queue message for the dispatcher (duplicate lead ids share one message)
+        result = {"lead_id": lead_id, "status": "pending", "message_id": None}
+        results.append(result)
+        if lead_id not in queued:
+            queued[lead_id] = ([], {
+                "job_id": job_id,
+                "lead_id": lead_id,
+                "phone_number": lead.phone_number,
+                "message_sent": template.render(lead),
+                "status": 'pending',
+                "sent_by": current_user.id
+            })
+        queued[lead_id][0].append(result)
+    
+    if queued:
         try:
-            # Send message (placeholder)
-            log_entry = MarketingLog(
-                lead_id=lead_id,
-                phone_number=lead.phone_number,
-                message_sent=message,
-                status='sent',
-                sent_by=current_user.id
-            )
-            db.add(log_entry)
-            results.append({"lead_id": lead_id, "status": "sent", "message_id": log_entry.id})
+            message_ids = dict((await db.execute(
+                pg_insert(MarketingLog).on_conflict_do_nothing(
+                    index_elements=[MarketingLog.job_id, MarketingLog.lead_id]
+                ).returning(MarketingLog.lead_id, MarketingLog.id),
+                [values for _, values in queued.values()]
+            )).all())
+            # Leads already queued by an earlier attempt of the same job
+            if len(message_ids) < len(queued):
+                message_ids.update((await db.execute(
+                    select(MarketingLog.lead_id, MarketingLog.id).where(MarketingLog.job_id == job_id)
+                )).all())
+            await db.commit()
         except Exception as e:
-            results.append({"lead_id": lead_id, "status": "failed", "error": str(e)})
-    
-    db.commit()
+            await db.rollback()
+            for lead_results, _ in queued.values():
+                for result in lead_results:
+                    result.update({"status": "failed", "error": str(e)})
+        else:
+            for lead_id, (lead_results, _) in queued.items():
+                for result in lead_results:
+                    result["message_id"] = message_ids.get(lead_id)
     
     return {
+        "job_id": str(job_id),
         "total": len(request.lead_ids),
-        "sent": len([r for r in results if r["status"] == "sent"]),
+        "queued": len([r for r in results if r["status"] == "pending"]),
         "failed": len([r for r in results if r["status"] == "failed"]),
         "results": results
     }
 
+@router.get("/jobs/{job_id}")
+async def get_whatsapp_job(
+    job_id: uuid.UUID,
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Delivery progress of a bulk send job"""
+    stats = (await db.execute(
+        select(
+            func.count().label("total"),
+            func.count().filter(MarketingLog.status.in_(("pending", "sending"))).label("pending"),
+            func.count().filter(MarketingLog.status == "sent").label("sent"),
+            func.count().filter(MarketingLog.status == "failed").label("failed"),
+            func.sum(func.greatest(MarketingLog.attempts - 1, 0)).label("retries"),
+            func.min(MarketingLog.created_date).label("created_date"),
+            func.max(MarketingLog.sent_at).label("last_sent_at")
+        ).where(MarketingLog.job_id == job_id)
+    )).one()
+    
+    if not stats.total:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    return {
+        "job_id": str(job_id),
+        "status": "in_progress" if stats.pending else "completed",
+        "total": stats.total,
+        "pending": stats.pending,
+        "sent": stats.sent,
+        "failed": stats.failed,
+        "retries": stats.retries or 0,
+        "progress": (stats.sent + stats.failed) / stats.total,
+        "created_date": stats.created_date.isoformat() if stats.created_date else None,
+        "last_sent_at": stats.last_sent_at.isoformat() if stats.last_sent_at else None
+    }
@@ -0,0 +1,96 @@
+"""
+Materialized dashboard counters
+The counters live in the dashboard_category_counters and
+dashboard_daily_counters materialized views (migration 029). A background
+task refreshes them concurrently, and dashboard endpoints read them only while
+they are fresher than DASHBOARD_COUNTERS_MAX_STALENESS_SECONDS.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.config import settings
+from src.database import async_engine
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary application-wide key so only one worker refreshes at a time
+REFRESH_LOCK_KEY = 7_360_029
+
+READ_COUNTERS_SQL = text("""
+    SELECT metric, category, NULL::DATE AS day, value, refreshed_at
+    FROM dashboard_category_counters
+    UNION ALL
+    SELECT metric, NULL, day, value, refreshed_at
+    FROM dashboard_daily_counters
+""")
+
+@dataclass
+class DashboardCounters:
+    """Snapshot of the materialized counters"""
+    totals: Dict[Tuple[str, str], int]
+    daily: Dict[Tuple[str, date], int]
+    refreshed_at: datetime
+
+    def total(self, metric: str, category: str = "*") -> int:
+        return self.totals.get((metric, category), 0)
+
+    def created_between(self, metric: str, first_day: date, last_day: date) -> int:
+        """Rows created from first_day to last_day inclusive (UTC days)"""
+        return sum(
+            value for (name, day), value in self.daily.items()
+            if name == metric and first_day <= day <= last_day
+        )
+
+    def weekly_change(self, metric: str) -> Tuple[int, int]:
+        """(last 7 days, the 7 days before) ending today, from the daily buckets"""
+        today = datetime.now(timezone.utc).date()
+        last_week = self.created_between(metric, today - timedelta(days=6), today)
+        prev_week = self.created_between(metric, today - timedelta(days=13), today - timedelta(days=7))
+        return last_week, prev_week
+
+async def read_dashboard_counters(db: AsyncSession) -> Optional[DashboardCounters]:
+    """
+    Read the counters, or None when they are older than the staleness bound
+    (callers then compute the numbers live)
+    """
+    rows = (await db.execute(READ_COUNTERS_SQL)).all()
+    if not rows:
+        return None
+    refreshed_at = min(row.refreshed_at for row in rows)
+    age = (datetime.now(timezone.utc) - refreshed_at).total_seconds()
+    if age > settings.DASHBOARD_COUNTERS_MAX_STALENESS_SECONDS:
+        return None
+    return DashboardCounters(
+        totals={(row.metric, row.category): row.value for row in rows if row.day is None},
+        daily={(row.metric, row.day): row.value for row in rows if row.day is not None},
+        refreshed_at=refreshed_at,
+    )
+
+async def refresh_dashboard_counters() -> bool:
+    """Refresh both views concurrently; returns False if another worker holds the lock"""
+    async with async_engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        locked = await conn.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": REFRESH_LOCK_KEY})
+        if not locked:
+            return False
+        try:
+            await conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY dashboard_category_counters"))
+            await conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY dashboard_daily_counters"))
+        finally:
+            await conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": REFRESH_LOCK_KEY})
+    return True
+
+async def run_dashboard_counters_refresher():
+    """Refresh the counters every DASHBOARD_COUNTERS_REFRESH_SECONDS until cancelled"""
+    while True:
+        try:
+            await refresh_dashboard_counters()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Dashboard counters refresh failed")
+        await asyncio.sleep(settings.DASHBOARD_COUNTERS_REFRESH_SECONDS)
@@ -0,0 +1,189 @@
+"""
+Background image derivatives for uploaded photos
+Image uploads get resized copies stored next to the original in uploads/ as
+<sha256>_w<width>.webp and .avif (when this Pillow build can write AVIF), so
+list and gallery views can fetch small thumbnails instead of the original.
+Resizing is CPU-bound and runs in a process pool created at application
+startup; the upload request only schedules it. Derivatives are named after
+the original's content hash, so they are immutable and shared by identical
+uploads, and existing ones are never regenerated.
+Workers are spawned rather than forked from the threaded server, and images
+over IMAGE_MAX_PIXELS are refused before decoding. A worker that dies anyway
+(e.g. killed for memory) breaks the pool; it is replaced on the next use.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Optional
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif'}
+DERIVATIVE_WIDTHS = (320, 640, 1280)
+WEBP_QUALITY = 80
+AVIF_QUALITY = 60
+
+_executor: Optional[ProcessPoolExecutor] = None
+# Running jobs, keyed by blob name, so a blob is processed once at a time
+_pending: Dict[str, asyncio.Future] = {}
+_formats: Optional[List[str]] = None
+
+
+def derivative_formats() -> List[str]:
+    """Output formats supported by the installed Pillow, preferred first"""
+    global _formats
+    if _formats is None:
+        from PIL import Image
+        Image.init()
+        _formats = ["webp"] + (["avif"] if "AVIF" in Image.SAVE else [])
+    return _formats
+
+
+def derivative_name(sha256: str, width: int, image_format: str) -> str:
+    return f"{sha256}_w{width}.{image_format}"
+
+
+def existing_derivatives(upload_dir: str, sha256: str) -> Dict[str, Dict[int, str]]:
+    """Derivative file names on disk, by format then width"""
+    found: Dict[str, Dict[int, str]] = {}
+    for image_format in derivative_formats():
+        for width in DERIVATIVE_WIDTHS:
+            name = derivative_name(sha256, width, image_format)
+            if os.path.exists(os.path.join(upload_dir, name)):
+                found.setdefault(image_format, {})[width] = name
+    return found
+
+
+def _init_worker(max_pixels: int):
+    """Pool process initializer: refuse decompression bombs outright"""
+    from PIL import Image
+
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    # Pillow only warns between MAX_IMAGE_PIXELS and twice that
+    warnings.simplefilter("error", Image.DecompressionBombWarning)
+
+
+def generate_derivatives(source_path: str, sha256: str, formats: List[str]) -> List[str]:
+    """
+    Write the missing derivatives of one image and return their names
+    Runs in a pool process. Widths larger than the original are skipped
+    (the smallest width is always written), and each file is written to a
+    temporary name and renamed into place, so partial files are never served.
+    """
+    from PIL import Image, ImageOps
+
+    upload_dir = os.path.dirname(source_path)
+    written = []
+    with Image.open(source_path) as original:
+        # Let JPEG decode at a reduced scale that still covers the largest width
+        original.draft("RGB", (max(DERIVATIVE_WIDTHS), max(DERIVATIVE_WIDTHS)))
+        image = ImageOps.exif_transpose(original)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        widths = [w for w in DERIVATIVE_WIDTHS if w < image.width] or [DERIVATIVE_WIDTHS[0]]
+        for width in sorted(widths, reverse=True):
+            resized = image.copy()
+            resized.thumbnail((width, image.height), Image.LANCZOS)
+            for image_format in formats:
+                name = derivative_name(sha256, width, image_format)
+                target = os.path.join(upload_dir, name)
+                if os.path.exists(target):
+                    continue
+                fd, temp_path = tempfile.mkstemp(dir=upload_dir, prefix=".derivative-", suffix=".part")
+                try:
+                    with os.fdopen(fd, "wb") as out:
+                        quality = WEBP_QUALITY if image_format == "webp" else AVIF_QUALITY
+                        resized.save(out, format=image_format.upper(), quality=quality)
+                    os.replace(temp_path, target)
+                except BaseException:
+                    try:
+                        os.unlink(temp_path)
+                    except FileNotFoundError:
+                        pass
+                    raise
+                written.append(name)
+            # Resize the next (smaller) width from this one
+            image = resized
+    return written
+
+
+def _new_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=settings.IMAGE_DERIVATIVE_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(settings.IMAGE_MAX_PIXELS,)
+    )
+
+
+def start_derivative_pool():
+    """Create the process pool; called from the application lifespan"""
+    global _executor
+    if _executor is None and settings.IMAGE_DERIVATIVE_WORKERS > 0:
+        _executor = _new_pool()
+
+
+def _replace_broken_pool(broken: ProcessPoolExecutor):
+    """Swap in a new pool after a worker died, unless that already happened"""
+    global _executor
+    if _executor is broken:
+        logger.warning("Image derivative pool broken; starting a new one")
+        broken.shutdown(wait=False, cancel_futures=True)
+        _executor = _new_pool()
+
+
+def close_derivative_pool():
+    """Stop the process pool, abandoning queued jobs"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def is_image(file_ext: str) -> bool:
+    return file_ext in IMAGE_EXTENSIONS
+
+
+def schedule_derivatives(upload_dir: str, blob_name: str, sha256: str) -> bool:
+    """
+    Queue derivative generation for an uploaded image without waiting for it
+    Returns False when nothing was scheduled: the pool is not running
+    (derivatives disabled) or was broken and is being replaced.
+    """
+    executor = _executor
+    if executor is None:
+        return False
+    if blob_name in _pending:
+        return True
+    try:
+        future = asyncio.get_running_loop().run_in_executor(
+            executor, generate_derivatives,
+            os.path.join(upload_dir, blob_name), sha256, derivative_formats()
+        )
+    except BrokenProcessPool:
+        _replace_broken_pool(executor)
+        return False
+    _pending[blob_name] = future
+
+    def done(finished: asyncio.Future):
+        _pending.pop(blob_name, None)
+        if finished.cancelled():
+            return
+        error = finished.exception()
+        if isinstance(error, BrokenProcessPool):
+            _replace_broken_pool(executor)
+        if error is not None:
+            logger.error("Image derivatives failed for %s: %r", blob_name, error)
+
+    future.add_done_callback(done)
+    return True
+
+
+def is_pending(blob_name: str) -> bool:
+    return blob_name in _pending
+
@@ -0,0 +1,409 @@
+"""
+CSV/XLSX import of marketing leads and properties
+An import runs as a background task in four steps, all on one connection and
+in one transaction, so a failed import leaves no rows behind:
+
+    1. The file is read row by row (csv module or openpyxl read-only mode, in
+       a worker thread); each row is validated and typed with the same
+       coercion as the entity routes. Lead phones are normalized to E.164.
+    2. Valid rows are streamed in batches of IMPORT_BATCH_ROWS into a
+       temporary staging table with COPY (asyncpg copy_records_to_table).
+    3. Set-based UPDATEs mark staged rows that cannot be imported: leads on
+       the Do-Not-Call list, leads whose phone already exists (in
+       marketing_leads or earlier in the file), properties whose address and
+       listing type already exist.
+    4. One INSERT ... SELECT moves the remaining rows into the target table.
+
+Progress (share of the file read, row counts) is written to import_jobs after
+every batch from a separate session, so GET /api/imports/{job_id} sees it
+while the import transaction is still open. Merges of the same kind are
+serialized with an advisory lock so concurrent imports cannot both insert
+the same lead.
+"""
+import asyncio
+import csv
+import io
+import logging
+import os
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from decimal import InvalidOperation
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import text, update
+from sqlalchemy.dialects import postgresql
+from src.config import settings
+from src.database import async_engine, AsyncSessionLocal
+from src.models.import_job import ImportJob
+from src.models.marketing_lead import MarketingLead
+from src.models.property import Property
+from src.utils.phone import normalize_phone
+from src.utils.serialization import coerce_value
+
+logger = logging.getLogger(__name__)
+
+IMPORT_EXTENSIONS = {'.csv', '.xlsx'}
+# Validation errors kept on the job; the rest are only counted
+MAX_REPORTED_ERRORS = 100
+# Bytes inspected to pick the CSV encoding and delimiter
+SNIFF_BYTES = 64 * 1024
+# Shorter normalized lead phones are rejected ("+972" and six digits)
+MIN_PHONE_LENGTH = 10
+
+STAGING_TABLE = "import_staging"
+
+@dataclass(frozen=True)
+class ImportKind:
+    """What one import kind loads and how staged rows are screened"""
+    model: Any
+    columns: Tuple[str, ...]
+    # Header text (lower-cased) -> column, besides the column names themselves
+    aliases: Dict[str, str]
+    # SQL run against the staging table before the insert; each sets outcome
+    screens: Tuple[str, ...]
+    # Extra staging columns that are not inserted: name -> SQL type
+    staging_only: Dict[str, str] = field(default_factory=dict)
+
+LEAD_SCREENS = (
+    f"""
+    UPDATE {STAGING_TABLE} s SET outcome = 'do_not_call'
+    FROM do_not_call_list d
+    WHERE d.phone_normalized = s.phone_normalized
+    """,
+    f"""
+    UPDATE {STAGING_TABLE} s SET outcome = 'duplicate'
+    WHERE s.outcome IS NULL
+      AND (EXISTS (SELECT 1 FROM marketing_leads m WHERE m.phone_normalized = s.phone_normalized)
+           OR EXISTS (SELECT 1 FROM {STAGING_TABLE} e
+                      WHERE e.phone_normalized = s.phone_normalized AND e.row_number < s.row_number))
+    """,
+)
+
+# Properties have no external key; an address is only compared when the
+# street and building number are known
+PROPERTY_SCREENS = (
+    f"""
+    UPDATE {STAGING_TABLE} s SET outcome = 'duplicate'
+    WHERE s.street IS NOT NULL AND s.building_number IS NOT NULL
+      AND (EXISTS (SELECT 1 FROM properties p
+                   WHERE p.street = s.street AND p.building_number = s.building_number
+                     AND p.city IS NOT DISTINCT FROM s.city
+                     AND p.apartment_number IS NOT DISTINCT FROM s.apartment_number
+                     AND p.listing_type IS NOT DISTINCT FROM s.listing_type)
+           OR EXISTS (SELECT 1 FROM {STAGING_TABLE} e
+                      WHERE e.street = s.street AND e.building_number = s.building_number
+                        AND e.city IS NOT DISTINCT FROM s.city
+                        AND e.apartment_number IS NOT DISTINCT FROM s.apartment_number
+                        AND e.listing_type IS NOT DISTINCT FROM s.listing_type
+                        AND e.row_number < s.row_number))
+    """,
+)
+
+IMPORT_KINDS: Dict[str, ImportKind] = {
+    "marketing_leads": ImportKind(
+        model=MarketingLead,
+        columns=(
+            "phone_number", "first_name", "last_name", "budget", "neighborhood", "street",
+            "rooms_min", "rooms_max", "client_type", "seriousness", "additional_notes",
+            "opt_out_whatsapp", "source",
+        ),
+        aliases={
+            "טלפון": "phone_number", "נייד": "phone_number", "phone": "phone_number",
+            "שם פרטי": "first_name", "שם משפחה": "last_name", "תקציב": "budget",
+            "שכונה": "neighborhood", "רחוב": "street",
+            "חדרים מינימום": "rooms_min", "חדרים מקסימום": "rooms_max",
+            "סוג לקוח": "client_type", "רצינות": "seriousness", "הערות": "additional_notes",
+            "מקור": "source",
+        },
+        screens=LEAD_SCREENS,
+        staging_only={"phone_normalized": "VARCHAR(20)"},
+    ),
+    "properties": ImportKind(
+        model=Property,
+        columns=(
+            "category", "property_type", "city", "area", "street", "building_number",
+            "apartment_number", "price", "rooms", "floor", "total_floors", "parking",
+            "air_conditioning", "storage", "status", "listing_type", "handler", "source",
+        ),
+        aliases={
+            "קטגוריה": "category", "סוג נכס": "property_type", "עיר": "city", "אזור": "area",
+            "שכונה": "area", "רחוב": "street", "מספר בית": "building_number",
+            "דירה": "apartment_number", "מחיר": "price", "חדרים": "rooms", "קומה": "floor",
+            "מספר קומות": "total_floors", "חניה": "parking", "מיזוג": "air_conditioning",
+            "מחסן": "storage", "סטטוס": "status", "סוג עסקה": "listing_type",
+            "מטפל": "handler", "מקור": "source",
+        },
+        screens=PROPERTY_SCREENS,
+    ),
+}
+
+class ImportFileError(Exception):
+    """The file cannot be read as a table with a recognizable header"""
+
+@dataclass
+class ImportProgress:
+    processed_rows: int = 0
+    invalid_rows: int = 0
+    progress: float = 0.0
+    errors: List[dict] = field(default_factory=list)
+
+    def add_error(self, row: int, message: str):
+        self.invalid_rows += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row, "error": message})
+
+# Reading files (worker thread)
+
+def _open_csv(path: str) -> Tuple[Iterator[list], Callable[[], float]]:
+    """Rows of a CSV file, and a function returning the share of bytes read"""
+    size = os.path.getsize(path) or 1
+    raw = open(path, "rb")
+    sample = raw.read(SNIFF_BYTES)
+    raw.seek(0)
+    # Excel saves Hebrew CSV files as windows-1255 unless told otherwise
+    try:
+        sample.decode("utf-8")
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError as e:
+        # A multi-byte character cut at the end of the sample is still UTF-8
+        encoding = "utf-8-sig" if e.start >= len(sample) - 3 else "cp1255"
+    text_sample = sample.decode(encoding, errors="ignore")
+    # Sniff complete lines only
+    text_sample = text_sample[:text_sample.rfind("\n") + 1] or text_sample
+    try:
+        dialect = csv.Sniffer().sniff(text_sample, delimiters=",;\t")
+    except csv.Error:
+        # Ragged rows defeat the sniffer; fall back to the header line
+        header = next((line for line in text_sample.splitlines() if line.strip()), "")
+        dialect = csv.excel()
+        dialect.delimiter = max(",;\t", key=header.count)
+    reader = csv.reader(io.TextIOWrapper(raw, encoding=encoding, newline=""), dialect)
+
+    def rows():
+        with raw:
+            yield from reader
+
+    return rows(), lambda: min(raw.tell() / size, 1.0) if not raw.closed else 1.0
+
+def _open_xlsx(path: str) -> Tuple[Iterator[list], Callable[[], float]]:
+    """Rows of the first worksheet, and a function returning the share read"""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    sheet = workbook.worksheets[0]
+    total = sheet.max_row or 0
+    read = 0
+
+    def rows():
+        nonlocal read
+        try:
+            for row in sheet.iter_rows(values_only=True):
+                read += 1
+                yield list(row)
+        finally:
+            workbook.close()
+
+    return rows(), lambda: min(read / total, 1.0) if total else 0.0
+
+def _cell(value: Any) -> Any:
+    """Empty cells become None; whole-number floats (Excel numbers) become ints"""
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+class RowReader:
+    """Validated staging records from one file, read in batches"""
+
+    def __init__(self, kind: ImportKind, path: str, file_ext: str, default_source: Optional[str]):
+        self.kind = kind
+        self.default_source = default_source
+        self.table_columns = kind.model.__table__.columns
+        self.rows, self.read_share = (_open_xlsx if file_ext == ".xlsx" else _open_csv)(path)
+        self.row_number = 0
+        try:
+            self.positions: List[Tuple[int, str]] = self._header()
+        except BaseException:
+            self.close()
+            raise
+
+    def _header(self) -> List[Tuple[int, str]]:
+        for header in self.rows:
+            self.row_number += 1
+            names = [_cell(name) for name in header]
+            if not any(names):
+                continue  # blank lines above the header
+            positions, seen = [], set()
+            for position, name in enumerate(names):
+                key = str(name).strip().lower() if name is not None else ""
+                column = key if key in self.kind.columns else self.kind.aliases.get(key)
+                if column and column not in seen:
+                    positions.append((position, column))
+                    seen.add(column)
+            if not positions:
+                raise ImportFileError("No known column names in the header row")
+            if self.kind.model is MarketingLead and "phone_number" not in seen:
+                raise ImportFileError("The header has no phone number column")
+            return positions
+        raise ImportFileError("The file is empty")
+
+    def _record(self, cells: list) -> tuple:
+        """One staging record; raises ValueError for an invalid row"""
+        values = {}
+        for position, column in self.positions:
+            value = _cell(cells[position]) if position < len(cells) else None
+            try:
+                values[column] = coerce_value(self.table_columns[column], value)
+            except (ValueError, TypeError, InvalidOperation) as e:
+                raise ValueError(f"{column}: {e}")
+        if values.get("source") is None:
+            values["source"] = self.default_source
+        extra = ()
+        if self.kind.model is MarketingLead:
+            phone = values.get("phone_number")
+            # normalize_phone already rejects numbers too long for E.164
+            normalized = normalize_phone(phone)
+            if normalized is None or len(normalized) < MIN_PHONE_LENGTH:
+                raise ValueError(f"phone_number: invalid phone {phone!r}")
+            extra = (normalized,)
+        return (self.row_number,) + tuple(values.get(column) for column in self.kind.columns) + extra
+
+    def next_batch(self, size: int, progress: ImportProgress) -> List[tuple]:
+        """Up to size valid records; an empty list at the end of the file"""
+        batch = []
+        for cells in self.rows:
+            self.row_number += 1
+            if not any(_cell(cell) is not None for cell in cells):
+                continue
+            progress.processed_rows += 1
+            try:
+                batch.append(self._record(cells))
+            except ValueError as e:
+                progress.add_error(self.row_number, str(e))
+            if len(batch) >= size:
+                break
+        progress.progress = self.read_share()
+        return batch
+
+    def close(self):
+        self.rows.close()
+
+# Loading (event loop)
+
+def _staging_columns(kind: ImportKind) -> List[Tuple[str, str]]:
+    dialect = postgresql.dialect()
+    columns = kind.model.__table__.columns
+    return (
+        [("row_number", "INTEGER")]
+        + [(name, columns[name].type.compile(dialect=dialect)) for name in kind.columns]
+        + list(kind.staging_only.items())
+    )
+
+async def _save_progress(job_id: uuid.UUID, **values):
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(ImportJob).where(ImportJob.id == job_id).values(**values))
+        await db.commit()
+
+async def _load(job_id: uuid.UUID, kind_name: str, path: str, file_ext: str,
+                default_source: Optional[str]) -> dict:
+    kind = IMPORT_KINDS[kind_name]
+    progress = ImportProgress()
+    reader = await asyncio.to_thread(RowReader, kind, path, file_ext, default_source)
+    staging_columns = _staging_columns(kind)
+    try:
+        async with async_engine.connect() as conn:
+            async with conn.begin():
+                await conn.execute(text(
+                    f"CREATE TEMP TABLE {STAGING_TABLE} ("
+                    + ", ".join(f"{name} {sql_type}" for name, sql_type in staging_columns)
+                    + ", outcome TEXT) ON COMMIT DROP"
+                ))
+                raw_connection = (await conn.get_raw_connection()).driver_connection
+                while True:
+                    batch = await asyncio.to_thread(reader.next_batch, settings.IMPORT_BATCH_ROWS, progress)
+                    if batch:
+                        await raw_connection.copy_records_to_table(
+                            STAGING_TABLE, records=batch, columns=[name for name, _ in staging_columns]
+                        )
+                    await _save_progress(
+                        job_id, progress=progress.progress, processed_rows=progress.processed_rows,
+                        invalid_rows=progress.invalid_rows, errors=progress.errors
+                    )
+                    if not batch:
+                        break
+
+                if kind.staging_only:
+                    for name in kind.staging_only:
+                        await conn.execute(text(f"CREATE INDEX ON {STAGING_TABLE} ({name})"))
+                await conn.execute(text(f"ANALYZE {STAGING_TABLE}"))
+                # One merge per kind at a time; released at commit
+                await conn.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+                                   {"key": f"import:{kind_name}"})
+                for screen in kind.screens:
+                    await conn.execute(text(screen))
+                target_columns = ", ".join(kind.columns)
+                inserted = await conn.execute(text(
+                    f"INSERT INTO {kind.model.__tablename__} ({target_columns}) "
+                    f"SELECT {target_columns} FROM {STAGING_TABLE} WHERE outcome IS NULL ORDER BY row_number"
+                ))
+                outcomes = dict((await conn.execute(text(
+                    f"SELECT outcome, count(*) FROM {STAGING_TABLE} WHERE outcome IS NOT NULL GROUP BY outcome"
+                ))).all())
+    finally:
+        await asyncio.to_thread(reader.close)
+
+    return {
+        "progress": 1.0,
+        "processed_rows": progress.processed_rows,
+        "invalid_rows": progress.invalid_rows,
+        "errors": progress.errors,
+        "inserted_rows": inserted.rowcount,
+        "duplicate_rows": outcomes.get("duplicate", 0),
+        "do_not_call_rows": outcomes.get("do_not_call", 0),
+    }
+
+# Jobs
+
+_running: Set[asyncio.Task] = set()
+_slots: Optional[asyncio.Semaphore] = None
+
+async def run_import(job_id: uuid.UUID, kind_name: str, path: str, file_ext: str,
+                     default_source: Optional[str]):
+    """Run one import job to completion, recording the outcome on the job"""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(settings.IMPORT_CONCURRENCY)
+    try:
+        async with _slots:
+            await _save_progress(job_id, status="running", started_at=datetime.now(timezone.utc))
+            result = await _load(job_id, kind_name, path, file_ext, default_source)
+        await _save_progress(job_id, status="completed", finished_at=datetime.now(timezone.utc), **result)
+        logger.info("Import %s (%s) completed: %s rows inserted", job_id, kind_name, result["inserted_rows"])
+    except asyncio.CancelledError:
+        await _save_progress(job_id, status="failed", last_error="Interrupted by shutdown",
+                             finished_at=datetime.now(timezone.utc))
+        raise
+    except ImportFileError as e:
+        await _save_progress(job_id, status="failed", last_error=str(e), finished_at=datetime.now(timezone.utc))
+    except Exception as e:
+        logger.exception("Import %s (%s) failed", job_id, kind_name)
+        await _save_progress(job_id, status="failed", last_error=str(e), finished_at=datetime.now(timezone.utc))
+    finally:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+def start_import(job_id: uuid.UUID, kind_name: str, path: str, file_ext: str, default_source: Optional[str]):
+    """Run an import in the background; the task is kept until it finishes"""
+    task = asyncio.create_task(run_import(job_id, kind_name, path, file_ext, default_source))
+    _running.add(task)
+    task.add_done_callback(_running.discard)
+
+async def cancel_imports():
+    """Stop running imports at shutdown; they are marked failed and rolled back"""
+    for task in list(_running):
+        task.cancel()
+    await asyncio.gather(*_running, return_exceptions=True)
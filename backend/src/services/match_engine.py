@@ -0,0 +1,141 @@
+"""
+Vectorized property-client match engine
+Implements the /api/automation/generate-matches rules over NumPy arrays:
+
+    budget within 20% of the price      +50
+    same property type                  +30
+    same city                           +20
+    a pair matches when the score is > 50
+
+Only budget + type (80, or 100 with the city) and budget + city (70) clear the
+threshold, so a pair can only match when the client and property share a
+property type or a city. Candidates are therefore generated per type bucket
+and per city bucket instead of over all P x C pairs, and each bucket is scored
+in blocks with broadcasting. The budget test uses the same float64 arithmetic
+as the previous Python loop, so the results are identical.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.property import Property
+from src.models.client import Client
+
+# Upper bound on clients x properties cells scored at once
+BLOCK_CELLS = 1 << 22
+
+BUDGET_SCORE = 50
+TYPE_SCORE = 30
+CITY_SCORE = 20
+MATCH_THRESHOLD = 50
+
+@dataclass
+class ScoringSide:
+    """Scoring columns of properties or clients as parallel arrays"""
+    ids: np.ndarray
+    amounts: np.ndarray  # property price or client budget
+    types: np.ndarray    # category codes, -1 when missing
+    cities: np.ndarray   # category codes, -1 when missing
+
+def _codes(values: List[Optional[str]], vocabulary: Dict[str, int]) -> np.ndarray:
+    """Map strings to shared integer codes; empty values (which never match) become -1"""
+    return np.fromiter(
+        (vocabulary.setdefault(value, len(vocabulary)) if value else -1 for value in values),
+        dtype=np.int64, count=len(values)
+    )
+
+async def load_scoring_sides(db: AsyncSession):
+    """
+    Load only the scoring columns of properties and clients
+    Rows without a price or budget can never reach the threshold and are
+    skipped in the query.
+    """
+    property_rows = (await db.execute(
+        select(Property.id, Property.price, Property.property_type, Property.city)
+        .where(Property.price.isnot(None), Property.price != 0)
+        .order_by(Property.id)
+    )).all()
+    client_rows = (await db.execute(
+        select(Client.id, Client.budget, Client.preferred_property_type, Client.city)
+        .where(Client.budget.isnot(None), Client.budget != 0)
+        .order_by(Client.id)
+    )).all()
+
+    type_vocabulary: Dict[str, int] = {}
+    city_vocabulary: Dict[str, int] = {}
+
+    def side(rows) -> ScoringSide:
+        return ScoringSide(
+            ids=np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows)),
+            amounts=np.fromiter((float(row[1]) for row in rows), dtype=np.float64, count=len(rows)),
+            types=_codes([row[2] for row in rows], type_vocabulary),
+            cities=_codes([row[3] for row in rows], city_vocabulary),
+        )
+
+    return side(property_rows), side(client_rows)
+
+def _buckets(codes: np.ndarray) -> Dict[int, np.ndarray]:
+    """Row indexes per category code, ignoring missing values"""
+    present = np.flatnonzero(codes >= 0)
+    if not len(present):
+        return {}
+    order = present[np.argsort(codes[present], kind="stable")]
+    values, starts = np.unique(codes[order], return_index=True)
+    return dict(zip(values.tolist(), np.split(order, starts[1:])))
+
+def _score_bucket(properties: ScoringSide, clients: ScoringSide, property_rows: np.ndarray,
+                  client_rows: np.ndarray, same_type: bool, out: list):
+    """Score every client x property pair of one bucket, block by block"""
+    prices = properties.amounts[property_rows]
+    block = max(1, BLOCK_CELLS // max(1, len(property_rows)))
+    for start in range(0, len(client_rows), block):
+        rows = client_rows[start:start + block]
+        budgets = clients.amounts[rows][:, None]
+        within_budget = np.abs(budgets - prices[None, :]) < budgets * 0.2
+        if same_type:
+            same_city = clients.cities[rows][:, None] == properties.cities[property_rows][None, :]
+            same_city &= clients.cities[rows][:, None] >= 0
+            scores = BUDGET_SCORE + TYPE_SCORE + CITY_SCORE * same_city
+        else:
+            # Pairs that also share a type are scored by the type buckets
+            different_type = (
+                (clients.types[rows][:, None] != properties.types[property_rows][None, :])
+                | (clients.types[rows][:, None] < 0)
+            )
+            within_budget &= different_type
+            scores = np.full(within_budget.shape, BUDGET_SCORE + CITY_SCORE)
+        client_index, property_index = np.nonzero(within_budget & (scores > MATCH_THRESHOLD))
+        out.append((
+            clients.ids[rows[client_index]],
+            properties.ids[property_rows[property_index]],
+            scores[client_index, property_index],
+        ))
+
+def score_matches(properties: ScoringSide, clients: ScoringSide) -> List[dict]:
+    """
+    All (property, client) pairs scoring above the threshold, ordered by
+    client id then property id
+    """
+    parts = []
+    property_types = _buckets(properties.types)
+    for code, client_rows in _buckets(clients.types).items():
+        if code in property_types:
+            _score_bucket(properties, clients, property_types[code], client_rows, True, parts)
+    property_cities = _buckets(properties.cities)
+    for code, client_rows in _buckets(clients.cities).items():
+        if code in property_cities:
+            _score_bucket(properties, clients, property_cities[code], client_rows, False, parts)
+
+    if not parts:
+        return []
+    client_ids = np.concatenate([part[0] for part in parts])
+    property_ids = np.concatenate([part[1] for part in parts])
+    scores = np.concatenate([part[2] for part in parts])
+    order = np.lexsort((property_ids, client_ids))
+    return [
+        {"property_id": property_id, "client_id": client_id, "match_score": score}
+        for property_id, client_id, score in zip(
+            property_ids[order].tolist(), client_ids[order].tolist(), scores[order].tolist()
+        )
+    ]
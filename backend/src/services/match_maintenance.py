@@ -0,0 +1,40 @@
+"""
+Incremental match maintenance
+Triggers on properties and clients queue changed rows in match_refresh_queue
+(migration 035). This task drains the queue every MATCH_REFRESH_POLL_SECONDS
+through process_match_refresh_queue(), which scores only the changed rows
+against the other side, creates new matches, rescores and retires stale ones
+and revives retired ones that qualify again. Only matches the system created
+and no user has acted on are changed (migration 040).
+The function claims queue rows with SKIP LOCKED, so every worker can run it.
+"""
+import asyncio
+import logging
+from sqlalchemy import select, func, JSON
+from src.config import settings
+from src.database import async_engine
+
+logger = logging.getLogger(__name__)
+
+async def process_match_refresh_queue() -> dict:
+    """Apply one batch of queued changes and return the counts"""
+    async with async_engine.begin() as conn:
+        return await conn.scalar(select(
+            func.process_match_refresh_queue(settings.MATCH_REFRESH_BATCH_SIZE, type_=JSON)
+        ))
+
+async def run_match_maintenance():
+    """Drain the match refresh queue until cancelled"""
+    while True:
+        try:
+            result = await process_match_refresh_queue()
+            if result["processed"]:
+                logger.info("Match refresh: %s", result)
+            # A full batch means more changes are waiting
+            if result["processed"] >= settings.MATCH_REFRESH_BATCH_SIZE:
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Match refresh failed")
+        await asyncio.sleep(settings.MATCH_REFRESH_POLL_SECONDS)
@@ -0,0 +1,181 @@
+"""
+Top-K match candidates for one client or one property
+Scores with the same rules as the score_matches SQL function (migration 035):
+20 points each for area, rooms, property type, transaction type (required) and
+budget, qualifying at 60. Budget alone cannot lift a pair over the threshold,
+so every qualifying pair also hits area, rooms or type. Candidates are
+therefore limited to rows of a matching listing/request type that hit one of
+those three, each an indexed equality or range predicate (migration 036), and
+PostgreSQL keeps only the best K with a bounded top-N heapsort instead of
+ranking every candidate.
+"""
+from decimal import Decimal
+from typing import List, Optional
+from sqlalchemy import select, case, and_, or_, false
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.models.property import Property
+from src.models.client import Client
+
+MATCH_THRESHOLD = 60
+RULE_SCORE = 20
+
+CLOSED_PROPERTY_STATUS = "נסגר"
+CLOSED_CLIENT_STATUS = "עסקה נסגרה"
+
+# Client request types that also accept another listing type
+REQUEST_TO_LISTING = {"קנייה": "מכירה", "שכירות": "השכרה"}
+
+# Client preferred_property_type values per category
+CATEGORY_PROPERTY_TYPES = {
+    "מגורים": ("דירה", "בית פרטי", "בית"),
+    "משרדים": ("משרד", "מסחרי"),
+}
+
+def _hit(condition):
+    """1 when condition is true, 0 when it is false or NULL"""
+    return case((condition, 1), else_=0)
+
+def _score(area_hit, rooms_hit, type_hit, budget_hit):
+    """Rule hits to a score; the transaction type always matches"""
+    return (area_hit + rooms_hit + type_hit + budget_hit + 1) * RULE_SCORE
+
+def _reason(row, rooms_reason: str) -> str:
+    """The same reason text as score_matches"""
+    return "".join([
+        "Area match; " if row.area_hit else "",
+        rooms_reason if row.rooms_hit else "",
+        "Type match; " if row.type_hit else "",
+        "Transaction match; ",
+        "Budget match; " if row.budget_hit else "",
+    ])
+
+def _whole_number(text: str) -> Optional[int]:
+    """
+    The integer whose text is exactly text, else None
+    score_matches compares rooms::TEXT = preferred_rooms, so only a canonical
+    integer ("3", not "03" or "3.5") can ever match an (integer) rooms value.
+    """
+    try:
+        number = int(text)
+    except ValueError:
+        return None
+    return number if str(number) == text else None
+
+def _number(value):
+    return float(value) if isinstance(value, Decimal) else value
+
+async def top_properties_for_client(db: AsyncSession, client: Client, k: int,
+                                    category: Optional[str] = None) -> List[dict]:
+    """Best K properties for a client, highest score first"""
+    if client.status == CLOSED_CLIENT_STATUS or not client.request_type:
+        return []
+    if category and client.preferred_property_type not in CATEGORY_PROPERTY_TYPES.get(category, ()):
+        return []
+    listing_types = {client.request_type}
+    if client.request_type in REQUEST_TO_LISTING:
+        listing_types.add(REQUEST_TO_LISTING[client.request_type])
+
+    area = Property.area == client.neighborhood if client.neighborhood is not None else false()
+    if client.preferred_rooms is not None:
+        # Compared as integers so idx_properties_listing_type_rooms applies
+        preferred_rooms = _whole_number(client.preferred_rooms)
+        rooms = Property.rooms == preferred_rooms if preferred_rooms is not None else false()
+        rooms_reason = "Rooms match; "
+    elif client.rooms_min is not None and client.rooms_max is not None:
+        rooms, rooms_reason = Property.rooms.between(client.rooms_min, client.rooms_max), "Rooms in range; "
+    else:
+        rooms, rooms_reason = false(), ""
+    property_type = (
+        Property.property_type == client.preferred_property_type
+        if client.preferred_property_type is not None else false()
+    )
+    budget = Property.price <= client.budget * Decimal("1.10") if client.budget is not None else false()
+
+    hits = [_hit(area), _hit(rooms), _hit(property_type), _hit(budget)]
+    score = _score(*hits)
+    statement = select(
+        Property.id, Property.city, Property.area, Property.property_type,
+        Property.listing_type, Property.rooms, Property.price,
+        hits[0].label("area_hit"), hits[1].label("rooms_hit"),
+        hits[2].label("type_hit"), hits[3].label("budget_hit"),
+        score.label("match_score")
+    ).where(
+        Property.listing_type.in_(listing_types),
+        or_(Property.status.is_(None), Property.status != CLOSED_PROPERTY_STATUS),
+        or_(area, rooms, property_type),
+        score >= MATCH_THRESHOLD
+    )
+    if category:
+        statement = statement.where(Property.category == category)
+    rows = (await db.execute(statement.order_by(score.desc(), Property.id).limit(k))).all()
+
+    return [{
+        "property_id": row.id,
+        "match_score": row.match_score,
+        "match_reason": _reason(row, rooms_reason),
+        "city": row.city,
+        "area": row.area,
+        "property_type": row.property_type,
+        "listing_type": row.listing_type,
+        "rooms": row.rooms,
+        "price": _number(row.price),
+    } for row in rows]
+
+async def top_clients_for_property(db: AsyncSession, property: Property, k: int,
+                                   category: Optional[str] = None) -> List[dict]:
+    """Best K clients (buyers/renters) for a property, highest score first"""
+    if property.status == CLOSED_PROPERTY_STATUS or not property.listing_type:
+        return []
+    if category and property.category != category:
+        return []
+    request_types = {property.listing_type} | {
+        request for request, listing in REQUEST_TO_LISTING.items() if listing == property.listing_type
+    }
+
+    area = Client.neighborhood == property.area if property.area is not None else false()
+    if property.rooms is not None:
+        # Same as score_matches' CASE, written as an OR of two indexable arms
+        rooms = or_(
+            Client.preferred_rooms == str(property.rooms),
+            and_(
+                Client.preferred_rooms.is_(None),
+                Client.rooms_min <= property.rooms,
+                Client.rooms_max >= property.rooms
+            )
+        )
+    else:
+        rooms = false()
+    property_type = (
+        Client.preferred_property_type == property.property_type
+        if property.property_type is not None else false()
+    )
+    budget = Client.budget * Decimal("1.10") >= property.price if property.price is not None else false()
+
+    hits = [_hit(area), _hit(rooms), _hit(property_type), _hit(budget)]
+    score = _score(*hits)
+    statement = select(
+        Client.id, Client.contact_id, Client.request_type, Client.preferred_property_type,
+        Client.neighborhood, Client.preferred_rooms, Client.budget,
+        hits[0].label("area_hit"), hits[1].label("rooms_hit"),
+        hits[2].label("type_hit"), hits[3].label("budget_hit"),
+        score.label("match_score")
+    ).where(
+        Client.request_type.in_(request_types),
+        or_(Client.status.is_(None), Client.status != CLOSED_CLIENT_STATUS),
+        or_(area, rooms, property_type),
+        score >= MATCH_THRESHOLD
+    )
+    if category:
+        statement = statement.where(Client.preferred_property_type.in_(CATEGORY_PROPERTY_TYPES.get(category, ())))
+    rows = (await db.execute(statement.order_by(score.desc(), Client.id).limit(k))).all()
+
+    return [{
+        "client_id": row.id,
+        "contact_id": row.contact_id,
+        "match_score": row.match_score,
+        "match_reason": _reason(row, "Rooms match; " if row.preferred_rooms is not None else "Rooms in range; "),
+        "request_type": row.request_type,
+        "preferred_property_type": row.preferred_property_type,
+        "neighborhood": row.neighborhood,
+        "budget": _number(row.budget),
+    } for row in rows]
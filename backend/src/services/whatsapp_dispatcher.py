@@ -0,0 +1,166 @@
+"""
+Outbound WhatsApp message dispatcher
+marketing_logs doubles as a durable outbox (migration 033): send-bulk inserts
+rows with status 'pending', and a pool of asyncio workers drains them. Each
+worker claims a batch of due rows with FOR UPDATE SKIP LOCKED, so several
+workers (or several backend processes) never pick the same message. A claimed
+row is marked 'sending' with next_attempt_at pushed out by the lease, so
+messages held by a crashed worker become due again on their own.
+"""
+import asyncio
+import logging
+import random
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Dict, List, Optional
+from sqlalchemy import select, update, func
+from src.config import settings
+from src.database import async_engine
+from src.models.marketing_log import MarketingLog
+
+logger = logging.getLogger(__name__)
+
+class TransportError(Exception):
+    """A message could not be delivered; retryable errors are attempted again"""
+
+    def __init__(self, message: str, retryable: bool = True):
+        super().__init__(message)
+        self.retryable = retryable
+
+@dataclass
+class StubTransport:
+    """
+    Local stand-in for the WhatsApp Business API
+    Records every message in memory and logs it. failure_rate makes a share
+    of sends raise a retryable TransportError to exercise the retry path.
+    """
+    latency_seconds: float = 0.0
+    failure_rate: float = 0.0
+    sent: List[dict] = field(default_factory=list)
+
+    async def send(self, phone_number: str, message: str) -> str:
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise TransportError("stub transport: simulated failure")
+        provider_message_id = f"stub_{uuid.uuid4().hex}"
+        self.sent.append({"id": provider_message_id, "phone_number": phone_number, "message": message})
+        logger.info("WhatsApp (stub) to %s: %s", phone_number, message)
+        return provider_message_id
+
+def create_transport():
+    """Transport selected by WHATSAPP_TRANSPORT"""
+    if settings.WHATSAPP_TRANSPORT == "stub":
+        return StubTransport()
+    raise ValueError(f"Unknown WHATSAPP_TRANSPORT: {settings.WHATSAPP_TRANSPORT}")
+
+class TokenBucket:
+    """Allows rate tokens per second on average, with bursts of up to capacity"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter for the given number of attempts so far"""
+    ceiling = min(settings.WHATSAPP_RETRY_MAX_SECONDS, settings.WHATSAPP_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+    return random.uniform(0, ceiling)
+
+class WhatsAppDispatcher:
+    """Pool of workers draining the marketing_logs outbox through a transport"""
+
+    def __init__(self, transport, workers: Optional[int] = None):
+        self.transport = transport
+        self.workers = workers or settings.WHATSAPP_DISPATCH_WORKERS
+        self.buckets: Dict[Optional[int], TokenBucket] = {}
+
+    def bucket_for(self, sender_id: Optional[int]) -> TokenBucket:
+        if sender_id not in self.buckets:
+            self.buckets[sender_id] = TokenBucket(settings.WHATSAPP_RATE_PER_SECOND, settings.WHATSAPP_RATE_BURST)
+        return self.buckets[sender_id]
+
+    async def claim_batch(self) -> list:
+        """Claim up to WHATSAPP_DISPATCH_BATCH_SIZE due messages for this worker"""
+        due = select(MarketingLog.id).where(
+            MarketingLog.status.in_(("pending", "sending")),
+            MarketingLog.next_attempt_at <= func.now()
+        ).order_by(
+            MarketingLog.next_attempt_at, MarketingLog.id
+        ).limit(settings.WHATSAPP_DISPATCH_BATCH_SIZE).with_for_update(skip_locked=True)
+        claim = update(MarketingLog).where(MarketingLog.id.in_(due.scalar_subquery())).values(
+            status="sending",
+            attempts=MarketingLog.attempts + 1,
+            next_attempt_at=func.now() + timedelta(seconds=settings.WHATSAPP_DISPATCH_LEASE_SECONDS)
+        ).returning(
+            MarketingLog.id, MarketingLog.phone_number, MarketingLog.message_sent,
+            MarketingLog.sent_by, MarketingLog.attempts
+        )
+        async with async_engine.begin() as conn:
+            return (await conn.execute(claim)).all()
+
+    async def finish(self, message_id: int, **values):
+        """Record the outcome of a claimed message"""
+        async with async_engine.begin() as conn:
+            await conn.execute(
+                update(MarketingLog).where(
+                    MarketingLog.id == message_id, MarketingLog.status == "sending"
+                ).values(**values)
+            )
+
+    async def deliver(self, message):
+        """Send one claimed message and record sent, retry or failed"""
+        await self.bucket_for(message.sent_by).acquire()
+        try:
+            provider_message_id = await self.transport.send(message.phone_number, message.message_sent)
+        except Exception as e:
+            retryable = e.retryable if isinstance(e, TransportError) else True
+            if retryable and message.attempts < settings.WHATSAPP_MAX_ATTEMPTS:
+                await self.finish(
+                    message.id, status="pending", last_error=str(e),
+                    next_attempt_at=func.now() + timedelta(seconds=retry_delay(message.attempts))
+                )
+            else:
+                await self.finish(message.id, status="failed", last_error=str(e))
+            return
+        await self.finish(
+            message.id, status="sent", last_error=None,
+            provider_message_id=provider_message_id, sent_at=func.now()
+        )
+
+    async def run_worker(self, worker_id: int):
+        """Claim and deliver batches until cancelled, polling when the outbox is empty"""
+        while True:
+            try:
+                batch = await self.claim_batch()
+                for message in batch:
+                    await self.deliver(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("WhatsApp dispatcher worker %s failed", worker_id)
+                batch = []
+            if not batch:
+                await asyncio.sleep(settings.WHATSAPP_DISPATCH_POLL_SECONDS)
+
+    async def run(self):
+        await asyncio.gather(*(self.run_worker(worker_id) for worker_id in range(self.workers)))
+
+async def run_whatsapp_dispatcher():
+    """Run WHATSAPP_DISPATCH_WORKERS dispatcher workers until cancelled"""
+    await WhatsAppDispatcher(create_transport()).run()
@@ -1,16 +1,19 @@
 """
 Authentication utilities
 """
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
 from src.config import settings
-from src.database import get_db
-from src.models.user import User
+from src.database import AsyncSessionLocal
+from src.models.user import User, UserRole
+from src.utils.password_pool import run_password_operation
+from src.utils.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
@@ -25,27 +28,75 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         return False
 
 def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt directly"""
-    salt = bcrypt.gensalt()
+    """Hash a password using bcrypt directly, at the configured cost"""
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a bcrypt hash ($2b$<cost>$...) uses a cost other than BCRYPT_ROUNDS"""
+    parts = hashed_password.split('$')
+    return len(parts) < 4 or not parts[2].isdigit() or int(parts[2]) != settings.BCRYPT_ROUNDS
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password in the bounded bcrypt pool; raises PasswordPoolBusy when saturated"""
+    return await run_password_operation(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash in the bounded bcrypt pool; raises PasswordPoolBusy when saturated"""
+    return await run_password_operation(get_password_hash, password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create JWT access token"""
     to_encode = data.copy()
+    issued_at = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = issued_at + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(hours=settings.JWT_EXPIRATION_HOURS)
-    to_encode.update({"exp": expire})
+        expire = issued_at + timedelta(hours=settings.JWT_EXPIRATION_HOURS)
+    to_encode.update({"exp": expire, "iat": issued_at})
     encoded_jwt = jwt.encode(to_encode, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get current authenticated user"""
+def access_token_claims(user: User) -> dict:
+    """Claims that identify a user: email (sub), id (uid) and role"""
+    role_value = user.app_role.value if hasattr(user.app_role, 'value') else str(user.app_role)
+    return {"sub": user.email, "uid": user.id, "role": role_value}
+
+@dataclass(frozen=True)
+class Principal:
+    """The authenticated user's id, email and role, from the (cached) users row"""
+    id: int
+    email: str
+    app_role: UserRole
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(id=user.id, email=user.email, app_role=UserRole(user.app_role or UserRole.AGENT))
+
+async def get_cached_user(user_id: Optional[int] = None, email: Optional[str] = None) -> Optional[User]:
+    """
+    User row by id or email, served from the in-process cache when possible
+    The row is detached from any session: read it, don't modify it.
+    """
+    user = user_cache.get(user_id=user_id, email=email)
+    if user is None:
+        async with AsyncSessionLocal() as db:
+            condition = User.id == user_id if user_id is not None else User.email == email
+            user = await db.scalar(select(User).where(condition))
+            if user is not None:
+                db.expunge(user)
+                user_cache.put(user)
+    return user
+
+async def get_current_user(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Get current authenticated user from a verified token
+    The user is looked up by the uid claim (by email for tokens issued before
+    it existed) through the user cache, so a cache hit needs no query while
+    role changes and deletions take effect within USER_CACHE_TTL_SECONDS
+    rather than when the token expires.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -58,8 +109,20 @@ async def get_current_user(
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = db.query(User).filter(User.email == email).first()
-    if user is None:
+
+    user_id = payload.get("uid")
+    user = await get_cached_user(user_id=user_id if isinstance(user_id, int) else None, email=email)
+    if user is None or user.email != email:
         raise credentials_exception
-    return user
+    return Principal.from_user(user)
 
+async def get_current_user_record(principal: Principal = Depends(get_current_user)) -> User:
+    """Full (cached, read-only) User row of the authenticated user"""
+    user = await get_cached_user(user_id=principal.id)
+    if user is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
@@ -0,0 +1,214 @@
+"""
+Bulk create/update/delete for entity routes
+Each bulk request runs in one transaction and commits once:
+
+    create  multi-row INSERT ... RETURNING, one statement per set of columns
+    update  one existence query, then executemany UPDATE ... WHERE id = :id
+    delete  DELETE ... WHERE id = ANY(:ids) RETURNING id
+
+Rows that fail validation, or ids that do not exist, are reported by index in
+"errors" and the rest are still written. When a batch statement fails in the
+database (a foreign key, a check constraint), it is retried row by row inside
+savepoints so only the offending rows are reported. With atomic=true any
+error rolls back the whole request and nothing is written.
+"""
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import insert, update, delete, select, bindparam
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+from src.utils.serialization import deserialize, coerce_value
+
+MAX_BULK_ROWS = 1000
+
+# validator(data, current_row) raises HTTPException for an invalid row;
+# current_row is the stored row for updates and None for creates
+RowValidator = Callable[[dict, Optional[dict]], None]
+
+def _check_size(rows: list):
+    if not rows:
+        raise HTTPException(status_code=400, detail="Expected a non-empty array")
+    if len(rows) > MAX_BULK_ROWS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ROWS} rows per request")
+
+def _error(index: int, message: str) -> dict:
+    return {"index": index, "error": message}
+
+def _database_error(e: DBAPIError) -> str:
+    return str(e.orig).strip() if e.orig is not None else str(e)
+
+def _prepare(model_class: Any, rows: List[Any], validator: Optional[RowValidator],
+             current: Optional[Dict[int, dict]] = None) -> Tuple[List[Tuple[int, dict]], List[dict]]:
+    """Deserialize and validate every row; returns (index, values) pairs and errors"""
+    valid, errors = [], []
+    for index, data in enumerate(rows):
+        if not isinstance(data, dict):
+            errors.append(_error(index, "Expected an object"))
+            continue
+        try:
+            values = deserialize(model_class, data)
+            if validator:
+                validator(data, current.get(values.get("id")) if current is not None else None)
+        except HTTPException as e:
+            errors.append(_error(index, str(e.detail)))
+            continue
+        valid.append((index, values))
+    return valid, errors
+
+def _finish_or_raise(errors: List[dict], atomic: bool):
+    if atomic and errors:
+        raise HTTPException(
+            status_code=400,
+            detail={"message": "Bulk request rolled back", "errors": sorted(errors, key=lambda e: e["index"])}
+        )
+
+async def _run_batches(db: AsyncSession, batches: Dict[tuple, List[Tuple[int, Any]]],
+                       execute: Callable, atomic: bool, errors: List[dict]) -> list:
+    """
+    Run execute(values) once per batch inside a savepoint and return
+    (index, result) pairs. When a batch fails in the database its rows are
+    retried one savepoint each, so the failing rows can be reported.
+    """
+    results = []
+    for batch in batches.values():
+        try:
+            async with db.begin_nested():
+                batch_results = await execute([values for _, values in batch])
+            results.extend(zip([index for index, _ in batch], batch_results))
+        except DBAPIError as e:
+            if len(batch) == 1:
+                errors.append(_error(batch[0][0], _database_error(e)))
+            else:
+                for index, values in batch:
+                    try:
+                        async with db.begin_nested():
+                            results.extend((index, result) for result in await execute([values]))
+                    except DBAPIError as row_error:
+                        errors.append(_error(index, _database_error(row_error)))
+        if atomic and errors:
+            break
+    return results
+
+def _by_columns(rows: List[Tuple[int, dict]]) -> Dict[tuple, List[Tuple[int, dict]]]:
+    """Group rows by their set of columns so each group is one statement"""
+    batches: Dict[tuple, List[Tuple[int, dict]]] = {}
+    for index, values in rows:
+        batches.setdefault(tuple(sorted(values)), []).append((index, values))
+    return batches
+
+async def bulk_create(db: AsyncSession, model_class: Any, rows: List[Any], atomic: bool,
+                      validator: Optional[RowValidator] = None) -> dict:
+    """Insert rows; returns the created rows (with their indexes) and per-row errors"""
+    _check_size(rows)
+    table = model_class.__table__
+    valid, errors = _prepare(model_class, rows, validator)
+    _finish_or_raise(errors, atomic)
+
+    statement = insert(table).returning(*table.c, sort_by_parameter_order=True)
+
+    async def execute(values: List[dict]) -> list:
+        if not values[0]:
+            # Rows with no known columns get every default
+            return [(await db.execute(insert(table).returning(*table.c))).one() for _ in values]
+        return (await db.execute(statement, values)).all()
+
+    created = await _run_batches(db, _by_columns(valid), execute, atomic, errors)
+    if atomic and errors:
+        await db.rollback()
+        _finish_or_raise(errors, atomic)
+    await db.commit()
+    return {
+        "created": [{"index": index, **row._mapping} for index, row in sorted(created, key=lambda r: r[0])],
+        "errors": sorted(errors, key=lambda e: e["index"])
+    }
+
+async def bulk_update(db: AsyncSession, model_class: Any, rows: List[Any], atomic: bool,
+                      validator: Optional[RowValidator] = None) -> dict:
+    """Update rows by id; returns the updated rows (with their indexes) and per-row errors"""
+    _check_size(rows)
+    table = model_class.__table__
+
+    ids = set()
+    for row in rows:
+        if isinstance(row, dict) and row.get("id") is not None:
+            try:
+                ids.add(coerce_value(table.c.id, row["id"]))
+            except (ValueError, TypeError):
+                pass  # reported by _prepare
+    columns = list(table.c) if validator else [table.c.id]
+    current = {
+        row.id: dict(row._mapping)
+        for row in (await db.execute(select(*columns).where(table.c.id.in_(ids)))).all()
+    } if ids else {}
+
+    valid, errors = _prepare(model_class, rows, validator, current)
+    changes, unchanged = [], []
+    for index, values in valid:
+        entity_id = values.pop("id", None)
+        if entity_id is None:
+            errors.append(_error(index, "Missing id"))
+        elif entity_id not in current:
+            errors.append(_error(index, f"id {entity_id} not found"))
+        elif values:
+            changes.append((index, {"_id": entity_id, **values}))
+        else:
+            unchanged.append((index, entity_id))
+    _finish_or_raise(errors, atomic)
+
+    # The SET clause is built from the column keys of the parameter sets
+    statement = update(table).where(table.c.id == bindparam("_id"))
+
+    async def execute(values: List[dict]) -> list:
+        await db.execute(statement, values)
+        return [value["_id"] for value in values]
+
+    updated = await _run_batches(db, _by_columns(changes), execute, atomic, errors) + unchanged
+    if atomic and errors:
+        await db.rollback()
+        _finish_or_raise(errors, atomic)
+    await db.commit()
+
+    updated_ids = {entity_id for _, entity_id in updated}
+    stored = {
+        row.id: row
+        for row in (await db.execute(select(*table.c).where(table.c.id.in_(updated_ids)))).all()
+    } if updated_ids else {}
+    return {
+        "updated": [
+            {"index": index, **stored[entity_id]._mapping}
+            for index, entity_id in sorted(updated, key=lambda r: r[0]) if entity_id in stored
+        ],
+        "errors": sorted(errors, key=lambda e: e["index"])
+    }
+
+async def bulk_delete(db: AsyncSession, model_class: Any, ids: List[Any], atomic: bool) -> dict:
+    """Delete rows by id; returns the deleted ids and per-id errors"""
+    _check_size(ids)
+    table = model_class.__table__
+    valid, errors = [], []
+    for index, entity_id in enumerate(ids):
+        try:
+            valid.append((index, deserialize(model_class, {"id": entity_id})["id"]))
+        except HTTPException as e:
+            errors.append(_error(index, str(e.detail)))
+    _finish_or_raise(errors, atomic)
+
+    async def execute(values: List[int]) -> list:
+        deleted = set((await db.execute(
+            delete(table).where(table.c.id.in_(values)).returning(table.c.id)
+        )).scalars())
+        return [entity_id if entity_id in deleted else None for entity_id in values]
+
+    deleted = await _run_batches(db, {(): valid}, execute, atomic, errors)
+    requested = dict(valid)
+    errors.extend(
+        _error(index, f"id {requested[index]} not found") for index, entity_id in deleted if entity_id is None
+    )
+    if atomic and errors:
+        await db.rollback()
+        _finish_or_raise(errors, atomic)
+    await db.commit()
+    return {
+        "deleted": [entity_id for _, entity_id in sorted(deleted, key=lambda r: r[0]) if entity_id is not None],
+        "errors": sorted(errors, key=lambda e: e["index"])
+    }
@@ -0,0 +1,51 @@
+"""
+Multipart form parsing with a body size limit
+Request.form() reads the whole body before the route sees any of it, so a
+chunked request (no Content-Length) was received in full, however large,
+before an upload's size was checked. read_form() feeds the same Starlette
+parser from request.stream() and stops as soon as more than max_body bytes
+have arrived, whether or not the client declared a length.
+"""
+from fastapi import HTTPException, Request
+from starlette.datastructures import FormData
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+# Room for the multipart boundaries and part headers around the file itself
+MULTIPART_OVERHEAD = 64 * 1024
+
+class BodyTooLarge(MultiPartException):
+    """The request body is larger than the route accepts"""
+
+    def __init__(self):
+        super().__init__("Request body too large")
+
+async def _limited_stream(request: Request, max_body: int):
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if received > max_body:
+            raise BodyTooLarge()
+        yield chunk
+
+async def read_form(request: Request, max_body: int, max_files: int = 1, max_fields: int = 10) -> FormData:
+    """
+    Parse a multipart/form-data body of at most max_body bytes
+    Raises BodyTooLarge past the limit (before reading the body when the
+    Content-Length already exceeds it) and HTTPException(400) for a malformed
+    body. Other content types give an empty form, as with Request.form().
+    The caller closes the returned form.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_body:
+        raise BodyTooLarge()
+    if not request.headers.get("content-type", "").lower().startswith("multipart/form-data"):
+        return FormData()
+    parser = MultiPartParser(
+        request.headers, _limited_stream(request, max_body), max_files=max_files, max_fields=max_fields
+    )
+    try:
+        return await parser.parse()
+    except BodyTooLarge:
+        raise
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=e.message)
@@ -0,0 +1,107 @@
+"""
+Shared HTTP client for proxying requests to PostgREST
+One pooled client is created at application startup and closed at shutdown,
+so proxied requests reuse keep-alive connections instead of opening a new
+TCP connection (and a new pool) per request.
+"""
+import time
+from typing import Optional
+import httpx
+from src.config import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+class PoolMetrics:
+    """In-process counters for connection pool saturation and wait time"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.requests_total = 0
+        self.saturated_total = 0
+        self.pool_wait_seconds_total = 0.0
+        self.pool_wait_seconds_max = 0.0
+
+    def request_started(self):
+        self.in_flight += 1
+        self.requests_total += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        # Every connection is busy, so this request has to queue for one
+        if self.in_flight > settings.POSTGREST_MAX_CONNECTIONS:
+            self.saturated_total += 1
+
+    def request_finished(self):
+        self.in_flight -= 1
+
+    def record_pool_wait(self, seconds: float):
+        self.pool_wait_seconds_total += seconds
+        self.pool_wait_seconds_max = max(self.pool_wait_seconds_max, seconds)
+
+    def snapshot(self) -> dict:
+        avg_wait = self.pool_wait_seconds_total / self.requests_total if self.requests_total else 0.0
+        return {
+            "max_connections": settings.POSTGREST_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.POSTGREST_MAX_KEEPALIVE_CONNECTIONS,
+            "http2": settings.POSTGREST_HTTP2,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "saturation": self.in_flight / settings.POSTGREST_MAX_CONNECTIONS,
+            "requests_total": self.requests_total,
+            "saturated_total": self.saturated_total,
+            "pool_wait_seconds_avg": avg_wait,
+            "pool_wait_seconds_max": self.pool_wait_seconds_max,
+        }
+
+
+pool_metrics = PoolMetrics()
+
+
+def pool_wait_trace():
+    """
+    Build an httpcore trace callback that records how long a request waited
+    for a pooled connection. httpcore only emits trace events once the pool
+    has handed out a connection, so the first event marks the end of the wait.
+    """
+    started = time.perf_counter()
+    recorded = False
+
+    async def trace(event_name: str, info: dict):
+        nonlocal recorded
+        if not recorded:
+            recorded = True
+            pool_metrics.record_pool_wait(time.perf_counter() - started)
+
+    return trace
+
+
+async def start_http_client():
+    """Create the shared PostgREST client (called on application startup)"""
+    global _client
+    if _client is not None:
+        return
+    _client = httpx.AsyncClient(
+        base_url=settings.POSTGREST_URL,
+        http2=settings.POSTGREST_HTTP2,
+        limits=httpx.Limits(
+            max_connections=settings.POSTGREST_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.POSTGREST_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.POSTGREST_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(settings.POSTGREST_TIMEOUT, pool=settings.POSTGREST_POOL_TIMEOUT),
+    )
+
+
+async def close_http_client():
+    """Close the shared PostgREST client (called on application shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared PostgREST client"""
+    if _client is None:
+        raise RuntimeError("PostgREST HTTP client is not started")
+    return _client
@@ -0,0 +1,219 @@
+"""
+Keyset (cursor) pagination and query-string filtering for entity listings
+Filters use the same operator syntax as PostgREST (e.g. price=lte.2000000,
+city=in.(חיפה,תל אביב), city=ilike.*חיפ*, or=(city.ilike.*x*,street.ilike.*x*))
+so the frontend can send identical query strings to either backend.
+Parameters this backend cannot evaluate (unknown fields, embedded resources
+such as contact.full_name, operators like fts or cs) are ignored rather than
+rejected or misread, so listings return a superset as they did before filters
+were supported.
+"""
+import base64
+import enum
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import and_, or_, not_, tuple_, text, cast, String
+from src.utils.serialization import coerce_value
+
+# Query parameters that control the listing itself and are never filters
+RESERVED_PARAMS = {"order_by", "order", "limit", "offset", "cursor", "include_total", "select", "fields"}
+
+# PostgREST-style comparison operators supported as filters
+FILTER_OPERATORS = {"eq", "neq", "gt", "gte", "lt", "lte", "in", "is", "like", "ilike"}
+
+# The other PostgREST operators: such filters are skipped, not read as eq
+UNSUPPORTED_OPERATORS = {
+    "match", "imatch", "fts", "plfts", "phfts", "wfts", "cs", "cd", "ov",
+    "sl", "sr", "nxr", "nxl", "adj", "isdistinct", "not", "all", "any",
+}
+
+MAX_PAGE_SIZE = 1000
+
+def _json_value(value: Any) -> Any:
+    """Make a column value JSON-serializable for embedding in a cursor"""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, enum.Enum):
+        return value.value
+    return value
+
+def encode_token(payload: dict) -> str:
+    """Encode a JSON payload as an opaque URL-safe token"""
+    data = json.dumps({key: _json_value(value) for key, value in payload.items()}, ensure_ascii=False)
+    return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip("=")
+
+def decode_token(token: str) -> dict:
+    """Decode a token produced by encode_token (raises ValueError when malformed)"""
+    padded = token + "=" * (-len(token) % 4)
+    payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    if not isinstance(payload, dict):
+        raise ValueError("malformed token")
+    return payload
+
+def encode_cursor(order_key: str, value: Any, entity_id: int) -> str:
+    """Encode the position after the last returned row as an opaque token"""
+    return encode_token({"k": order_key, "v": value, "id": entity_id})
+
+def decode_cursor(cursor: str, order_key: str, column) -> Tuple[Any, int]:
+    """Decode a cursor produced by encode_cursor for the same ordering"""
+    try:
+        payload = decode_token(cursor)
+        if payload["k"] != order_key:
+            raise ValueError("cursor was issued for a different ordering")
+        return coerce_value(column, payload["v"]), int(payload["id"])
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+
+def parse_order(model_class: Any, order: Optional[str]) -> Tuple[str, Any, bool]:
+    """
+    Resolve an ordering to (order_key, column, descending)
+    Accepts both the legacy "-field" form and PostgREST's "field.desc".
+    Unknown fields fall back to id like the previous implementation ignored them.
+    """
+    columns = model_class.__table__.columns
+    descending = False
+    field_name = "id"
+    if order:
+        field_name = order
+        if field_name.startswith("-"):
+            field_name, descending = field_name[1:], True
+        elif field_name.endswith(".desc"):
+            field_name, descending = field_name[:-5], True
+        elif field_name.endswith(".asc"):
+            field_name = field_name[:-4]
+        if field_name not in columns:
+            field_name, descending = "id", False
+    order_key = f"-{field_name}" if descending else field_name
+    return order_key, columns[field_name], descending
+
+def keyset_predicate(column, id_column, descending: bool, last_value: Any, last_id: int):
+    """
+    Rows strictly after (last_value, last_id) in ORDER BY column, id
+    Mirrors PostgreSQL NULL placement: NULLS LAST for ASC, NULLS FIRST for DESC.
+    """
+    if column is id_column:
+        return id_column < last_id if descending else id_column > last_id
+    if descending:
+        if last_value is None:
+            return or_(and_(column.is_(None), id_column < last_id), column.isnot(None))
+        return and_(column.isnot(None), tuple_(column, id_column) < tuple_(last_value, last_id))
+    if last_value is None:
+        return and_(column.is_(None), id_column > last_id)
+    return or_(tuple_(column, id_column) > tuple_(last_value, last_id), column.is_(None))
+
+def order_clauses(column, id_column, descending: bool) -> list:
+    """ORDER BY clauses matching keyset_predicate"""
+    if column is id_column:
+        return [id_column.desc() if descending else id_column.asc()]
+    if descending:
+        return [column.desc(), id_column.desc()]
+    return [column.asc(), id_column.asc()]
+
+def _split_list(raw: str) -> List[str]:
+    """Split an in.(a,b,"c,d") operand into its items"""
+    raw = raw.strip()
+    if not (raw.startswith("(") and raw.endswith(")")):
+        raise ValueError("in filter must look like in.(a,b)")
+    items, current, quoted = [], "", False
+    for ch in raw[1:-1]:
+        if ch == '"':
+            quoted = not quoted
+        elif ch == "," and not quoted:
+            items.append(current)
+            current = ""
+        else:
+            current += ch
+    items.append(current)
+    return [item.strip() for item in items if item.strip() != ""]
+
+def _condition(column, raw: str):
+    """
+    Clause for one PostgREST condition on column ("lte.2000000", "not.ilike.*x*")
+    A value without a known operator is an equality ("city=חיפה"). Returns None
+    for operators this backend does not implement. Raises ValueError or
+    TypeError when the operand does not fit the column.
+    """
+    negate = raw.startswith("not.")
+    expression = raw[4:] if negate else raw
+    operator, separator, operand = expression.partition(".")
+    if not separator or operator not in FILTER_OPERATORS:
+        if separator and operator in UNSUPPORTED_OPERATORS:
+            return None
+        negate, operator, operand = False, "eq", raw
+    if operator == "is":
+        if operand.lower() == "null":
+            clause = column.is_(None)
+        elif operand.lower() in ("true", "false"):
+            clause = column.is_(operand.lower() == "true")
+        else:
+            raise ValueError("is filter accepts null, true or false")
+    elif operator == "in":
+        clause = column.in_([coerce_value(column, item) for item in _split_list(operand)])
+    elif operator in ("like", "ilike"):
+        # PostgREST uses * as the wildcard, since % must be escaped in URLs
+        text_column = column if isinstance(column.type, String) else cast(column, String)
+        pattern = operand.replace("*", "%")
+        clause = text_column.like(pattern) if operator == "like" else text_column.ilike(pattern)
+    else:
+        value = coerce_value(column, operand)
+        clause = {
+            "eq": column == value,
+            "neq": column != value,
+            "gt": column > value,
+            "gte": column >= value,
+            "lt": column < value,
+            "lte": column <= value,
+        }[operator]
+    return not_(clause) if negate else clause
+
+def _or_condition(columns, raw: str):
+    """
+    Clause for or=(field.op.value,...), or None when any term cannot be
+    evaluated here (an embedded resource, a nested and(), an unsupported
+    operator): dropping a term would narrow the search, so the whole
+    filter is skipped instead.
+    """
+    clauses = []
+    for term in _split_list(raw):
+        field_name, separator, expression = term.partition(".")
+        if not separator or field_name not in columns:
+            return None
+        clause = _condition(columns[field_name], expression)
+        if clause is None:
+            return None
+        clauses.append(clause)
+    return or_(*clauses) if clauses else None
+
+def build_filters(model_class: Any, query_items: List[Tuple[str, str]]) -> list:
+    """
+    Build SQLAlchemy filter clauses from query-string items
+    Operands are coerced to the column's type, so bad input for a filter that
+    is applied is a 400 rather than a DB error. Parameters that cannot be
+    applied are skipped (see the module docstring).
+    """
+    columns = model_class.__table__.columns
+    clauses = []
+    for field_name, raw in query_items:
+        if field_name in RESERVED_PARAMS:
+            continue
+        try:
+            if field_name == "or":
+                clause = _or_condition(columns, raw)
+            elif field_name in columns:
+                clause = _condition(columns[field_name], raw)
+            else:
+                continue
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid filter {field_name}={raw}: {str(e)}")
+        if clause is not None:
+            clauses.append(clause)
+    return clauses
+
+ESTIMATED_COUNT_SQL = text(
+    "SELECT GREATEST(reltuples, 0)::bigint FROM pg_class WHERE oid = CAST(:table_name AS regclass)"
+)
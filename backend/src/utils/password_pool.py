@@ -0,0 +1,84 @@
+"""
+Bounded thread pool for bcrypt
+bcrypt is deliberately slow (hundreds of milliseconds at the default cost)
+and would block the event loop if called from a route. Password hashing and
+verification run in a dedicated thread pool instead (bcrypt releases the GIL),
+with at most PASSWORD_HASH_WORKERS operations in flight. Callers beyond that
+wait on a semaphore, so a cancelled request never reaches the pool, and once
+PASSWORD_HASH_MAX_PENDING operations are running or waiting new ones are
+rejected with PasswordPoolBusy (a 429 for the client) instead of queueing
+without bound.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+from src.config import settings
+
+T = TypeVar("T")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+class PasswordPoolBusy(Exception):
+    """Too many password operations are running or waiting"""
+
+
+class PasswordPoolMetrics:
+    """In-process counters for password pool load"""
+
+    def __init__(self):
+        self.pending = 0
+        self.peak_pending = 0
+        self.completed_total = 0
+        self.rejected_total = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": settings.PASSWORD_HASH_WORKERS,
+            "max_pending": settings.PASSWORD_HASH_MAX_PENDING,
+            "pending": self.pending,
+            "peak_pending": self.peak_pending,
+            "completed_total": self.completed_total,
+            "rejected_total": self.rejected_total,
+        }
+
+
+password_pool_metrics = PasswordPoolMetrics()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _semaphore
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt"
+        )
+        _semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS)
+    return _executor
+
+
+async def run_password_operation(function: Callable[..., T], *args) -> T:
+    """Run a bcrypt call in the pool, or raise PasswordPoolBusy when saturated"""
+    executor = _get_executor()
+    metrics = password_pool_metrics
+    if metrics.pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        metrics.rejected_total += 1
+        raise PasswordPoolBusy()
+    metrics.pending += 1
+    metrics.peak_pending = max(metrics.peak_pending, metrics.pending)
+    try:
+        async with _semaphore:
+            result = await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+        metrics.completed_total += 1
+        return result
+    finally:
+        metrics.pending -= 1
+
+
+def close_password_pool():
+    """Stop the pool; called from the application lifespan"""
+    global _executor, _semaphore
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+        _semaphore = None
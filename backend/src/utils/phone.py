@@ -0,0 +1,37 @@
+"""
+Phone number normalization
+Mirrors the normalize_phone_e164 SQL function (migration 032), which fills
+do_not_call_list.phone_normalized, so values normalized here can be looked
+up directly against that column.
+"""
+import re
+from typing import Optional
+
+_NON_DIGITS = re.compile(r'\D')
+
+# "+" and at most 15 digits
+MAX_E164_LENGTH = 16
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """
+    Normalize a phone number to E.164, defaulting to Israel (+972)
+    "050-123 4567", "0501234567", "972501234567" and "+972 50 123 4567" all
+    become "+972501234567". Returns None when there are no digits, or too
+    many for one number (free text holding several numbers).
+    """
+    if not phone:
+        return None
+    digits = _NON_DIGITS.sub('', phone)
+    if not digits:
+        return None
+    if phone.lstrip().startswith('+'):
+        normalized = '+' + digits
+    elif digits.startswith('00'):
+        normalized = '+' + digits[2:]
+    elif digits.startswith('972'):
+        normalized = '+' + digits
+    elif digits.startswith('0'):
+        normalized = '+972' + digits[1:]
+    else:
+        normalized = '+972' + digits
+    return normalized if len(normalized) <= MAX_E164_LENGTH else None
@@ -0,0 +1,119 @@
+"""
+Serialization helpers for SQLAlchemy models
+Column names and attribute getters are computed once per model class
+instead of walking __table__.columns for every row.
+"""
+import enum
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Optional, Tuple
+from fastapi import HTTPException
+
+@lru_cache(maxsize=None)
+def column_names(model_class: Any) -> Tuple[str, ...]:
+    """Column names of a model in table order"""
+    return tuple(c.name for c in model_class.__table__.columns)
+
+@lru_cache(maxsize=None)
+def _row_getter(model_class: Any):
+    names = column_names(model_class)
+    getter = attrgetter(*names)
+    if len(names) == 1:
+        return names, lambda entity: (getter(entity),)
+    return names, getter
+
+def serialize(entity: Any) -> dict:
+    """Convert a model instance to a JSON-ready dict of its columns"""
+    names, getter = _row_getter(type(entity))
+    return dict(zip(names, getter(entity)))
+
+def parse_fields(model_class: Any, fields: Optional[str]) -> Tuple[str, ...]:
+    """
+    Resolve a comma-separated fields= projection to column names
+    id is always included so rows stay addressable. Without fields= every
+    column is returned, as before.
+    """
+    if not fields:
+        return column_names(model_class)
+    available = set(column_names(model_class))
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    names = ["id"] + [name for name in requested if name != "id"]
+    return tuple(dict.fromkeys(names))
+
+def coerce_value(column, value: Any) -> Any:
+    """Convert a raw (query string or JSON) value to the column's Python type"""
+    if value is None:
+        return None
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+
+    if python_type is bool:
+        if isinstance(value, bool):
+            return value
+        if str(value).lower() in ("true", "1", "yes", "כן"):
+            return True
+        if str(value).lower() in ("false", "0", "no", "לא"):
+            return False
+        raise ValueError(f"invalid boolean {value!r}")
+    if python_type is int:
+        if isinstance(value, bool):
+            raise ValueError(f"invalid integer {value!r}")
+        if isinstance(value, float):
+            if not value.is_integer():
+                raise ValueError(f"invalid integer {value!r}")
+            return int(value)
+        return int(value)
+    if python_type is Decimal:
+        try:
+            return Decimal(str(value))
+        except InvalidOperation:
+            raise ValueError(f"invalid number {value!r}")
+    if python_type is float:
+        return float(value)
+    if python_type is datetime:
+        if isinstance(value, datetime):
+            return value
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if python_type is date:
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        value = str(value)
+        if 'T' in value or 'Z' in value:
+            return datetime.fromisoformat(value.replace('Z', '+00:00')).date()
+        return date.fromisoformat(value)
+    if python_type is str:
+        if isinstance(value, (dict, list)):
+            raise ValueError(f"invalid text {value!r}")
+        return value.value if isinstance(value, enum.Enum) else str(value)
+    if python_type is list:
+        if not isinstance(value, list):
+            raise ValueError(f"expected a list, got {value!r}")
+        return value
+    if isinstance(python_type, type) and issubclass(python_type, enum.Enum):
+        return python_type(value)
+    return value
+
+def deserialize(model_class: Any, data: dict) -> dict:
+    """
+    Keep only the model's columns from a JSON payload and coerce each value
+    to the column's Python type (asyncpg does not cast strings to dates/numbers)
+    """
+    columns = model_class.__table__.columns
+    values = {}
+    for key, value in data.items():
+        if key not in columns:
+            continue
+        try:
+            values[key] = coerce_value(columns[key], value)
+        except (ValueError, TypeError) as e:
+            raise HTTPException(status_code=400, detail=f"Invalid value for {key}: {str(e)}")
+    return values
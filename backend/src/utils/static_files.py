@@ -0,0 +1,28 @@
+"""
+Static file serving for content-addressed uploads
+Blobs named <sha256><ext> and their image derivatives <sha256>_w<width>.<ext>
+never change, so they are served with the name as a strong ETag and an
+immutable, year-long Cache-Control. Other files under
+uploads/ (uploads stored before content addressing) keep Starlette's default
+mtime/size-based validators.
+"""
+import os
+import re
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+
+CONTENT_ADDRESSED_NAME = re.compile(r"([0-9a-f]{64})(_w[0-9]+)?(\.[a-z0-9]+)?")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+class ContentAddressedStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        match = CONTENT_ADDRESSED_NAME.fullmatch(os.path.basename(full_path))
+        if match:
+            response.headers["etag"] = f'"{match.group(1)}{match.group(2) or ""}"'
+            response.headers["cache-control"] = IMMUTABLE_CACHE_CONTROL
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,170 @@
+"""
+Message templates for campaign personalization
+A template such as "שלום {first_name}, דירה ב{neighborhood} עד {budget|thousands|isolate} ₪"
+is parsed once into a plan of literal text and placeholders, and the plan is
+compiled into a flat list of literals with one slot per placeholder, so
+rendering a lead is one attribute fetch, a slot fill and a single join.
+Placeholders and directives are validated when the template is compiled, so a
+typo fails the request instead of reaching every recipient as literal
+"{frist_name}" text.
+
+Syntax:
+    {field}                 value of a MarketingLead column ("" when empty or 0)
+    {field|directive|...}   value passed through directives, left to right
+    {{ and }}               literal braces
+    Any other brace is literal text: a lone "{" or "}", or braces around
+    something that is not a field name ("{ מבצע! }"), render unchanged.
+
+Directives:
+    thousands   group digits with commas (1500000 -> 1,500,000)
+    isolate     wrap in Unicode first-strong/pop directional isolates so
+                numbers and Latin text keep their order inside Hebrew text
+"""
+import re
+from decimal import Decimal
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, List, Tuple, Union
+from sqlalchemy import String, Text
+from src.models.marketing_lead import MarketingLead
+
+class TemplateError(ValueError):
+    """The template has unknown placeholders or directives"""
+
+# Every MarketingLead column can be used as a placeholder
+TEMPLATE_FIELDS = frozenset(column.name for column in MarketingLead.__table__.columns)
+
+# Text columns render as-is, so they skip the generic value formatting
+_TEXT_FIELDS = frozenset(
+    column.name for column in MarketingLead.__table__.columns
+    if isinstance(column.type, (String, Text))
+)
+
+# Escaped braces, or a placeholder: a name with optional |directives
+_TOKEN = re.compile(r"\{\{|\}\}|\{\s*([A-Za-z_][A-Za-z0-9_]*(?:\s*\|\s*[A-Za-z_][A-Za-z0-9_]*)*)\s*\}")
+
+FSI = "\u2068"  # FIRST STRONG ISOLATE
+PDI = "\u2069"  # POP DIRECTIONAL ISOLATE
+
+def _format_value(value: Any) -> str:
+    """Default rendering: empty for None and 0, whole numbers without decimals"""
+    if not value:
+        return ""
+    text = str(value)
+    if isinstance(value, (Decimal, float)):
+        if "E" in text or "e" in text:
+            return str(int(value)) if value == int(value) else text
+        # Numeric(15, 2) columns come back as "1500000.00"
+        whole, _, fraction = text.partition(".")
+        if not fraction.rstrip("0"):
+            return whole
+    return text
+
+def _thousands(value: Any) -> Any:
+    if isinstance(value, bool) or not isinstance(value, (int, float, Decimal)):
+        return value
+    if value == int(value):
+        return f"{int(value):,}"
+    return f"{value:,}"
+
+def _isolate(value: Any) -> str:
+    text = _format_value(value)
+    return f"{FSI}{text}{PDI}" if text else text
+
+DIRECTIVES = {
+    "thousands": _thousands,
+    "isolate": _isolate,
+}
+
+def _directive_renderer(directives: List[Callable[[Any], Any]]) -> Callable[[Any], str]:
+    """Build the function that passes a field value through its directives"""
+    def render(value: Any) -> str:
+        if not value:
+            return ""
+        for directive in directives:
+            value = directive(value)
+        return _format_value(value)
+
+    return render
+
+class CompiledTemplate:
+    """
+    A parsed template; render() fills it for one lead
+    The plan (literal strings and (field, directives) placeholders) is laid
+    out once as a list of literals with a slot after each one. Rendering
+    copies the list, drops the lead's values into the slots with one
+    attrgetter, formats the slots that are not plain text columns and joins.
+    Empty text columns are None in their slot and skipped by the join.
+    """
+
+    def __init__(self, source: str, plan: List[Union[str, Tuple[str, List[Callable[[Any], Any]]]]]):
+        self.source = source
+        self.plan = plan
+        names = [part[0] for part in plan if not isinstance(part, str)]
+        # Lead columns the template reads
+        self.fields = frozenset(names)
+        if not names:
+            text = "".join(plan)
+            self.render: Callable[[Any], str] = lambda lead: text
+            return
+
+        parts = [""]
+        formatters = []
+        for part in plan:
+            if isinstance(part, str):
+                parts[-1] += part
+                continue
+            name, directives = part
+            if directives:
+                formatters.append((len(parts), _directive_renderer(directives)))
+            elif name not in _TEXT_FIELDS:
+                formatters.append((len(parts), _format_value))
+            parts += [None, ""]
+        formatters = tuple(formatters)
+        if len(names) == 1:
+            get_one = attrgetter(names[0])
+            get = lambda lead: (get_one(lead),)
+        else:
+            get = attrgetter(*names)
+
+        def render(lead: Any) -> str:
+            out = parts[:]
+            out[1::2] = get(lead)
+            for slot, format_value in formatters:
+                out[slot] = format_value(out[slot])
+            return "".join(filter(None, out))
+
+        self.render = render
+
+@lru_cache(maxsize=128)
+def compile_template(source: str) -> CompiledTemplate:
+    """Parse and validate a template (raises TemplateError)"""
+    plan: List[Union[str, Tuple[str, List[Callable[[Any], Any]]]]] = []
+    errors = []
+    literal = []
+    position = 0
+    for match in _TOKEN.finditer(source):
+        literal.append(source[position:match.start()])
+        position = match.end()
+        token = match.group(0)
+        if token in ("{{", "}}"):
+            literal.append(token[0])
+            continue
+        name, *directive_names = [part.strip() for part in match.group(1).split("|")]
+        if name not in TEMPLATE_FIELDS:
+            errors.append(f"unknown placeholder {{{name}}}")
+            continue
+        unknown = [d for d in directive_names if d not in DIRECTIVES]
+        if unknown:
+            errors.append(f"unknown directive {', '.join(unknown)} in {{{match.group(1)}}}")
+            continue
+        if "".join(literal):
+            plan.append("".join(literal))
+        literal = []
+        plan.append((name, [DIRECTIVES[d] for d in directive_names]))
+    literal.append(source[position:])
+    if "".join(literal):
+        plan.append("".join(literal))
+    if errors:
+        raise TemplateError("Invalid message template: " + "; ".join(errors))
+    return CompiledTemplate(source, plan)
@@ -0,0 +1,110 @@
+"""
+In-process cache of User rows
+Every request resolves its user through this cache (see get_current_user):
+a bounded LRU whose entries expire after USER_CACHE_TTL_SECONDS, so a user
+that was deleted or had their role changed, by any process or directly in
+the database, loses the old access within the TTL. ORM updates and deletes
+of a user in this process also evict the row as soon as they commit.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+from src.config import settings
+from src.models.user import User
+
+# Session.info key for users changed in the current transaction
+_CHANGED_USERS_KEY = "user_cache_changed_ids"
+
+
+class UserCache:
+    """TTL + LRU cache of detached User rows, keyed by id with an email index"""
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[float, User]]" = OrderedDict()
+        self._ids_by_email: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, user_id: Optional[int] = None, email: Optional[str] = None) -> Optional[User]:
+        with self._lock:
+            if user_id is None and email is not None:
+                user_id = self._ids_by_email.get(email)
+            entry = self._entries.get(user_id) if user_id is not None else None
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    self._remove(user_id)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, user: User):
+        with self._lock:
+            self._remove(user.id)
+            self._entries[user.id] = (time.monotonic() + self.ttl_seconds, user)
+            self._ids_by_email[user.email] = user.id
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, user_id: int):
+        with self._lock:
+            self._remove(user_id)
+            self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._ids_by_email.clear()
+
+    def _remove(self, user_id: int):
+        entry = self._entries.pop(user_id, None)
+        if entry is not None and self._ids_by_email.get(entry[1].email) == user_id:
+            del self._ids_by_email[entry[1].email]
+
+    def snapshot(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+
+user_cache = UserCache(settings.USER_CACHE_MAX_ENTRIES, settings.USER_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _user_changed(mapper, connection, target: User):
+    # Evict now and again at commit, so a read between flush and commit
+    # cannot keep the old row cached
+    user_cache.invalidate(target.id)
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_USERS_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session):
+    for user_id in session.info.pop(_CHANGED_USERS_KEY, ()):
+        user_cache.invalidate(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session: Session):
+    session.info.pop(_CHANGED_USERS_KEY, None)
@@ -166,5 +166,70 @@ test.describe('Property Lifecycle Integration', () => {
       saveTestLogs('E2E_INTEG_001');
     }
   });
+
+  test('E2E_INTEG_003: Verify brokerage search (PostgREST or= filter) finds properties by city, street or type', async ({ page }) => {
+    initTestLog('E2E_INTEG_003');
+    
+    try {
+      logStep('step1', 'Creating properties');
+      
+      const marker = `Search${Math.random().toString(36).substring(2, 8)}`;
+      const ownerContact = await createContact(apiContext, {
+        full_name: 'Search Owner',
+        email: `${marker.toLowerCase()}@example.com`,
+      });
+      
+      const byStreet = await createProperty(apiContext, {
+        contact_id: ownerContact,
+        category: 'מגורים',
+        street: `רחוב ${marker}`,
+      });
+      
+      const byCity = await createProperty(apiContext, {
+        contact_id: ownerContact,
+        category: 'מגורים',
+        city: `${marker.toUpperCase()} City`,
+      });
+      
+      const unrelated = await createProperty(apiContext, {
+        contact_id: ownerContact,
+        category: 'מגורים',
+      });
+      
+      logStep('step2', 'Searching the way PropertyBrokerage does');
+      
+      // Same query string BaseEntity.list builds for the brokerage search
+      const params = new URLSearchParams();
+      params.append('category', 'eq.מגורים');
+      params.append('or', `(city.ilike.*${marker}*,street.ilike.*${marker}*,property_type.ilike.*${marker}*)`);
+      params.append('select', '*,contact(*)');
+      params.append('order', 'created_date.desc');
+      params.append('limit', '1000');
+      
+      const results = await apiClient.get(`/property?${params.toString()}`);
+      const ids = results.map((property: any) => property.id);
+      
+      expect(ids).toContain(byStreet);
+      expect(ids).toContain(byCity); // ilike is case-insensitive
+      expect(ids).not.toContain(unrelated);
+      
+      logStep('step3', 'Searching with a term on an embedded resource');
+      
+      // BuyersBrokerage also searches contact.full_name, which this backend
+      // cannot evaluate: the search is skipped, not rejected
+      const clientParams = new URLSearchParams();
+      clientParams.append('or', `(city.ilike.*${marker}*,contact.full_name.ilike.*${marker}*)`);
+      const clients = await apiClient.get(`/client?${clientParams.toString()}`);
+      expect(Array.isArray(clients)).toBe(true);
+      
+      logStep('complete', 'Brokerage search test completed successfully');
+    } catch (error) {
+      await captureScreenshotOnFailure(page, 'E2E_INTEG_003');
+      logError(error as Error);
+      throw error;
+    } finally {
+      saveTestLogs('E2E_INTEG_003');
+    }
+  });
 });
 